@@ -41,7 +41,7 @@ Classes for creating, connecting, modifying and recording from neurons
     Connectors: AllToAllConnector, OneToOneConnector, FixedProbabilityConnector,
                 DistanceDependentProbabilityConnector, FixedNumberPreConnector,
                 FixedNumberPostConnector, FromListConnector, FromFileConnector,
-                CSAConnector, ArrayConnector, IndexBasedConnector
+                CSAConnector, ArrayConnector, IndexBasedConnector, CachedConnector
     Standard cell types: IF_curr_exp, IF_curr_alpha, IF_cond_exp, IF_cond_alpha,
                 IF_cond_exp_gsfa_grr, IF_facets_hardware1, HH_cond_exp,
                 EIF_cond_alpha_isfa_ista, EIF_cond_exp_isfa_ista,
@@ -53,7 +53,8 @@ Classes for creating, connecting, modifying and recording from neurons
                 GutigWeightDependence, SpikePairRule
                 (not all combinations area available for all simulator backends).
     Current injection: DCSource, ACSource, StepCurrentSource, NoisyCurrentSource.
-    File types: StandardTextFile, PickleFile, NumpyBinaryFile, HDF5ArrayFile
+    File types: StandardTextFile, PickleFile, NumpyBinaryFile, NumpyMemmapFile,
+                HDF5ArrayFile
 
 Available simulator modules:
     nest
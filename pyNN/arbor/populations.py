@@ -94,9 +94,7 @@ class Population(common.Population):
             return arbor.cable_cell(args["tree"], args["decor"], args["labels"])
 
     def _create_cells(self):
-        # for now, we create all cells and store them in memory,
-        # however it might be better to override __getitem__
-        # and create them on the fly
+        # Cell objects are created on the fly, see _create_id()
 
         if isinstance(self.celltype, StandardCellType):
             parameter_space = self.celltype.native_parameters
@@ -111,14 +109,9 @@ class Population(common.Population):
             self._arbor_cell_description = parameter_space["cell_description"]
             self._arbor_cell_description.base_value.set_shape(parameter_space.shape)
 
-        id_range = np.arange(simulator.state.id_counter,
-                             simulator.state.id_counter + self.size)
-        self.all_cells = np.array(
-            [simulator.Cell(id) for id in id_range],
-            dtype=simulator.Cell
-        )
-        for obj in self.all_cells:
-            obj.parent = self
+        self._all_ids = np.arange(simulator.state.id_counter,
+                                  simulator.state.id_counter + self.size,
+                                  dtype=np.int64)
 
         # for i, cell in enumerate(self.all_cells):
         #     #for key, value in parameter_space.items():
@@ -132,7 +125,13 @@ class Population(common.Population):
         self._parameters = parameter_space  # used for querying parameters before/after running simulation
 
         simulator.state.id_counter += self.size
-        self._mask_local = np.ones_like(id_range, dtype=bool)
+        self._mask_local = np.ones_like(self._all_ids, dtype=bool)
+
+    def _create_id(self, index):
+        """Create the Cell object for the cell at position `index`."""
+        cell = simulator.Cell(self._all_ids[index])
+        cell.parent = self
+        return cell
 
     def _set_initial_value_array(self, variable, initial_values):
         if variable != "v":
@@ -62,7 +62,7 @@ class Recorder(recording.Recorder):
         probe_indices = defaultdict(int)
         for variable in self.recorded:
             if variable.name != "spikes":
-                for cell in self.recorded[variable]:
+                for cell in self._get_cells(self.recorded[variable]):
                     probeset_id = arbor.cell_member(cell.gid, probe_indices[cell.gid])
                     probe_indices[cell.gid] += 1
                     handle = arbor_sim.sample(probeset_id, arbor.regular_schedule(self.sampling_interval))
@@ -76,7 +76,7 @@ class Recorder(recording.Recorder):
             else:
                 locset = variable.location
 
-            if gid in [cell.gid for cell in self.recorded[variable]]:
+            if gid in [cell.gid for cell in self._get_cells(self.recorded[variable])]:
                 if variable.name == "spikes":
                     continue
                 elif variable.name == "v":
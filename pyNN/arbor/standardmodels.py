@@ -60,10 +60,10 @@ class DCSource(BaseCurrentSource, electrodes.DCSource):
     def inject_into(self, cells, location=None):  # rename to `locations` ?
         if hasattr(cells, "parent"):
             cell_descr = cells.parent._arbor_cell_description.base_value
-            index = cells.parent.id_to_index(cells.all_cells.astype(int))
+            index = cells.parent.id_to_index(cells._all_ids)
         elif hasattr(cells, "_arbor_cell_description"):
             cell_descr = cells._arbor_cell_description.base_value
-            index = cells.id_to_index(cells.all_cells.astype(int))
+            index = cells.id_to_index(cells._all_ids)
         else:
             assert isinstance(cells, (list, tuple))
             # we're assuming all cells have the same parent here
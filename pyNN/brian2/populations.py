@@ -137,10 +137,9 @@ class Population(common.Population, PopulationMixin):
     _assembly_class = Assembly
 
     def _create_cells(self):
-        id_range = np.arange(simulator.state.id_counter,
-                             simulator.state.id_counter + self.size)
-        self.all_cells = np.array([simulator.ID(id) for id in id_range],
-                                  dtype=simulator.ID)
+        self._all_ids = np.arange(simulator.state.id_counter,
+                                  simulator.state.id_counter + self.size,
+                                  dtype=np.int64)
         # all cells are local. This doesn't seem very efficient.
         self._mask_local = np.ones((self.size,), bool)
 
@@ -155,8 +154,6 @@ class Population(common.Population, PopulationMixin):
         self.brian2_group = self.celltype.brian2_model(self.size,
                                                        self.celltype.eqs,
                                                        **parameter_space)
-        for id in self.all_cells:
-            id.parent = self
         simulator.state.id_counter += self.size
         simulator.state.network.add(self.brian2_group)
 
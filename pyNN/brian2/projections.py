@@ -284,18 +284,22 @@ class Projection(common.Projection):
         return values
 
     def _get_attributes_as_list(self, attribute_names):
+        a = np.array(self._get_attributes_as_columns(attribute_names))
+        return [tuple(x) for x in a.T]
+
+    def _get_attributes_as_columns(self, attribute_names):
         if isinstance(self.post, common.Assembly) or isinstance(self.pre, common.Assembly):
             raise NotImplementedError
         values = []
         syn_obj = self._brian2_synapses[0][0]
         for name in attribute_names:
             if name == "presynaptic_index":
-                value = syn_obj.i[:]  # _indices.synaptic_pre.get_value()
+                value = np.asarray(syn_obj.i[:], dtype=int)  # _indices.synaptic_pre.get_value()
                 if hasattr(self.pre, "parent"):
                     # map index in parent onto index in view
                     value = self.pre.index_from_parent_index(value)
             elif name == "postsynaptic_index":
-                value = syn_obj.j[:]  # _indices.synaptic_post.get_value()
+                value = np.asarray(syn_obj.j[:], dtype=int)  # _indices.synaptic_post.get_value()
                 if hasattr(self.post, "parent"):
                     # map index in parent onto index in view
                     value = self.post.index_from_parent_index(value)
@@ -307,11 +311,9 @@ class Projection(common.Projection):
                 #       in all backends to properly use translation
                 ps = self.synapse_type.reverse_translate(native_ps)
                 ps.evaluate()
-                value = ps[name]
+                value = np.asarray(ps[name], dtype=float)
             values.append(value)
-        a = np.array(values)
-
-        return [tuple(x) for x in a.T]
+        return values
 
     def _set_tau_syn_for_tsodyks_markram(self):
         if isinstance(self.post, common.Assembly) or isinstance(self.pre, common.Assembly):
@@ -37,8 +37,7 @@ class Recorder(recording.Recorder):
         else:
             translations = self.population.celltype.state_variable_translations
             varname = translations[variable.name]['translated_name']
-            neurons_to_record = np.sort(np.fromiter(
-                self.recorded[variable], dtype=int)) - self.population.first_id
+            neurons_to_record = self.recorded[variable] - self.population.first_id
             self._devices[variable.name] = brian2.StateMonitor(
                 group, varname,
                 record=neurons_to_record,
@@ -81,7 +80,7 @@ class Recorder(recording.Recorder):
         # need to filter according to ids
 
         # check that the requested ids have indeed been recorded
-        if not set(ids).issubset(self.recorded[variable]):
+        if not np.isin(ids, self.recorded[variable]).all():
             raise Exception("You are requesting data from neurons that have not been recorded")
         device = self._devices[variable.name]
         varname = self.population.celltype.state_variable_translations[variable.name]['translated_name']
@@ -106,8 +105,8 @@ class Recorder(recording.Recorder):
         N = {}
         filtered_ids = self.filter_recorded(variable, filter_ids)
         padding = self.population.first_id
-        indices = np.fromiter(filtered_ids, dtype=int) - padding
+        indices = filtered_ids - padding
         spiky = self._devices['spikes'].spike_trains()
         for i, id in zip(indices, filtered_ids):
-            N[id] = len(spiky[i])
+            N[int(id)] = len(spiky[i])
         return N
@@ -13,7 +13,7 @@ import operator
 import warnings
 from itertools import chain
 from functools import reduce
-from collections import defaultdict
+from collections import defaultdict, OrderedDict
 import numpy as np
 from .. import random, recording, errors, standardmodels, core, space, descriptions
 from ..models import BaseCellType
@@ -151,6 +151,7 @@ class IDMixin(object):
 
 class BasePopulation(object):
     _record_filter = None
+    _local_cells = None
 
     def __getitem__(self, index):
         """
@@ -181,11 +182,30 @@ class BasePopulation(object):
     @property
     def local_size(self):
         """Return the number of cells in the population on the local MPI node"""
-        return len(self.local_cells)  # would self._mask_local.sum() be faster?
+        return int(np.count_nonzero(self._mask_local))
 
     def __iter__(self):
         """Iterator over cell ids on the local node."""
-        return iter(self.local_cells)
+        return (self[i] for i in np.flatnonzero(self._mask_local))
+
+    def _id_array(self, indices):
+        """
+        Return an object array containing the ID objects of the cells with the
+        given indices.
+        """
+        ids = np.empty((len(indices),), dtype=object)
+        ids[:] = [self[i] for i in indices]
+        return ids
+
+    @property
+    def local_cells(self):
+        """
+        An array containing the ID objects of the cells on the local node.
+        This is only created on first access.
+        """
+        if self._local_cells is None:
+            self._local_cells = self._id_array(np.flatnonzero(self._mask_local))
+        return self._local_cells
 
     @property
     def conductance_based(self):
@@ -209,7 +229,7 @@ class BasePopulation(object):
 
     def all(self):
         """Iterator over cell ids on all MPI nodes."""
-        return iter(self.all_cells)
+        return (self[i] for i in range(self.size))
 
     def __add__(self, other):
         """
@@ -297,21 +317,7 @@ class BasePopulation(object):
         parameters = parameter_space.as_dict()
 
         if gather is True and self._simulator.state.num_processes > 1:
-            # seems inefficient to do it in a loop - should do as single operation
-            for name in parameter_names:
-                values = parameters[name]
-                if isinstance(values, np.ndarray):
-                    all_values = {self._simulator.state.mpi_rank: values.tolist()}
-                    local_indices = np.arange(self.size,)[self._mask_local].tolist()
-                    all_indices = {self._simulator.state.mpi_rank: local_indices}
-                    all_values = recording.gather_dict(all_values)
-                    all_indices = recording.gather_dict(all_indices)
-                    if self._simulator.state.mpi_rank == 0:
-                        values = reduce(operator.add, all_values.values())
-                        indices = reduce(operator.add, all_indices.values())
-                        idx = np.argsort(indices)
-                        values = np.array(values)[idx]
-                parameters[name] = values
+            self._gather_parameters(parameters, simplify)
         try:
             values = [parameters[name] for name in parameter_names]
         except KeyError as err:
@@ -323,6 +329,47 @@ class BasePopulation(object):
             assert len(parameter_names) == 1
             return values[0]
 
+    def _gather_parameters(self, parameters, simplify):
+        """
+        Replace the local parameter values in `parameters` with the values
+        for all cells, on the MPI root node.
+        """
+        # homogeneous values are expanded, since a parameter may be homogeneous
+        # on some nodes but not on others, and all nodes must take part in the
+        # same collective operations
+        numeric_names = []
+        object_names = []
+        for name in sorted(parameters):  # the order must be the same on all nodes
+            values = parameters[name]
+            if isinstance(values, np.ndarray) and values.dtype == object:
+                object_names.append(name)
+            else:
+                numeric_names.append(name)
+        local_indices = np.flatnonzero(self._mask_local)
+        columns = [np.broadcast_to(np.asarray(parameters[name]), local_indices.shape)
+                   for name in numeric_names]
+        # all numeric parameters are sent in a single set of typed collectives
+        columns = recording.gather_columns([local_indices] + columns)
+        is_root = self._simulator.state.mpi_rank == recording.MPI_ROOT
+        if is_root:
+            indices = columns[0]
+            for name, column in zip(numeric_names, columns[1:]):
+                values = np.empty_like(column)
+                values[indices] = column
+                if simplify:
+                    values = simplify_parameter_array(values)
+                parameters[name] = values
+        # arrays of Python objects, e.g. Sequences, cannot be sent as typed
+        # buffers, so are pickled
+        for name in object_names:
+            all_values = recording.gather_dict(
+                {self._simulator.state.mpi_rank: (local_indices, parameters[name])})
+            if is_root:
+                values = np.empty((self.size,), dtype=object)
+                for indices, rank_values in all_values.values():
+                    values[indices] = rank_values
+                parameters[name] = values
+
     def set(self, **parameters):
         """
         Set one or more parameters for every cell in the population.
@@ -455,10 +502,7 @@ class BasePopulation(object):
             self.recorder.reset()
         else:
             logger.debug("%s.record('%s')", self.label, variables)
-            if self._record_filter is None:
-                self.recorder.record(variables, self.all_cells, sampling_interval, locations)
-            else:
-                self.recorder.record(variables, self._record_filter, sampling_interval, locations)
+            self.recorder.record(variables, self._all_ids, sampling_interval, locations)
         if isinstance(to_file, str):
             self.recorder.file = to_file
             self._simulator.state.write_on_end.append((self, variables, self.recorder.file))
@@ -591,9 +635,9 @@ class BasePopulation(object):
         """
         if isinstance(file, str):
             file = recording.files.StandardTextFile(file, mode='w')
-        cells = self.all_cells
+        cells = self._all_ids
         result = np.empty((len(cells), 4))
-        result[:, 0] = np.array([self.id_to_index(id) for id in cells])
+        result[:, 0] = self.id_to_index(cells)
         result[:, 1:4] = self.positions.T
         if self._simulator.state.mpi_rank == 0:
             file.write(result, {'population': self.label})
@@ -631,6 +675,7 @@ class Population(BasePopulation):
             supplied.
     """
     _nPop = 0
+    max_cached_ids = 10000
 
     def __init__(self, size, cellclass, cellparams=None, structure=None,
                  initial_values={}, label=None):
@@ -690,13 +735,20 @@ class Population(BasePopulation):
                 f"not a {type(cellclass)}")
         self.annotations = {}
         self.recorder = self._recorder_class(self)
-        # Build the arrays of cell ids
-        # Cells on the local node are represented as ID objects, other cells by integers
-        # All are stored in a single numpy array for easy lookup by address
-        # The local cells are also stored in a list, for easy iteration
+        # Build the array of cell ids
+        # The ids of all cells are stored as integers in a single numpy array,
+        # `_all_ids`, for easy lookup by address and vectorized arithmetic.
+        # ID objects are only created when individual cells are accessed.
+        # The most recently used are cached in `_cell_ids`, up to
+        # `max_cached_ids` of them.
+        self._cell_ids = OrderedDict()
+        self._all_cells = None
         self._create_cells()
-        self.first_id = self.all_cells[0]
-        self.last_id = self.all_cells[-1]
+        # position of each cell among the cells on the local MPI node (-1 for
+        # cells on other nodes), used by id_to_local_index()
+        self._local_indices = np.where(self._mask_local, np.cumsum(self._mask_local) - 1, -1)
+        self.first_id = self[0]
+        self.last_id = self[-1]
         self.initial_values = {}
         all_initial_values = self.celltype.default_initial_values.copy()
         all_initial_values.update(initial_values)
@@ -707,12 +759,37 @@ class Population(BasePopulation):
         return "Population(%d, %r, structure=%r, label=%r)" % (
             self.size, self.celltype, self.structure, self.label)
 
+    def _create_id(self, index):
+        """Create the ID object for the cell at position `index`."""
+        id = self._simulator.ID(self._all_ids[index])
+        id.parent = self
+        return id
+
+    def __getitem__(self, index):
+        if isinstance(index, (int, np.integer)) and self._all_cells is None:
+            index = range(self.size)[index]  # handles negative indices and bounds checking
+            if self._local_cells is not None and self._mask_local[index]:
+                return self._local_cells[self._local_indices[index]]
+            if index in self._cell_ids:
+                self._cell_ids.move_to_end(index)
+            else:
+                self._cell_ids[index] = self._create_id(index)
+                if len(self._cell_ids) > self.max_cached_ids:
+                    self._cell_ids.popitem(last=False)
+            return self._cell_ids[index]
+        return super(Population, self).__getitem__(index)
+
     @property
-    def local_cells(self):
+    def all_cells(self):
         """
-        An array containing cell ids for the local node.
+        An array containing the ID objects of all cells in the population, on
+        all MPI nodes. This is only created on first access; where possible,
+        use the integer array `_all_ids` instead.
         """
-        return self.all_cells[self._mask_local]
+        if self._all_cells is None:
+            self._all_cells = self._id_array(range(self.size))
+            self._cell_ids = OrderedDict()
+        return self._all_cells
 
     def id_to_index(self, id):
         """
@@ -728,7 +805,7 @@ class Population(BasePopulation):
             return int(id - self.first_id)  # this assumes ids are consecutive
         else:
             if isinstance(id, PopulationView):
-                id = id.all_cells
+                id = id._all_ids
             id = np.array(id)
             if (self.first_id > id.min()) or (self.last_id < id.max()):
                 raise ValueError("ids should be in the range [%d,%d], actually [%d, %d]" % (
@@ -741,9 +818,13 @@ class Population(BasePopulation):
         (order in the Population), counting only cells on the local MPI node.
         """
         if self._simulator.state.num_processes > 1:
-            return self.local_cells.tolist().index(id)          # probably very slow
-            # return np.nonzero(self.local_cells == id)[0][0] # possibly faster?
-            # another idea - get global index, use idx-sum(mask_local[:idx])?
+            local_index = self._local_indices[self.id_to_index(id)]
+            if np.any(local_index < 0):
+                raise errors.NotLocalError(
+                    f"Cell(s) {id} do(es) not exist on this node.")
+            if np.iterable(local_index):
+                return local_index
+            return int(local_index)
         else:
             return self.id_to_index(id)
 
@@ -797,13 +878,13 @@ class Population(BasePopulation):
             "celltype": self.celltype.describe(template=None),
             "structure": None,
             "size": self.size,
-            "size_local": len(self.local_cells),
+            "size_local": self.local_size,
             "first_id": self.first_id,
             "last_id": self.last_id,
         }
         context.update(self.annotations)
-        if len(self.local_cells) > 0:
-            first_id = self.local_cells[0]
+        if self.local_size > 0:
+            first_id = self[int(np.flatnonzero(self._mask_local)[0])]
             context.update({
                 "local_first_id": first_id,
                 "cell_parameters": {}  # first_id.get_parameters(),
@@ -868,24 +949,39 @@ class PopulationView(BasePopulation):
                     self.mask = np.unique(self.mask)
                 self.mask.sort()  # needed by NEST.
                 # Maybe emit a warning or exception if mask is not already ordered?
-        self.all_cells = self.parent.all_cells[self.mask]
-        idx = np.argsort(self.all_cells)
-        self._is_sorted = np.all(idx == np.arange(len(self.all_cells)))
-        self.size = len(self.all_cells)
+        self._parent_indices = np.arange(self.parent.size)[self.mask]
+        self._all_ids = self.parent._all_ids[self.mask]
+        self._is_sorted = np.all(self._all_ids[:-1] <= self._all_ids[1:])
+        self.size = len(self._all_ids)
         self.label = label or "view of '%s' with size %s" % (parent.label, self.size)
         self._mask_local = self.parent._mask_local[self.mask]
-        self.local_cells = self.all_cells[self._mask_local]
-        # only works if we assume all_cells is sorted, otherwise could use min()
-        self.first_id = np.min(self.all_cells)
-        self.last_id = np.max(self.all_cells)
+        self.first_id = self[int(np.argmin(self._all_ids))]
+        self.last_id = self[int(np.argmax(self._all_ids))]
         self.annotations = {}
         self.recorder = self.parent.recorder
-        self._record_filter = self.all_cells
+        self._record_filter = self._all_ids
+        self._all_cells = None
 
     def __repr__(self):
         return "PopulationView(parent=%r, selector=%r, label=%r)" % (
             self.parent, self.mask, self.label)
 
+    def __getitem__(self, index):
+        if isinstance(index, (int, np.integer)):
+            return self.parent[int(self._parent_indices[index])]
+        return super(PopulationView, self).__getitem__(index)
+
+    @property
+    def all_cells(self):
+        """
+        An array containing the ID objects of all cells in the view, on all
+        MPI nodes. This is only created on first access; where possible, use
+        the integer array `_all_ids` instead.
+        """
+        if self._all_cells is None:
+            self._all_cells = self._id_array(range(self.size))
+        return self._all_cells
+
     @property
     def initial_values(self):
         # this is going to be complex - if we keep initial_values as a dict,
@@ -913,22 +1009,22 @@ class PopulationView(BasePopulation):
         """
         if not np.iterable(id):
             if self._is_sorted:
-                if id not in self.all_cells:
+                if id not in self._all_ids:
                     raise IndexError("ID %s not present in the View" % id)
-                return np.searchsorted(self.all_cells, id)
+                return np.searchsorted(self._all_ids, id)
             else:
-                result = np.where(self.all_cells == id)[0]
+                result = np.where(self._all_ids == id)[0]
             if len(result) == 0:
                 raise IndexError("ID %s not present in the View" % id)
             else:
                 return result
         else:
             if self._is_sorted:
-                return np.searchsorted(self.all_cells, id)
+                return np.searchsorted(self._all_ids, id)
             else:
                 result = np.array([], dtype=int)
                 for item in id:
-                    data = np.where(self.all_cells == item)[0]
+                    data = np.where(self._all_ids == item)[0]
                     if len(data) == 0:
                         raise IndexError("ID %s not present in the View" % item)
                     elif len(data) > 1:
@@ -998,16 +1094,16 @@ class PopulationView(BasePopulation):
         Determine whether two views are different.
         """
         # We can't use the self.mask, as different masks can select the same cells
-        # (e.g. slices vs arrays), therefore we have to use self.all_cells
+        # (e.g. slices vs arrays), therefore we have to use self._all_ids
         if isinstance(other, PopulationView):
             return (
                 self.parent != other.parent
-                or not np.array_equal(self.all_cells, other.all_cells)
+                or not np.array_equal(self._all_ids, other._all_ids)
             )
         elif isinstance(other, Population):
             return (
                 self.parent != other
-                or not np.array_equal(self.all_cells, other.all_cells)
+                or not np.array_equal(self._all_ids, other._all_ids)
             )
         else:
             return True
@@ -1055,6 +1151,9 @@ class Assembly(object):
         if kwargs:
             assert list(kwargs.keys()) == ['label']
         self.populations = []
+        # concatenated arrays and the ID index are computed on first use and
+        # cached until the list of populations changes
+        self._cache = {}
         for p in populations:
             self._insert(p)
         self.label = kwargs.get('label', 'assembly%d' % Assembly._count)
@@ -1068,12 +1167,13 @@ class Assembly(object):
     def _insert(self, element):
         if not isinstance(element, BasePopulation):
             raise TypeError("argument is a %s, not a Population." % type(element).__name__)
+        self._cache.clear()
         if isinstance(element, PopulationView):
             if element.parent not in self.populations:
                 double = False
                 for p in self.populations:
-                    data = np.concatenate((p.all_cells, element.all_cells))
-                    if len(np.unique(data)) != len(p.all_cells) + len(element.all_cells):
+                    data = np.concatenate((p._all_ids, element._all_ids))
+                    if len(np.unique(data)) != p.size + element.size:
                         logger.warning(
                             'Cannnot add a PopulationView to an Assembly '
                             'containing elements already present')
@@ -1099,10 +1199,30 @@ class Assembly(object):
 
     @property
     def all_cells(self):
-        result = self.populations[0].all_cells
-        for p in self.populations[1:]:
-            result = np.concatenate((result, p.all_cells))
-        return result
+        if "all_cells" not in self._cache:
+            self._cache["all_cells"] = np.concatenate([p.all_cells for p in self.populations])
+        return self._cache["all_cells"]
+
+    @property
+    def _all_ids(self):
+        if "all_ids" not in self._cache:
+            self._cache["all_ids"] = np.concatenate([p._all_ids for p in self.populations])
+        return self._cache["all_ids"]
+
+    @property
+    def _id_index(self):
+        """
+        A tuple (sorted_ids, order, duplicated) for looking up the indices of
+        IDs in an unsorted Assembly with np.searchsorted.
+        """
+        if "id_index" not in self._cache:
+            order = np.argsort(self._all_ids, kind="stable")
+            sorted_ids = self._all_ids[order]
+            duplicated = np.zeros_like(sorted_ids, dtype=bool)
+            duplicated[1:] = sorted_ids[1:] == sorted_ids[:-1]
+            duplicated[:-1] |= duplicated[1:]
+            self._cache["id_index"] = (sorted_ids, order, duplicated)
+        return self._cache["id_index"]
 
     def all(self):
         """Iterator over cell ids on all nodes."""
@@ -1110,8 +1230,10 @@ class Assembly(object):
 
     @property
     def _is_sorted(self):
-        idx = np.argsort(self.all_cells)
-        return np.all(idx == np.arange(len(self.all_cells)))
+        if "is_sorted" not in self._cache:
+            all_ids = self._all_ids
+            self._cache["is_sorted"] = np.all(all_ids[:-1] <= all_ids[1:])
+        return self._cache["is_sorted"]
 
     @property
     def _homogeneous_synapses(self):
@@ -1151,18 +1273,17 @@ class Assembly(object):
 
     @property
     def _mask_local(self):
-        result = self.populations[0]._mask_local
-        for p in self.populations[1:]:
-            result = np.concatenate((result, p._mask_local))
-        return result
+        if "mask_local" not in self._cache:
+            self._cache["mask_local"] = np.concatenate([p._mask_local for p in self.populations])
+        return self._cache["mask_local"]
 
     @property
     def first_id(self):
-        return np.min(self.all_cells)
+        return np.min(self._all_ids)
 
     @property
     def last_id(self):
-        return np.max(self.all_cells)
+        return np.max(self._all_ids)
 
     def id_to_index(self, id):
         """
@@ -1172,37 +1293,30 @@ class Assembly(object):
             >>> assert p.id_to_index(p[5]) == 5
             >>> assert p.id_to_index(p.index([1, 2, 3])) == [1, 2, 3]
         """
-        all_cells = self.all_cells
+        all_ids = self._all_ids
         if not np.iterable(id):
             if self._is_sorted:
-                return np.searchsorted(all_cells, id)
-            else:
-                result = np.where(all_cells == id)[0]
-            if len(result) == 0:
-                raise IndexError("ID %s not present in the View" % id)
-            else:
-                return result
+                return np.searchsorted(all_ids, id)
+            result = self.id_to_index(np.array([id]))
+            return int(result[0])
         else:
+            id = np.asarray(id)
             if self._is_sorted:
-                return np.searchsorted(all_cells, id)
-            else:
-                result = np.array([], dtype=int)
-                for item in id:
-                    data = np.where(all_cells == item)[0]
-                    if len(data) == 0:
-                        raise IndexError("ID %s not present in the Assembly" % item)
-                    elif len(data) > 1:
-                        raise Exception("ID %s is duplicated in the Assembly" % item)
-                    else:
-                        result = np.append(result, data)
-                return result
+                return np.searchsorted(all_ids, id)
+            sorted_ids, order, duplicated = self._id_index
+            pos = np.searchsorted(sorted_ids, id)
+            found = pos < sorted_ids.size
+            found[found] = sorted_ids[pos[found]] == id[found]
+            if not found.all():
+                raise IndexError("ID %s not present in the Assembly" % id[~found][0])
+            if duplicated[pos].any():
+                raise Exception("ID %s is duplicated in the Assembly" % id[duplicated[pos]][0])
+            return order[pos]
 
     @property
     def positions(self):
-        result = self.populations[0].positions
-        for p in self.populations[1:]:
-            result = np.hstack((result, p.positions))
-        return result
+        # not cached, since the positions of the populations can change, including in place
+        return np.hstack([p.positions for p in self.populations])
 
     @property
     def size(self):
@@ -1227,12 +1341,9 @@ class Assembly(object):
         consisting of appropriate populations and (possibly newly created)
         population views.
         """
-        count = 0
-        boundaries = [0]
-        for p in self.populations:
-            count += p.size
-            boundaries.append(count)
-        boundaries = np.array(boundaries, dtype=int)
+        if "boundaries" not in self._cache:
+            self._cache["boundaries"] = np.cumsum([0] + [p.size for p in self.populations])
+        boundaries = self._cache["boundaries"]
 
         if isinstance(index, (int, np.integer)):  # return an ID
             pindex = boundaries[1:].searchsorted(index, side='right')
@@ -1388,9 +1499,9 @@ class Assembly(object):
         """
         if isinstance(file, str):
             file = files.StandardTextFile(file, mode='w')
-        cells = self.all_cells
+        cells = self._all_ids
         result = np.empty((len(cells), 4))
-        result[:, 0] = np.array([self.id_to_index(id) for id in cells])
+        result[:, 0] = self.id_to_index(cells)
         result[:, 1:4] = self.positions.T
         if self._simulator.state.mpi_rank == 0:
             file.write(result, {'assembly': self.label})
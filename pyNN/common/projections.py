@@ -8,7 +8,6 @@ backend-specific Projection classes.
 """
 
 
-from functools import reduce
 import logging
 import operator
 from copy import deepcopy
@@ -305,7 +304,7 @@ class Projection(object):
             name of the attributes whose values are wanted, or a list of such
             names.
         `format`:
-            "list" or "array".
+            "list", "array", "sparse", "columns" or "structured".
         `gather`:
             If True, node 0 gets connection information from all MPI nodes,
             other nodes get information only from connections that exist in this node.
@@ -344,6 +343,27 @@ class Projection(object):
         controlled by the `multiple_synapses` argument, which must be one of
         {'last', 'first', 'sum', 'min', 'max'}.
 
+        With sparse format, returns a tuple of sparse matrices in compressed
+        sparse row (CSR) format, one for each name in `attribute_names`, with
+        an element for each pair of connected neurons, and the same handling
+        of multiple connections as for array format. These are
+        :class:`scipy.sparse.csr_matrix` objects if SciPy is available,
+        otherwise :class:`CSRMatrix` objects. Unlike array format, the memory
+        needed is proportional to the number of connections, not to the product
+        of the population sizes.
+
+        With columns format, returns a dict containing a 1D NumPy array for
+        each name in `attribute_names`, with one element per connection,
+        preceded (if `with_address` is True) by integer arrays
+        "presynaptic_index" and "postsynaptic_index". With structured format,
+        the same arrays are returned as the fields of a NumPy structured array.
+        These formats need much less memory than list format for large
+        projections. Example::
+
+            connections = prj.get(["weight", "delay"], format="structured")
+            strong = connections[connections["weight"] > 0.5]
+            targets = strong["postsynaptic_index"]  # integer array
+
         Values will be expressed in the standard PyNN units (i.e. millivolts,
         nanoamps, milliseconds, microsiemens, nanofarads, event per second).
         """
@@ -352,18 +372,19 @@ class Projection(object):
             return_single = True
         else:
             return_single = False
+        column_names = list(attribute_names)
         if isinstance(self.synapse_type, StandardSynapseType):
             attribute_names = self.synapse_type.get_native_names(*attribute_names)
         if format == 'list':
             names = list(attribute_names)
             if with_address:
                 names = ["presynaptic_index", "postsynaptic_index"] + names
-            values = self._get_attributes_as_list(names)
             if gather and self._simulator.state.num_processes > 1:
-                all_values = {self._simulator.state.mpi_rank: values}
-                all_values = recording.gather_dict(all_values, all=(gather == 'all'))
-                if gather == 'all' or self._simulator.state.mpi_rank == 0:
-                    values = reduce(operator.add, all_values.values())
+                columns = recording.gather_columns(self._get_attributes_as_columns(names),
+                                                   all=(gather == 'all'))
+                values = list(zip(*[column.tolist() for column in columns]))
+            else:
+                values = self._get_attributes_as_list(names)
             if not with_address and return_single:
                 values = [val[0] for val in values]
             return values
@@ -377,17 +398,13 @@ class Projection(object):
                 # Slaves nodes are returning list of connections, so this may be inconsistent...
                 names = list(attribute_names)
                 names = ["presynaptic_index", "postsynaptic_index"] + names
-                values = self._get_attributes_as_list(names)
-                all_values = {self._simulator.state.mpi_rank: values}
-                all_values = recording.gather_dict(all_values, all=(gather == 'all'))
+                columns = recording.gather_columns(self._get_attributes_as_columns(names),
+                                                   all=(gather == 'all'))
                 if gather == 'all' or self._simulator.state.mpi_rank == 0:
-                    tmp_values = reduce(operator.add, all_values.values())
-                    values = self._get_attributes_as_arrays(attribute_names,
-                                                            multiple_synapses=multiple_synapses)
-                    tmp_values = np.array(tmp_values)
-                    for i in range(len(values)):
-                        values[i][tmp_values[:, 0].astype(
-                            int), tmp_values[:, 1].astype(int)] = tmp_values[:, 2 + i]
+                    values = _dense_arrays(columns[0], columns[1], columns[2:],
+                                           (self.pre.size, self.post.size), multiple_synapses)
+                else:
+                    values = list(zip(*[column.tolist() for column in columns]))
             else:
                 values = self._get_attributes_as_arrays(attribute_names,
                                                         multiple_synapses=multiple_synapses)
@@ -397,28 +414,69 @@ class Projection(object):
                 return values[0]
             else:
                 return values
+        elif format == 'sparse':
+            if multiple_synapses not in Projection.MULTI_SYNAPSE_OPERATIONS:
+                raise ValueError("`multiple_synapses` argument must be one of {}".format(
+                    list(Projection.MULTI_SYNAPSE_OPERATIONS)))
+            names = ["presynaptic_index", "postsynaptic_index"] + list(attribute_names)
+            columns = self._get_attributes_as_columns(names)
+            if gather and self._simulator.state.num_processes > 1:
+                # all nodes other than the root (unless gather is 'all') return
+                # matrices containing only the local connections
+                columns = recording.gather_columns(columns, all=(gather == 'all'))
+            values = _csr_matrices(columns[0], columns[1], columns[2:],
+                                   (self.pre.size, self.post.size), multiple_synapses)
+            if return_single:
+                return values[0]
+            else:
+                return values
+        elif format in ('columns', 'structured'):
+            names = list(attribute_names)
+            if with_address:
+                names = ["presynaptic_index", "postsynaptic_index"] + names
+                column_names = ["presynaptic_index", "postsynaptic_index"] + column_names
+            columns = self._get_attributes_as_columns(names)
+            if gather and self._simulator.state.num_processes > 1:
+                columns = recording.gather_columns(columns, all=(gather == 'all'))
+            if format == 'columns':
+                return dict(zip(column_names, columns))
+            values = np.empty((columns[0].size,),
+                              dtype=[(name, column.dtype)
+                                     for name, column in zip(column_names, columns)])
+            for name, column in zip(column_names, columns):
+                values[name] = column
+            return values
         else:
-            raise Exception("format must be 'list' or 'array'")
+            raise Exception("format must be 'list', 'array', 'sparse', 'columns' or 'structured'")
 
     def _get_attributes_as_list(self, names):
         return [c.as_tuple(*names) for c in self.connections]
 
+    def _get_attributes_as_columns(self, names):
+        """
+        Return the values of the given attributes for the local connections,
+        as a list of 1D arrays. Indices are returned as integer arrays.
+        """
+        values = self._get_attributes_as_list(names)
+        columns = zip(*values) if values else [()] * len(names)
+        return [np.array(column, dtype=int if name in ("presynaptic_index", "postsynaptic_index")
+                         else float)
+                for name, column in zip(names, columns)]
+
+    def _get_connection_indices(self):
+        """
+        Return the pre- and post-synaptic indices of the local connections, as
+        two integer arrays.
+        """
+        return tuple(self._get_attributes_as_columns(["presynaptic_index", "postsynaptic_index"]))
+
     def _get_attributes_as_arrays(self, names, multiple_synapses='sum'):
-        multi_synapse_operation = Projection.MULTI_SYNAPSE_OPERATIONS[multiple_synapses]
-        all_values = []
-        for attribute_name in names:
-            values = np.nan * np.ones((self.pre.size, self.post.size))
-            if attribute_name[-1] == "s":  # weights --> weight, delays --> delay
-                attribute_name = attribute_name[:-1]
-            for c in self.connections:
-                value = getattr(c, attribute_name)
-                addr = (c.presynaptic_index, c.postsynaptic_index)
-                if np.isnan(values[addr]):
-                    values[addr] = value
-                else:
-                    values[addr] = multi_synapse_operation(values[addr], value)
-            all_values.append(values)
-        return all_values
+        # weights --> weight, delays --> delay
+        names = [name[:-1] if name[-1] == "s" else name for name in names]
+        columns = self._get_attributes_as_columns(
+            ["presynaptic_index", "postsynaptic_index"] + names)
+        return _dense_arrays(columns[0], columns[1], columns[2:],
+                             (self.pre.size, self.post.size), multiple_synapses)
 
     @deprecated("get('weight', format, gather)")
     def getWeights(self, format='list', gather=True):
@@ -439,6 +497,11 @@ class Projection(object):
 
         Values will be expressed in the standard PyNN units (i.e. millivolts,
         nanoamps, milliseconds, microsiemens, nanofarads, event per second).
+
+        `file` may be a filename, in which case the data are saved as text, or
+        an instance of one of the classes in `pyNN.recording.files`. Saving in
+        the list format to a `NumpyMemmapFile` produces a binary file which
+        `FromFileConnector` can read efficiently.
         """
         if attribute_names in ('all', 'connections'):
             attribute_names = self.synapse_type.get_parameter_names()
@@ -523,3 +586,115 @@ class Connection(object):
     attributes.
     """
     pass
+
+
+class CSRMatrix(object):
+    """
+    A minimal sparse matrix in compressed sparse row format, used by
+    :meth:`Projection.get` when SciPy is not available.
+
+    The column indices and values of the elements in row `i` are
+    `indices[indptr[i]:indptr[i + 1]]` and `data[indptr[i]:indptr[i + 1]]`.
+    """
+
+    def __init__(self, data, indices, indptr, shape):
+        self.data = data
+        self.indices = indices
+        self.indptr = indptr
+        self.shape = shape
+
+    def __repr__(self):
+        return "<%dx%d CSRMatrix with %d stored elements>" % (self.shape + (self.nnz,))
+
+    @property
+    def nnz(self):
+        return self.data.size
+
+    def tocoo(self):
+        """Return the row indices, column indices and values of the stored elements."""
+        rows = np.repeat(np.arange(self.shape[0]), np.diff(self.indptr))
+        return rows, self.indices, self.data
+
+    def toarray(self, fill_value=0.0):
+        """Return a dense array, with `fill_value` for elements which are not stored."""
+        values = np.full(self.shape, fill_value, dtype=self.data.dtype)
+        rows, cols, data = self.tocoo()
+        values[rows, cols] = data
+        return values
+
+
+def _dense_arrays(pre_indices, post_indices, columns, shape, multiple_synapses='sum'):
+    """
+    Return one array of the given shape for each array in `columns`, with NaN
+    for pairs of neurons which are not connected, combining the values for
+    connections between the same pair of neurons according to `multiple_synapses`.
+    """
+    addr = (pre_indices, post_indices)
+    if multiple_synapses in ('first', 'last'):
+        keys = pre_indices.astype(np.int64) * shape[1] + post_indices
+        if multiple_synapses == 'last':
+            keys = keys[::-1]
+        # the index of the first occurrence of each (pre, post) pair
+        selected = np.unique(keys, return_index=True)[1]
+        if multiple_synapses == 'last':
+            selected = keys.size - 1 - selected
+        addr = (pre_indices[selected], post_indices[selected])
+    else:
+        connected = np.zeros(shape, dtype=bool)
+        connected[addr] = True
+    all_values = []
+    for values in columns:
+        if multiple_synapses in ('first', 'last'):
+            value_arr = np.full(shape, np.nan)
+            value_arr[addr] = values[selected]
+        else:
+            ufunc, identity = {
+                'sum': (np.add, 0.0),
+                'min': (np.minimum, np.inf),
+                'max': (np.maximum, -np.inf)
+            }[multiple_synapses]
+            value_arr = np.full(shape, identity)
+            ufunc.at(value_arr, addr, values)
+            value_arr[~connected] = np.nan
+        all_values.append(value_arr)
+    return all_values
+
+
+def _csr_matrices(pre_indices, post_indices, columns, shape, multiple_synapses='sum'):
+    """
+    Return one CSR matrix of the given shape for each array in `columns`,
+    combining the values for connections between the same pair of neurons
+    according to `multiple_synapses`.
+    """
+    keys = pre_indices.astype(np.int64) * shape[1] + post_indices
+    order = np.argsort(keys, kind="stable")  # stable, so that 'first' and 'last' are respected
+    keys = keys[order]
+    starts = np.flatnonzero(np.hstack(([True], keys[1:] != keys[:-1]))) if keys.size else keys
+    unique_keys = keys[starts]
+    rows, indices = np.divmod(unique_keys, shape[1])
+    indptr = np.zeros((shape[0] + 1,), dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=shape[0]), out=indptr[1:])
+    try:
+        from scipy.sparse import csr_matrix
+    except ImportError:
+        csr_matrix = None
+    matrices = []
+    for values in columns:
+        values = values[order]
+        if values.size == 0:
+            data = values
+        elif multiple_synapses == 'sum':
+            data = np.add.reduceat(values, starts)
+        elif multiple_synapses == 'min':
+            data = np.minimum.reduceat(values, starts)
+        elif multiple_synapses == 'max':
+            data = np.maximum.reduceat(values, starts)
+        elif multiple_synapses == 'first':
+            data = values[starts]
+        elif multiple_synapses == 'last':
+            data = values[np.hstack((starts[1:], [values.size])) - 1]
+        if csr_matrix is None:
+            matrices.append(CSRMatrix(data, indices, indptr, shape))
+        else:
+            matrices.append(csr_matrix((data, indices, indptr), shape=shape))
+    return matrices
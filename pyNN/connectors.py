@@ -10,12 +10,16 @@ for improved performance.
 
 from .random import RandomDistribution, AbstractRNG, NumpyRNG
 from .core import IndexBasedExpression
-from . import errors, descriptions
+from . import errors, descriptions, recording
 from .recording import files
 from .parameters import LazyArray
+from .space import CellGrid
 from .standardmodels import StandardSynapseType
 import numpy as np
-from itertools import repeat
+import os
+import hashlib
+from itertools import repeat, chain
+from collections.abc import Iterator
 import logging
 from copy import copy, deepcopy
 
@@ -43,6 +47,53 @@ def _get_rng(rng):
         raise Exception("rng must be either None, or a subclass of pyNN.random.AbstractRNG")
 
 
+def _source_indices(source_mask, n):
+    """
+    Convert an element of a connection map column iterator (a boolean array,
+    an integer array or a single boolean) into an array of pre-synaptic indices.
+    """
+    if isinstance(source_mask, (bool, np.bool_)):
+        if source_mask:
+            return np.arange(n, dtype=int)
+        else:
+            return np.array([], dtype=int)
+    source_mask = np.asarray(source_mask)
+    if source_mask.dtype == bool:
+        return source_mask.nonzero()[0]
+    else:
+        return source_mask.astype(int, copy=False)
+
+
+def _group_by_target(sources, targets, n_targets):
+    """
+    Given flat arrays of pre- and post-synaptic indices, return the
+    pre-synaptic indices grouped by post-synaptic index, in compressed sparse
+    column form `(indptr, indices)`: the sources for target `j` are
+    `indices[indptr[j]:indptr[j + 1]]`, in the order in which they were given.
+    """
+    targets = np.asarray(targets, dtype=int)
+    order = np.argsort(targets, kind="stable")
+    indices = np.asarray(sources, dtype=int)[order]
+    indptr = np.zeros(n_targets + 1, dtype=int)
+    np.cumsum(np.bincount(targets, minlength=n_targets), out=indptr[1:])
+    return indptr, indices
+
+
+def _csr_source_generator(indptr, indices):
+    """
+    Return a connection map generator, suitable for `_standard_connect()`, which
+    produces the slices of `indices` corresponding to each post-synaptic neuron
+    (see `_group_by_target()`).
+    """
+    def generate_source_indices(mask=None):
+        columns = np.arange(indptr.size - 1)
+        if mask is not None:
+            columns = columns[mask]
+        for col in columns:
+            yield indices[indptr[col]:indptr[col + 1]]
+    return generate_source_indices
+
+
 class Connector(object):
     """
     Base class for connectors.
@@ -71,6 +122,13 @@ class Connector(object):
     def connect(self, projection):
         raise NotImplementedError()
 
+    def _use_bulk_connect(self, projection):
+        """
+        Determine whether connections should be created with the projection's
+        `_bulk_connect()` method, if it has one.
+        """
+        return hasattr(projection, "_bulk_connect") and self.location_selector is None
+
     def get_parameters(self):
         P = {}
         for name in self.parameter_names:
@@ -114,6 +172,22 @@ class Connector(object):
                     parameter_space[name] = map(distance_map)
         return parameter_space
 
+    def _check_parameters(self, projection, connection_parameters):
+        """Check that parameter values are valid."""
+        # it might be cheaper to do the weight and delay check before evaluating the
+        # larray, however this is challenging to do if the base value is a function or
+        # if there are a lot of operations, so for simplicity we do the check after
+        # evaluation
+        syn = projection.synapse_type
+        if hasattr(syn, "parameter_checks"):
+            for parameter_name, check in syn.parameter_checks.items():
+                native_parameter_name = syn.translations[parameter_name]["translated_name"]
+                # note that for delays we should also apply units scaling to the check
+                # values, since this currently only affects Brian we can probably
+                # handle that separately (for weights, checks are all based on zero)
+                if native_parameter_name in connection_parameters:
+                    check(connection_parameters[native_parameter_name], projection)
+
     def describe(self, template='connector_default.txt', engine='default'):
         """
         Returns a human-readable description of the connection method.
@@ -135,6 +209,9 @@ class MapConnector(Connector):
     containing either the (boolean) connectivity matrix (aka adjacency matrix, connection set
     mask, etc.) or the values of a synaptic connection parameter.
     """
+    # maximum number of elements of the connection matrix that are evaluated at once
+    # when creating connections in bulk (see `_standard_bulk_connect()`)
+    max_block_elements = 2**20
 
     def _standard_connect(self, projection, connection_map_generator, distance_map=None):
         """
@@ -153,11 +230,15 @@ class MapConnector(Connector):
         The `mask` argument, a boolean array, can be used to limit processing to just
         neurons which exist on the local MPI node.
 
+        If the projection provides a `_bulk_connect()` method, connections are
+        created in blocks of many post-synaptic neurons at a time, otherwise
+        `_convergent_connect()` is called once per post-synaptic neuron.
+
         todo: explain the argument `distance_map`.
         """
 
         column_indices = np.arange(projection.post.size)
-        postsynaptic_indices = projection.post.id_to_index(projection.post.all_cells)
+        postsynaptic_indices = projection.post.id_to_index(projection.post._all_ids)
 
         if (projection.synapse_type.native_parameters.parallel_safe
                 or hasattr(self, "rng") and self.rng.parallel_safe):
@@ -182,6 +263,10 @@ class MapConnector(Connector):
 
         parameter_space = self._parameters_from_synapse_type(projection, distance_map)
 
+        if self._use_bulk_connect(projection):
+            self._standard_bulk_connect(projection, components, parameter_space)
+            return
+
         # Loop over columns of the connection_map array
         # (equivalent to looping over post-synaptic neurons)
         for count, (col, postsynaptic_index, local, source_mask) in enumerate(zip(*components)):
@@ -192,22 +277,8 @@ class MapConnector(Connector):
             #                should be connected to, or a single boolean, meaning connect to
             #                all/none of the pre-synaptic neurons.
             #                It can also be an array of addresses.
-            _proceed = False
-            if source_mask is True or source_mask.any():
-                _proceed = True
-            elif isinstance(source_mask, np.ndarray):
-                if source_mask.dtype == bool:
-                    if source_mask.any():
-                        _proceed = True
-                elif len(source_mask) > 0:
-                    _proceed = True
-            if _proceed:
-                # Convert from boolean to integer mask, if necessary
-                if source_mask is True:
-                    source_mask = np.arange(projection.pre.size, dtype=int)
-                elif source_mask.dtype == bool:
-                    source_mask = source_mask.nonzero()[0]
-
+            source_mask = _source_indices(source_mask, projection.pre.size)
+            if source_mask.size > 0:
                 # Evaluate the lazy arrays containing the synaptic parameters
                 connection_parameters = {}
                 for name, map in parameter_space.items():
@@ -218,19 +289,7 @@ class MapConnector(Connector):
 
                 # Check that parameter values are valid
                 if self.safe:
-                    # it might be cheaper to do the weight and delay check before evaluating the
-                    # larray, however this is challenging to do if the base value is a function or
-                    # if there are a lot of operations, so for simplicity we do the check after
-                    # evaluation
-                    syn = projection.synapse_type
-                    if hasattr(syn, "parameter_checks"):
-                        for parameter_name, check in syn.parameter_checks.items():
-                            native_parameter_name = syn.translations[parameter_name]["translated_name"]  # noqa:E501
-                            # note that for delays we should also apply units scaling to the check
-                            # values, since this currently only affects Brian we can probably
-                            # handle that separately (for weights, checks are all based on zero)
-                            if native_parameter_name in connection_parameters:
-                                check(connection_parameters[native_parameter_name], projection)
+                    self._check_parameters(projection, connection_parameters)
 
                 if local:
                     # Connect the neurons
@@ -241,6 +300,85 @@ class MapConnector(Connector):
                     if self.callback:
                         self.callback(count / projection.post.local_size)
 
+    def _column_block_size(self, projection):
+        """
+        Number of post-synaptic neurons (columns of the connection matrix) to be
+        processed together in bulk-connection mode.
+        """
+        return max(1, self.max_block_elements // max(1, projection.pre.size))
+
+    def _standard_bulk_connect(self, projection, components, parameter_space):
+        """
+        Create connections in blocks of columns of the connection matrix, calling
+        `projection._bulk_connect()` once per block, with flat arrays of pre- and
+        post-synaptic indices and of parameter values.
+
+        `components` is the tuple of iterables created in `_standard_connect()`.
+        """
+        block_size = self._column_block_size(projection)
+        block = []
+        n_connections = 0
+        for count, (col, postsynaptic_index, local, source_mask) in enumerate(zip(*components)):
+            source_mask = _source_indices(source_mask, projection.pre.size)
+            if source_mask.size > 0:
+                block.append((col, postsynaptic_index, local, source_mask))
+                n_connections += source_mask.size
+            if len(block) >= block_size or n_connections >= self.max_block_elements:
+                self._connect_block(projection, block, parameter_space)
+                if self.callback:
+                    self.callback(count / projection.post.local_size)
+                block = []
+                n_connections = 0
+        if block:
+            self._connect_block(projection, block, parameter_space)
+            if self.callback:
+                self.callback(1.0)
+
+    def _connect_block(self, projection, block, parameter_space):
+        """
+        Evaluate the synaptic parameters for a block of columns of the connection
+        matrix and create the corresponding connections.
+
+        `block` is a list of `(col, postsynaptic_index, local, source_indices)` tuples.
+        """
+        columns, postsynaptic_indices, local, source_indices = zip(*block)
+        counts = np.array([sources.size for sources in source_indices])
+        presynaptic_indices = np.hstack(source_indices)
+
+        # Evaluate the lazy arrays containing the synaptic parameters
+        connection_parameters = {}
+        for name, map in parameter_space.items():
+            if map.is_homogeneous:
+                connection_parameters[name] = map.evaluate(simplify=True)
+            elif (isinstance(map.base_value, RandomDistribution)
+                    and not any(isinstance(arg, LazyArray) for f, arg in map.operations)):
+                # drawing all values at once gives the same values as drawing column by column
+                values = map.base_value.next(presynaptic_indices.size)
+                connection_parameters[name] = map._apply_operations(values)
+            else:
+                # evaluate only at the addresses of the connections, not for the
+                # whole columns, which matters for sparse connectivity, with a
+                # single (pointwise) fancy index for the whole block
+                connection_parameters[name] = map[presynaptic_indices,
+                                                  np.repeat(columns, counts)]
+
+        # Check that parameter values are valid
+        if self.safe:
+            self._check_parameters(projection, connection_parameters)
+
+        local = np.repeat(local, counts)
+        postsynaptic_indices = np.repeat(postsynaptic_indices, counts)
+        if not local.all():
+            presynaptic_indices = presynaptic_indices[local]
+            postsynaptic_indices = postsynaptic_indices[local]
+            for name, value in connection_parameters.items():
+                if isinstance(value, np.ndarray) and value.ndim > 0:
+                    connection_parameters[name] = value[local]
+        if presynaptic_indices.size > 0:
+            projection._bulk_connect(presynaptic_indices, postsynaptic_indices,
+                                     location_selector=self.location_selector,
+                                     **connection_parameters)
+
     def _connect_with_map(self, projection, connection_map, distance_map=None):
         """
         Create connections according to a connection map.
@@ -256,7 +394,45 @@ class MapConnector(Connector):
                 TODO
         """
         logger.debug("Connecting %s using a connection map" % projection.label)
-        self._standard_connect(projection, connection_map.by_column, distance_map)
+        if self._use_bulk_connect(projection):
+            block_size = self._column_block_size(projection)
+
+            def connection_map_generator(mask=None):
+                # evaluate the connection map a block of columns at a time
+                for column_indices, block in connection_map.by_column_block(block_size, mask):
+                    if isinstance(block, np.ndarray) and block.ndim == 2:
+                        yield from block.T
+                    else:
+                        yield from repeat(block, column_indices.size)
+        else:
+            connection_map_generator = connection_map.by_column
+        self._standard_connect(projection, connection_map_generator, distance_map)
+
+    def _get_source_filter(self, projection):
+        """
+        Return a function which removes, from an array of pre-synaptic indices
+        for a given column of the connection matrix, those indices which are
+        excluded by `allow_self_connections`, or None if no filtering is needed.
+
+        This is the counterpart of `_get_connection_map_no_self_connections()` and
+        `_get_connection_map_no_mutual_connections()` for connectors which generate
+        index arrays rather than connection maps.
+        """
+        from pyNN.common import Population
+        if self.allow_self_connections is True:
+            return None
+        elif self.allow_self_connections == 'NoMutual':
+            if (isinstance(projection.pre, Population)
+                    and isinstance(projection.post, Population)
+                    and projection.pre == projection.post):
+                return lambda sources, col: sources[sources > col]
+            else:
+                raise NotImplementedError("todo")
+        else:
+            presynaptic_cells = projection.pre._all_ids
+            postsynaptic_cells = projection.post._all_ids
+            return lambda sources, col: sources[presynaptic_cells[sources]
+                                                != postsynaptic_cells[col]]
 
     def _get_connection_map_no_self_connections(self, projection):
         from pyNN.common import Population
@@ -268,9 +444,9 @@ class MapConnector(Connector):
         else:
             # this could be optimized by checking parent or component populations
             # but should handle both views and assemblies
-            a = np.broadcast_to(projection.pre.all_cells,
+            a = np.broadcast_to(projection.pre._all_ids,
                                 (projection.post.size, projection.pre.size)).T
-            b = projection.post.all_cells
+            b = projection.post._all_ids
             connection_map = LazyArray(a != b, shape=projection.shape)
         return connection_map
 
@@ -336,12 +512,19 @@ class FixedProbabilityConnector(MapConnector):
             or only to other neurons in the Population.
         `rng`:
             an :class:`RNG` instance used to evaluate whether connections exist
+        `sparse`:
+            if True, only the connections that exist are sampled: for each
+            post-synaptic cell, the gaps between successive connected
+            pre-synaptic indices are drawn from a geometric distribution. This
+            needs of the order of `p_connect` times fewer random numbers than the
+            default method, and so is much faster for small `p_connect`, but the
+            connections created are different for a given `rng` seed.
     """
-    parameter_names = ('allow_self_connections', 'p_connect')
+    parameter_names = ('allow_self_connections', 'p_connect', 'sparse')
 
     def __init__(self, p_connect, allow_self_connections=True,
                  location_selector=None,
-                 rng=None, safe=True, callback=None):
+                 rng=None, safe=True, callback=None, sparse=False):
         """
         Create a new connector.
         """
@@ -351,8 +534,12 @@ class FixedProbabilityConnector(MapConnector):
         self.p_connect = float(p_connect)
         assert 0 <= self.p_connect
         self.rng = _get_rng(rng)
+        self.sparse = sparse
 
     def connect(self, projection):
+        if self.sparse:
+            self._connect_sparse(projection)
+            return
         random_map = LazyArray(RandomDistribution('uniform', (0, 1), rng=self.rng),
                                projection.shape)
         connection_map = random_map < self.p_connect
@@ -364,6 +551,47 @@ class FixedProbabilityConnector(MapConnector):
             connection_map *= mask
         self._connect_with_map(projection, connection_map)
 
+    def _sample_sources(self, n):
+        """
+        Return the sorted indices, in `range(n)`, of the pre-synaptic cells to
+        be connected to a single post-synaptic cell, each index being selected
+        independently with probability `p_connect`.
+        """
+        if self.p_connect >= 1:
+            return np.arange(n)
+        elif self.p_connect == 0 or n == 0:
+            return np.array([], dtype=int)
+        log_q = np.log1p(-self.p_connect)
+        # draw enough gaps that a single batch will usually suffice
+        mean = n * self.p_connect
+        batch_size = int(mean + 3 * np.sqrt(mean)) + 1
+        sources = []
+        position = -1
+        while position < n:
+            uniform = self.rng.next(batch_size)
+            # gaps between successive selected indices are geometrically distributed
+            gaps = np.floor(np.log1p(-uniform) / log_q).astype(np.int64) + 1
+            positions = position + np.cumsum(gaps)
+            sources.append(positions[positions < n])
+            position = positions[-1]
+        return np.hstack(sources)
+
+    def _connect_sparse(self, projection):
+        source_filter = self._get_source_filter(projection)
+
+        def connection_map_generator(mask=None):
+            columns = np.arange(projection.post.size)
+            if mask is not None:
+                columns = columns[mask]
+            for col in columns:
+                sources = self._sample_sources(projection.pre.size)
+                if source_filter:
+                    sources = source_filter(sources, col)
+                yield sources
+
+        logger.debug("Connecting %s using sparse sampling" % projection.label)
+        self._standard_connect(projection, connection_map_generator)
+
 
 class DistanceDependentProbabilityConnector(MapConnector):
     """
@@ -381,12 +609,21 @@ class DistanceDependentProbabilityConnector(MapConnector):
             or only to other neurons in the Population.
         `rng`:
             an :class:`RNG` instance used to evaluate whether connections exist
+        `max_distance`:
+            if given, the connection probability is taken to be zero for pairs
+            of cells further apart than this distance. Candidate pre-synaptic
+            cells are then found using a spatial index (see
+            :class:`~pyNN.space.CellGrid`), so that building the projection
+            scales with the number of cell pairs within range, rather than with
+            the total number of cell pairs. Note that random numbers are only
+            drawn for the pairs within range, so the connections created differ
+            from those obtained without `max_distance`, even with the same `rng`.
     """
-    parameter_names = ('allow_self_connections', 'd_expression')
+    parameter_names = ('allow_self_connections', 'd_expression', 'max_distance')
 
     def __init__(self, d_expression, allow_self_connections=True,
                  location_selector=None,
-                 rng=None, safe=True, callback=None):
+                 rng=None, safe=True, callback=None, max_distance=None):
         """
         Create a new connector.
         """
@@ -406,9 +643,15 @@ class DistanceDependentProbabilityConnector(MapConnector):
         self.allow_self_connections = allow_self_connections
         self.distance_function = eval("lambda d: %s" % self.d_expression)
         self.rng = _get_rng(rng)
+        if max_distance is not None and max_distance <= 0:
+            raise ValueError("max_distance must be positive")
+        self.max_distance = max_distance
 
     def connect(self, projection):
         distance_map = self._generate_distance_map(projection)
+        if self.max_distance is not None:
+            self._connect_within_distance(projection, distance_map)
+            return
         probability_map = self.distance_function(distance_map)
         random_map = LazyArray(RandomDistribution('uniform', (0, 1), rng=self.rng),
                                projection.shape)
@@ -421,6 +664,30 @@ class DistanceDependentProbabilityConnector(MapConnector):
             connection_map *= mask
         self._connect_with_map(projection, connection_map, distance_map)
 
+    def _connect_within_distance(self, projection, distance_map):
+        """
+        Create connections considering only the pairs of cells which are within
+        `max_distance` of each other.
+        """
+        source_filter = self._get_source_filter(projection)
+        grid = CellGrid(projection.pre.positions.T, self.max_distance, projection.space)
+        post_positions = projection.post.positions.T
+
+        def connection_map_generator(mask=None):
+            columns = np.arange(projection.post.size)
+            if mask is not None:
+                columns = columns[mask]
+            for col in columns:
+                sources, distances = grid.query(post_positions[col], self.max_distance)
+                probabilities = self.distance_function(distances)
+                sources = sources[self.rng.next(sources.size) < probabilities]
+                if source_filter:
+                    sources = source_filter(sources, col)
+                yield sources
+
+        logger.debug("Connecting %s using a spatial index" % projection.label)
+        self._standard_connect(projection, connection_map_generator, distance_map)
+
 
 class IndexBasedProbabilityConnector(MapConnector):
     """
@@ -509,7 +776,9 @@ class DisplacementDependentProbabilityConnector(IndexBasedProbabilityConnector):
             self._disp_function = disp_function
 
         def __call__(self, i, j):
-            disp = (self.projection.post.positions.T[j] - self.projection.pre.positions.T[i]).T
+            # `i` and `j` may be integers, or 1D or 2D index arrays
+            i, j = np.broadcast_arrays(i, j)
+            disp = self.projection.post.positions[:, j] - self.projection.pre.positions[:, i]
             return self._disp_function(disp)
 
     def __init__(self, disp_function, allow_self_connections=True,
@@ -531,7 +800,11 @@ class FromListConnector(Connector):
             (i.e. order in the Population, not the ID) of the presynaptic
             neuron, `post_idx` is the index of the postsynaptic neuron, and
             p1, p2, etc. are the synaptic parameters (e.g. weight, delay,
-            plasticity parameters).
+            plasticity parameters). This may also be an iterator which produces
+            chunks of such a list (e.g. arrays of a few million rows read in
+            turn from a file), so that lists too large to fit in memory can be
+            streamed. The iterator is consumed when the projection is created,
+            so such a connector can only be used for a single projection.
         `column_names`:
             the names of the parameters p1, p2, etc. If not provided, it is
             assumed the parameters are 'weight', 'delay' (for backwards
@@ -543,6 +816,8 @@ class FromListConnector(Connector):
             if True, display a progress bar on the terminal.
     """
     parameter_names = ('conn_list',)
+    # chunks of the connection list, if given as an iterator (False once consumed)
+    _chunks = None
 
     def __init__(self, conn_list, column_names=None,
                  location_selector=None, safe=True, callback=None):
@@ -550,9 +825,16 @@ class FromListConnector(Connector):
         Create a new connector.
         """
         Connector.__init__(self, location_selector, safe=safe, callback=callback)
-        self.conn_list = np.array(conn_list)
-        if len(conn_list) > 0:
-            n_columns = self.conn_list.shape[1]
+        if isinstance(conn_list, Iterator):
+            # a stream of chunks: look at the first chunk to determine the number of columns
+            first_chunk = np.array(next(conn_list, []))
+            self.conn_list = conn_list
+            self._chunks = chain([first_chunk], conn_list)
+            n_columns = first_chunk.shape[1] if first_chunk.size > 0 else 0
+        else:
+            self.conn_list = np.array(conn_list)
+            n_columns = self.conn_list.shape[1] if len(conn_list) > 0 else 0
+        if n_columns > 0:
             if column_names is None:
                 if n_columns == 2:
                     self.column_names = ()
@@ -570,49 +852,76 @@ class FromListConnector(Connector):
 
     def connect(self, projection):
         """Connect-up a Projection."""
-        logger.debug("conn_list (original) = \n%s", self.conn_list)
         synapse_parameter_names = projection.synapse_type.get_parameter_names()
         for name in self.column_names:
             if name not in synapse_parameter_names:
                 raise ValueError("%s is not a valid parameter for %s" % (
                                  name, projection.synapse_type.__class__.__name__))
-        if self.conn_list.size == 0:
-            return
-        if np.any(self.conn_list[:, 0] >= projection.pre.size):
+        if self._chunks is None:
+            chunks = [self.conn_list]
+        elif self._chunks is False:
+            raise errors.ConnectionError(
+                "The iterator of connections given to FromListConnector has already "
+                "been consumed by another projection")
+        else:
+            chunks = (np.array(chunk) for chunk in self._chunks)
+            self._chunks = False
+        for chunk in chunks:
+            if chunk.size > 0:
+                self._connect_chunk(projection, chunk)
+
+    def _connect_chunk(self, projection, conn_list):
+        """
+        Create the connections in an array with one row per connection.
+
+        The parameter columns are translated, evaluated and checked once for the
+        whole array. The connections with local targets are then passed to the
+        projection in a single call, if it supports bulk connection, or as one
+        contiguous slice per target.
+        """
+        logger.debug("conn_list (original) = \n%s", conn_list)
+        sources = conn_list[:, 0].astype(int)
+        targets = conn_list[:, 1].astype(int)
+        if np.any(sources >= projection.pre.size):
             raise errors.ConnectionError("source index out of range")
-        # need to do some profiling, to figure out the best way to do this:
-        #  - order of sorting/filtering by local
-        #  - use np.unique, or just do in1d(self.conn_list)?
-        idx = np.argsort(self.conn_list[:, 1])
-        targets = np.unique(self.conn_list[:, 1]).astype(int)
-        local = np.in1d(targets,
-                        np.arange(projection.post.size)[projection.post._mask_local],
-                        assume_unique=True)
-        local_targets = targets[local]
-        self.conn_list = self.conn_list[idx]
-        left = np.searchsorted(self.conn_list[:, 1], local_targets, 'left')
-        right = np.searchsorted(self.conn_list[:, 1], local_targets, 'right')
+        if np.any(targets >= projection.post.size):
+            raise errors.ConnectionError("target index out of range")
+        # keep only connections with local targets, sorted by target
+        local = projection.post._mask_local[targets]
+        idx = np.flatnonzero(local)[np.argsort(targets[local], kind="stable")]
+        sources = sources[idx]
+        targets = targets[idx]
         logger.debug("idx = %s", idx)
-        logger.debug("targets = %s", targets)
-        logger.debug("local_targets = %s", local_targets)
-        logger.debug("conn_list (sorted by target) = \n%s", self.conn_list)
-        logger.debug("left = %s", left)
-        logger.debug("right = %s", right)
+        if idx.size == 0:
+            return
 
-        for tgt, l, r in zip(local_targets, left, right):
-            sources = self.conn_list[l:r, 0].astype(int)
-            connection_parameters = deepcopy(projection.synapse_type.parameter_space)
+        connection_parameters = deepcopy(projection.synapse_type.parameter_space)
+        connection_parameters.shape = (idx.size,)
+        for col, name in enumerate(self.column_names, 2):
+            connection_parameters.update(**{name: conn_list[idx, col]})
+        if isinstance(projection.synapse_type, StandardSynapseType):
+            connection_parameters = projection.synapse_type.translate(
+                connection_parameters)
+        connection_parameters.evaluate()
+        connection_parameters = connection_parameters.as_dict()
+        if self.safe:
+            self._check_parameters(projection, connection_parameters)
+
+        if self._use_bulk_connect(projection):
+            projection._bulk_connect(sources, targets,
+                                     location_selector=self.location_selector,
+                                     **connection_parameters)
+            return
 
-            connection_parameters.shape = (r - l,)
-            for col, name in enumerate(self.column_names, 2):
-                connection_parameters.update(**{name: self.conn_list[l:r, col]})
-            if isinstance(projection.synapse_type, StandardSynapseType):
-                connection_parameters = projection.synapse_type.translate(
-                    connection_parameters)
-            connection_parameters.evaluate()
-            projection._convergent_connect(sources, tgt,
-                                           location_selector=self.location_selector,
-                                           **connection_parameters)
+        local_targets, left = np.unique(targets, return_index=True)
+        right = np.append(left[1:], targets.size)
+        logger.debug("local_targets = %s", local_targets)
+        for tgt, l, r in zip(local_targets, left, right):
+            projection._convergent_connect(
+                sources[l:r], tgt,
+                location_selector=self.location_selector,
+                **{name: value[l:r] if isinstance(value, np.ndarray) else value
+                   for name, value in connection_parameters.items()})
 
 
 class FromFileConnector(FromListConnector):
@@ -630,6 +939,11 @@ class FromFileConnector(FromListConnector):
 
             Note that the header requires `#` at the beginning of the line.
 
+            For very large connection lists, a
+            :class:`~pyNN.recording.files.NumpyMemmapFile` may be used instead,
+            in which case only the connections to local post-synaptic neurons
+            are read from the file.
+
         `distributed`:
             if this is True, then each node will read connections from a file
             called `filename.x`, where `x` is the MPI rank. This speeds up
@@ -662,13 +976,18 @@ class FromFileConnector(FromListConnector):
         for ignore in "ij":
             if ignore in self.column_names:
                 self.column_names.remove(ignore)
-        self.conn_list = self.file.read()
+        if hasattr(self.file, "read_targets"):
+            # only read the rows for local targets
+            local_targets = np.flatnonzero(projection.post._mask_local)
+            self.conn_list = self.file.read_targets(local_targets)
+        else:
+            self.conn_list = self.file.read()
         FromListConnector.connect(self, projection)
 
 
 class FixedNumberConnector(MapConnector):
     # base class - should not be instantiated
-    parameter_names = ('allow_self_connections', 'n')
+    parameter_names = ('allow_self_connections', 'n', 'with_replacement')
 
     def __init__(self, n, allow_self_connections=True, with_replacement=False,
                  location_selector=None,
@@ -692,15 +1011,34 @@ class FixedNumberConnector(MapConnector):
         self.rng = _get_rng(rng)
 
     def _rng_uniform_int_exclude(self, n, size, exclude):
+        """
+        Draw `n` random integers in `range(size)`, excluding `exclude`, which
+        may be a single integer, or an array of length `n` giving a different
+        value to exclude for each draw.
+
+        Values are drawn from `range(size - 1)` and those greater than or equal
+        to `exclude` shifted up by one, unless the RNG uses rejection sampling,
+        in which case values equal to `exclude` are redrawn.
+        """
+        if size < 2:
+            # the only value in the range is excluded
+            if n > 0:
+                raise errors.ConnectionError(
+                    "Cannot draw %d values from range(%d) excluding %s" % (n, size, exclude))
+            return np.array([], dtype=int)
+        exclude = np.broadcast_to(exclude, (n,))
+        if not getattr(self.rng, "rejection_sampling", False):
+            res = self.rng.next(n, 'uniform_int', {"low": 0, "high": size - 1}, mask=None)
+            return res + (res >= exclude)
         res = self.rng.next(n, 'uniform_int', {"low": 0, "high": size}, mask=None)
         logger.debug("RNG0 res=%s" % res)
         idx = np.where(res == exclude)[0]
-        logger.debug("RNG1 exclude=%d, res=%s idx=%s" % (exclude, res, idx))
+        logger.debug("RNG1 exclude=%s, res=%s idx=%s" % (exclude, res, idx))
         while idx.size > 0:
             redrawn = self.rng.next(idx.size, 'uniform_int', {"low": 0, "high": size}, mask=None)
             res[idx] = redrawn
-            idx = idx[np.where(res == exclude)[0]]
-            logger.debug("RNG2 exclude=%d redrawn=%s res=%s idx=%s" % (exclude, redrawn, res, idx))
+            idx = idx[res[idx] == exclude[idx]]
+            logger.debug("RNG2 exclude=%s redrawn=%s res=%s idx=%s" % (exclude, redrawn, res, idx))
         return res
 
 
@@ -743,45 +1081,67 @@ class FixedNumberPostConnector(FixedNumberConnector):
             are created.
     """
 
-    def _get_num_post(self):
+    def _get_num_post(self, size):
         if isinstance(self.n, int):
-            n_post = self.n
+            n_post = np.full(size, self.n, dtype=int)
         else:
-            n_post = self.n.next()
+            n_post = np.asarray(self.n.next(size), dtype=int).reshape(size)
         return n_post
 
+    def _draw_without_replacement(self, start, n_post, size, exclude_self):
+        """
+        Draw the targets of the pre-synaptic neurons `start`, `start + 1`, ...,
+        the i-th of which connects to `n_post[i]` of the `size` post-synaptic
+        neurons, without replacement.
+
+        Each row of a block of uniform random numbers is sorted to give a random
+        order of the post-synaptic neurons, with the pre-synaptic neuron itself
+        placed last if self-connections are excluded. Each pre-synaptic neuron
+        then takes the first `n` neurons in this order, cycling through the
+        candidates if `n` is larger than their number.
+        """
+        n_sources = n_post.size
+        sources = np.arange(start, start + n_sources)
+        values = np.asarray(self.rng.next(n_sources * size, 'uniform', {"low": 0.0, "high": 1.0},
+                                          mask=None)).reshape((n_sources, size))
+        n_candidates = size
+        if exclude_self:
+            values[np.arange(n_sources), sources] = 2.0
+            n_candidates -= 1
+        order = np.argsort(values, axis=1)
+        rows = np.repeat(np.arange(n_sources), n_post)
+        # position of each connection among those of its pre-synaptic neuron
+        positions = np.arange(rows.size) - np.repeat(np.cumsum(n_post) - n_post, n_post)
+        return order[rows, positions % n_candidates]
+
     def connect(self, projection):
-        connections = [[] for i in range(projection.post.size)]
-        for source_index in range(projection.pre.size):
-            n = self._get_num_post()
-            if self.with_replacement:
-                if not self.allow_self_connections and projection.pre == projection.post:
-                    targets = self._rng_uniform_int_exclude(n, projection.post.size, source_index)
-                else:
-                    targets = self.rng.next(
-                        n, 'uniform_int', {"low": 0, "high": projection.post.size}, mask=None)
-            else:
-                all_cells = np.arange(projection.post.size)
-                if not self.allow_self_connections and projection.pre == projection.post:
-                    all_cells = all_cells[all_cells != source_index]
-                full_sets = n // all_cells.size
-                remainder = n % all_cells.size
-                target_sets = []
-                if full_sets > 0:
-                    target_sets = [all_cells] * full_sets
-                if remainder > 0:
-                    target_sets.append(self.rng.permutation(all_cells)[:remainder])
-                targets = np.hstack(target_sets)
-            assert targets.size == n
-            for target_index in targets:
-                connections[target_index].append(source_index)
-
-        def build_source_masks(mask=None):
-            if mask is None:
-                return [np.array(x) for x in connections]
+        n_post = self._get_num_post(projection.pre.size)
+        block_size = max(1, self.max_block_elements // max(1, projection.post.size))
+        sources = np.repeat(np.arange(projection.pre.size), n_post)
+        exclude_self = not self.allow_self_connections and projection.pre == projection.post
+        if exclude_self and projection.post.size == 1 and sources.size > 0:
+            # the only possible target is the pre-synaptic neuron itself
+            raise errors.ConnectionError(
+                "Cannot connect a single neuron to itself with allow_self_connections=False")
+        if sources.size == 0:
+            targets = np.array([], dtype=int)
+        elif self.with_replacement:
+            # draw the targets for all pre-synaptic neurons in one go
+            if exclude_self:
+                targets = self._rng_uniform_int_exclude(sources.size, projection.post.size,
+                                                        sources)
             else:
-                return [np.array(x) for x in np.array(connections)[mask]]
-        self._standard_connect(projection, build_source_masks)
+                targets = self.rng.next(
+                    sources.size, 'uniform_int', {"low": 0, "high": projection.post.size},
+                    mask=None)
+        else:
+            targets = np.hstack([
+                self._draw_without_replacement(start, n_post[start:start + block_size],
+                                               projection.post.size, exclude_self)
+                for start in range(0, projection.pre.size, block_size)])
+        assert targets.size == sources.size
+        indptr, indices = _group_by_target(sources, targets, projection.post.size)
+        self._standard_connect(projection, _csr_source_generator(indptr, indices))
 
 
 class FixedNumberPreConnector(FixedNumberConnector):
@@ -1015,10 +1375,20 @@ class CSAConnector(MapConnector):
 class CloneConnector(MapConnector):
     """
     Connects cells with the same connectivity pattern as a previous projection.
+
+    Arguments:
+        `reference_projection`:
+            the projection to clone the connectivity pattern from.
+        `gather`:
+            if False (the default), each MPI process clones the connections of
+            the reference projection which exist on that process, which is
+            sufficient when the clone has the same post-synaptic neurons. If
+            True, the pre- and post-synaptic indices of all connections are
+            gathered from all processes first.
     """
     parameter_names = ('reference_projection',)
 
-    def __init__(self, reference_projection, safe=True, callback=None):
+    def __init__(self, reference_projection, safe=True, callback=None, gather=False):
         """
         Create a new CloneConnector.
 
@@ -1027,6 +1397,7 @@ class CloneConnector(MapConnector):
         MapConnector.__init__(self, location_selector=None,
                               safe=safe, callback=callback)
         self.reference_projection = reference_projection
+        self.gather = gather
 
     def connect(self, projection):
         if (projection.pre != self.reference_projection.pre or
@@ -1037,9 +1408,277 @@ class CloneConnector(MapConnector):
                     self.reference_projection.pre,
                     self.reference_projection.post,
                     projection.pre, projection.post))
-        connection_map = LazyArray(~np.isnan(self.reference_projection.get(['weight'], 'array',
-                                                                           gather='all')[0]))
-        self._connect_with_map(projection, connection_map)
+        sources, targets = self.reference_projection._get_connection_indices()
+        if self.gather and projection._simulator.state.num_processes > 1:
+            sources, targets = recording.gather_columns([sources, targets], all=True)
+        indptr, indices = _group_by_target(sources, targets, projection.post.size)
+        self._standard_connect(projection, _csr_source_generator(indptr, indices))
+
+
+def _encode_state(state):
+    """Convert an RNG state into a form which can be stored as JSON."""
+    if isinstance(state, np.ndarray):
+        return {"__array__": state.tolist(), "dtype": str(state.dtype)}
+    elif isinstance(state, (tuple, list)):
+        return [_encode_state(item) for item in state]
+    elif isinstance(state, dict):
+        return {name: _encode_state(value) for name, value in state.items()}
+    elif isinstance(state, np.generic):
+        return state.item()
+    else:
+        return state
+
+
+def _decode_state(state):
+    """Inverse of `_encode_state()`."""
+    if isinstance(state, dict):
+        if "__array__" in state:
+            return np.array(state["__array__"], dtype=state["dtype"])
+        return {name: _decode_state(value) for name, value in state.items()}
+    elif isinstance(state, list):
+        return tuple(_decode_state(item) for item in state)
+    else:
+        return state
+
+
+def _cache_key_value(name, value, arrays, rngs):
+    """
+    Return a representation of the connector parameter `value`, built from
+    basic Python types, which is the same in every run of a script, for use
+    in a cache key.
+
+    NumPy arrays are appended to `arrays`, and replaced by their position in
+    that list. Random number generators are represented by their class, seed
+    and state, and appended to `rngs`.
+
+    Raises `ValueError` if `value` is a callable, an unseeded random number
+    generator, or anything else without such a representation.
+    """
+    def recurse(item):
+        return _cache_key_value(name, item, arrays, rngs)
+
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    elif isinstance(value, np.generic):
+        return value.item()
+    elif isinstance(value, np.ndarray):
+        arrays.append(value)
+        return ("array", len(arrays) - 1)
+    elif isinstance(value, (list, tuple)):
+        return [recurse(item) for item in value]
+    elif isinstance(value, dict):
+        return sorted((k, recurse(v)) for k, v in value.items())
+    elif isinstance(value, AbstractRNG):
+        if value.seed is None:
+            raise ValueError("Cannot cache connectivity: the random number generator "
+                             "'%s' has no seed" % name)
+        if not hasattr(value, "get_state"):
+            raise ValueError("Cannot cache connectivity: the state of the random number "
+                             "generator '%s' cannot be saved" % name)
+        if not any(value is rng for rng in rngs):
+            rngs.append(value)
+        return ("rng", type(value).__name__, recurse(value.seed), value.parallel_safe,
+                recurse(_encode_state(value.get_state())))
+    elif isinstance(value, RandomDistribution):
+        return ("random", value.name, recurse(value.parameters), recurse(value.rng))
+    elif callable(value):
+        raise ValueError("Cannot cache connectivity: parameter '%s' is a callable, "
+                         "whose result cannot be identified" % name)
+    else:
+        raise ValueError("Cannot cache connectivity: parameter '%s' has type %s"
+                         % (name, type(value).__name__))
+
+
+class ConnectivityCache(object):
+    """
+    A directory containing connection lists created by previous runs, for use
+    with :class:`CachedConnector`.
+
+    Each entry is a :class:`~pyNN.recording.files.NumpyMemmapFile`. If `max_size`
+    (in bytes) is given, the least recently used entries are deleted whenever
+    the total size of the cache exceeds it.
+    """
+
+    extension = ".npym"
+
+    def __init__(self, directory, max_size=None):
+        self.directory = os.path.expanduser(directory)
+        self.max_size = max_size
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + self.extension)
+
+    def load(self, key):
+        """
+        Return the cached connection file for `key`, or None if there is no
+        such entry.
+        """
+        path = self._path(key)
+        if not os.path.exists(path):
+            return None
+        os.utime(path)  # mark as recently used
+        return files.NumpyMemmapFile(path, mode='rb')
+
+    def store(self, key, connections, metadata):
+        """
+        Save an array of connections, with one row per connection, under `key`.
+        """
+        path = self._path(key)
+        tmp_path = "%s.%d.tmp" % (path, os.getpid())
+        files.NumpyMemmapFile(tmp_path, mode='wb').write(connections, metadata)
+        os.replace(tmp_path, path)
+        self.evict()
+
+    def _entries(self):
+        """Return a list of (last use time, size, path) for all entries."""
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith(self.extension):
+                path = os.path.join(self.directory, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:  # removed by another process
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        return sorted(entries)
+
+    def size(self):
+        """Return the total size in bytes of the entries in the cache."""
+        return sum(size for mtime, size, path in self._entries())
+
+    def evict(self):
+        """Delete the least recently used entries until the cache fits within `max_size`."""
+        if self.max_size is None:
+            return
+        entries = self._entries()
+        total = sum(size for mtime, size, path in entries)
+        # the most recently used entry is always kept
+        for mtime, size, path in entries[:-1]:
+            if total <= self.max_size:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= size
+
+    def clear(self):
+        """Delete all entries."""
+        for mtime, size, path in self._entries():
+            os.remove(path)
+
+
+class CachedConnector(MapConnector):
+    """
+    Wraps another connector so that the connectivity it creates is saved to
+    disk, and reused instead of being created again when an identical
+    projection is built in a later run (e.g. in a parameter sweep).
+
+    The cache key is a hash of the connector's class and parameters (as given
+    by `get_parameters()`), the seed and state of its random number generator,
+    the sizes and positions of the pre- and post-synaptic neurons, the
+    projection's space, and the number of MPI processes and rank. Connectors
+    with a parameter which is a callable (e.g. an :class:`IndexBasedExpression`),
+    or whose random number generators have no seed, cannot be cached and
+    raise a `ValueError`.
+
+    Only the connectivity is cached: synaptic parameters are always obtained
+    from the projection's synapse type. Connectors which supply their own
+    connections or parameter values (:class:`FromListConnector`,
+    :class:`FromFileConnector`, :class:`CloneConnector` and
+    :class:`CSAConnector`) are therefore never cached. Random number
+    generators used by the connector are left in the same state as if the
+    connector had been run.
+
+    Arguments:
+        `connector`:
+            the connector to be wrapped.
+        `cache`:
+            a :class:`ConnectivityCache` or the path of a cache directory.
+    """
+    parameter_names = ('connector',)
+    # connectors whose connections cannot be reproduced from the cached
+    # connectivity and the projection's synapse type
+    uncacheable = (FromListConnector, CloneConnector, CSAConnector)
+
+    def __init__(self, connector, cache):
+        Connector.__init__(self, connector.location_selector, connector.safe, connector.callback)
+        self.connector = connector
+        if not isinstance(cache, ConnectivityCache):
+            cache = ConnectivityCache(cache)
+        self.cache = cache
+        if not isinstance(connector, self.uncacheable):
+            # raise an error now, rather than when the projection is created
+            self._connector_state()
+
+    def _connector_state(self):
+        """
+        Return a representation of the wrapped connector's parameters and random
+        number generator, the arrays it contains and the random number generators
+        used by the connector.
+        """
+        arrays = []
+        rngs = []
+        parameters = self.connector.get_parameters()
+        parameters["rng"] = getattr(self.connector, "rng", None)
+        state = _cache_key_value("connector", parameters, arrays, rngs)
+        return state, arrays, rngs
+
+    def _cache_key(self, projection):
+        """
+        Return the key identifying the connectivity of `projection` together
+        with the random number generators used by the wrapped connector, or
+        `(None, [])` if the connectivity cannot be cached.
+        """
+        if isinstance(self.connector, self.uncacheable):
+            logger.debug("Not caching connectivity: %s supplies its own connections"
+                         % self.connector.__class__.__name__)
+            return None, []
+        connector_state, arrays, rngs = self._connector_state()
+        state = projection._simulator.state
+        components = [
+            self.connector.__class__.__module__, self.connector.__class__.__name__,
+            connector_state,
+            projection.pre.size, projection.post.size,
+            [projection.space.axes, projection.space.scale_factor, projection.space.offset,
+             projection.space.periodic_boundaries],
+            state.num_processes, state.mpi_rank,
+        ]
+        h = hashlib.sha1(repr(components).encode("utf-8"))
+        arrays += [projection.pre.positions, projection.post.positions]
+        for array in arrays:
+            array = np.ascontiguousarray(array)
+            h.update(repr((array.shape, array.dtype.str)).encode("utf-8"))
+            h.update(array.tobytes())
+        return h.hexdigest(), rngs
+
+    def connect(self, projection):
+        key, rngs = self._cache_key(projection)
+        if key is None:
+            self.connector.connect(projection)
+            return
+        file = self.cache.load(key)
+        if file is None:
+            logger.debug("Connectivity cache miss for %s" % projection.label)
+            self.connector.connect(projection)
+            connections = np.array(projection.get("weight", format="list", gather=False,
+                                                  with_address=True)).reshape((-1, 3))
+            metadata = {"columns": ["i", "j"],
+                        "connector": self.connector.__class__.__name__,
+                        "rng_states": [_encode_state(rng.get_state()) for rng in rngs]}
+            self.cache.store(key, connections[:, :2], metadata)
+        else:
+            logger.debug("Connectivity cache hit for %s" % projection.label)
+            metadata = file.get_metadata()
+            for rng, rng_state in zip(rngs, metadata["rng_states"]):
+                rng.set_state(_decode_state(rng_state))
+            index = file.read_index()
+            indptr = np.full(projection.post.size + 1, index[-1])
+            indptr[:index.size] = index
+            indices = np.asarray(file.read()[:, 0], dtype=int)
+            file.close()
+            self._standard_connect(projection, _csr_source_generator(indptr, indices))
 
 
 class ArrayConnector(MapConnector):
@@ -1063,11 +1702,33 @@ class ArrayConnector(MapConnector):
 
 
 class FixedTotalNumberConnector(FixedNumberConnector):
-    parameter_names = ('allow_self_connections', 'n')
+    """
+    Connects a fixed total number of pairs of pre- and post-synaptic neurons,
+    each pre-synaptic and each post-synaptic neuron being chosen at random
+    (with replacement).
+
+    Takes any of the standard :class:`Connector` optional arguments and, in
+    addition:
+
+        `n`:
+            the total number of connections to create.
+        `rng`:
+            an :class:`RNG` instance used to evaluate which potential connections
+            are created.
+        `parallel_safe`:
+            by default, the number of connections on each MPI process is drawn
+            from a binomial distribution and only the local connections are
+            drawn, so the connectivity depends on the number of processes. If
+            True, every process draws all `n` connections and keeps those whose
+            post-synaptic neuron is local, so that the connectivity does not
+            depend on the number of processes, at the cost of each process
+            drawing all connections. This requires a parallel-safe `rng`.
+    """
+    parameter_names = ('allow_self_connections', 'n', 'parallel_safe')
 
     def __init__(self, n, allow_self_connections=True, with_replacement=True,
                  location_selector=None,
-                 rng=None, safe=True, callback=None):
+                 rng=None, safe=True, callback=None, parallel_safe=False):
         """
         Create a new connector.
         """
@@ -1085,11 +1746,36 @@ class FixedTotalNumberConnector(FixedNumberConnector):
         else:
             raise TypeError("n must be an integer or a RandomDistribution object")
         self.rng = _get_rng(rng)
+        if parallel_safe and not self.rng.parallel_safe:
+            raise ValueError("parallel_safe=True requires a parallel-safe RNG")
+        self.parallel_safe = parallel_safe
 
     def connect(self, projection):
-        # This implementation is not "parallel safe" for random numbers.
-        # todo: support the `parallel_safe` flag.
+        if isinstance(self.n, RandomDistribution):
+            n = int(self.n.next())
+        else:
+            n = self.n
+        if self.parallel_safe:
+            # Draw all connections, so the result does not depend on the number of
+            # processes, and keep those with local targets
+            sources = self.rng.next(n, 'uniform_int',
+                                    {"low": 0, "high": projection.pre.size}, mask=None)
+            targets = self.rng.next(n, 'uniform_int',
+                                    {"low": 0, "high": projection.post.size}, mask=None)
+            targets = np.asarray(targets, dtype=int)
+            local = projection.post._mask_local[targets]
+            sources, targets = sources[local], targets[local]
+        else:
+            sources, targets = self._draw_local_connections(projection, n)
+        indptr, indices = _group_by_target(sources, targets, projection.post.size)
+        self._standard_connect(projection, _csr_source_generator(indptr, indices))
 
+    def _draw_local_connections(self, projection, n):
+        """
+        Draw the sources and targets of the local connections, among `n`
+        connections in total, i.e. those whose targets are on the local MPI
+        process. The result depends on the number of processes.
+        """
         # Determine number of processes and current rank
         rank = projection._simulator.state.mpi_rank
         num_processes = projection._simulator.state.num_processes
@@ -1099,7 +1785,7 @@ class FixedTotalNumberConnector(FixedNumberConnector):
 
         # Calculate the number of synapses on each process
         bino = RandomDistribution('binomial',
-                                  [self.n, targets_per_process / len(projection.post)],
+                                  [n, targets_per_process / len(projection.post)],
                                   rng=self.rng)
         num_conns_on_vp = np.zeros(num_processes, dtype=int)
         sum_dist = 0
@@ -1107,24 +1793,16 @@ class FixedTotalNumberConnector(FixedNumberConnector):
         for k in range(num_processes):
             p_local = targets_per_process / (len(projection.post) - sum_dist)
             bino.parameters['p'] = p_local
-            bino.parameters['n'] = self.n - sum_partitions
+            bino.parameters['n'] = n - sum_partitions
             num_conns_on_vp[k] = bino.next()
             sum_dist += targets_per_process
             sum_partitions += num_conns_on_vp[k]
 
         # Draw random sources and targets
-        connections = [[] for i in range(projection.post.size)]
+        n_local = num_conns_on_vp[rank]
         possible_targets = np.arange(projection.post.size)[projection.post._mask_local]
-        for i in range(num_conns_on_vp[rank]):
-            source_index = self.rng.next(1, 'uniform_int',
-                                         {"low": 0, "high": projection.pre.size},
-                                         mask=None)[0]
-            target_index = self.rng.choice(possible_targets, size=1)[0]
-            connections[target_index].append(source_index)
-
-        def build_source_masks(mask=None):
-            if mask is None:
-                return [np.array(x) for x in connections]
-            else:
-                return [np.array(x) for x in np.array(connections)[mask]]
-        self._standard_connect(projection, build_source_masks)
+        sources = self.rng.next(n_local, 'uniform_int',
+                                {"low": 0, "high": projection.pre.size}, mask=None)
+        target_indices = self.rng.next(n_local, 'uniform_int',
+                                       {"low": 0, "high": possible_targets.size}, mask=None)
+        return sources, possible_targets[np.asarray(target_indices, dtype=int)]
@@ -62,14 +62,13 @@ class Population(common.Population):
     _assembly_class = Assembly
 
     def _create_cells(self):
-        id_range = np.arange(simulator.state.id_counter,
-                             simulator.state.id_counter + self.size)
-        self.all_cells = np.array([simulator.ID(id) for id in id_range],
-                                  dtype=simulator.ID)
+        self._all_ids = np.arange(simulator.state.id_counter,
+                                  simulator.state.id_counter + self.size,
+                                  dtype=np.int64)
 
         def is_local(id):
             return (id % simulator.state.num_processes) == simulator.state.mpi_rank
-        self._mask_local = is_local(self.all_cells)
+        self._mask_local = is_local(self._all_ids)
 
         if isinstance(self.celltype, StandardCellType):
             parameter_space = self.celltype.native_parameters
@@ -79,8 +78,6 @@ class Population(common.Population):
         parameter_space.evaluate(mask=self._mask_local, simplify=False)
         self._parameters = parameter_space.as_dict()
 
-        for id in self.all_cells:
-            id.parent = self
         simulator.state.id_counter += self.size
 
     def _set_initial_value_array(self, variable, initial_values):
@@ -1,6 +1,5 @@
-from itertools import repeat
+import numpy as np
 from .. import common
-from ..core import ezip
 from ..space import Space
 from . import simulator
 
@@ -35,11 +34,26 @@ class Projection(common.Projection):
                                    space, label)
 
         #  Create connections
-        self.connections = []
+        # the connections are stored as blocks of index and attribute arrays,
+        # from which Connection objects are created on demand
+        self._connection_blocks = []
         connector.connect(self)
 
     def __len__(self):
-        return len(self.connections)
+        return sum(block["presynaptic_index"].size for block in self._connection_blocks)
+
+    @property
+    def connections(self):
+        """A list of the local connections, created from the connection blocks."""
+        connections = []
+        for block in self._connection_blocks:
+            names = [name for name in block
+                     if name not in ("presynaptic_index", "postsynaptic_index")]
+            for pre_idx, post_idx, *other in zip(block["presynaptic_index"],
+                                                 block["postsynaptic_index"],
+                                                 *(block[name] for name in names)):
+                connections.append(Connection(pre_idx, post_idx, **dict(zip(names, other))))
+        return connections
 
     def set(self, **attributes):
         raise NotImplementedError
@@ -49,11 +63,34 @@ class Projection(common.Projection):
                             **connection_parameters):
         if location_selector is not None:
             raise NotImplementedError("mock backend does not support multicompartmental models.")
+        presynaptic_indices = np.asarray(presynaptic_indices, dtype=int)
+        self._add_connection_block(
+            presynaptic_indices,
+            np.full(presynaptic_indices.shape, postsynaptic_index, dtype=int),
+            connection_parameters)
+
+    def _bulk_connect(self, presynaptic_indices, postsynaptic_indices,
+                      location_selector=None,
+                      **connection_parameters):
+        if location_selector is not None:
+            raise NotImplementedError("mock backend does not support multicompartmental models.")
+        self._add_connection_block(np.asarray(presynaptic_indices, dtype=int),
+                                   np.asarray(postsynaptic_indices, dtype=int),
+                                   connection_parameters)
+
+    def _add_connection_block(self, presynaptic_indices, postsynaptic_indices,
+                              connection_parameters):
+        block = {"presynaptic_index": presynaptic_indices,
+                 "postsynaptic_index": postsynaptic_indices}
         for name, value in connection_parameters.items():
-            if isinstance(value, float):
-                connection_parameters[name] = repeat(value)
-        for pre_idx, other in ezip(presynaptic_indices, *connection_parameters.values()):
-            other_attributes = dict(zip(connection_parameters.keys(), other))
-            self.connections.append(
-                Connection(pre_idx, postsynaptic_index, **other_attributes)
-            )
+            block[name] = np.broadcast_to(value, presynaptic_indices.shape)
+        self._connection_blocks.append(block)
+
+    def _get_attributes_as_columns(self, names):
+        columns = []
+        for name in names:
+            dtype = int if name in ("presynaptic_index", "postsynaptic_index") else float
+            columns.append(np.concatenate(
+                [np.empty((0,), dtype=dtype)]
+                + [block[name] for block in self._connection_blocks]).astype(dtype, copy=False))
+        return columns
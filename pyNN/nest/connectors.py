@@ -8,6 +8,7 @@ Connection method classes for NEST.
 
 import logging
 from warnings import warn
+import numpy as np
 import nest
 try:
     import csa
@@ -32,6 +33,8 @@ from ..connectors import (                      # noqa: F401
     CloneConnector,
     ArrayConnector,
     FixedTotalNumberConnector,
+    CachedConnector,
+    ConnectivityCache,
     CSAConnector as DefaultCSAConnector)
 from .random import NativeRNG
 
@@ -67,8 +70,8 @@ class CSAConnector(DefaultCSAConnector):
     def cg_connect(self, projection):
         """Connect-up a Projection using the Connection Generator interface"""
 
-        presynaptic_cells = projection.pre.all_cells.astype('int64')
-        postsynaptic_cells = projection.post.all_cells.astype('int64')
+        presynaptic_cells = projection.pre._all_ids
+        postsynaptic_cells = projection.post._all_ids
 
         if csa.arity(self.cset) == 2:
             param_map = {'weight': 0, 'delay': 1}
@@ -78,14 +81,20 @@ class CSAConnector(DefaultCSAConnector):
             nest.CGConnect(presynaptic_cells, postsynaptic_cells, self.cset,
                            model=projection.nest_synapse_model)
 
-        # reset the caching of the connection list, since this will have to be recalculated
-        projection._connections = None
-        projection._sources.extend(presynaptic_cells)
+        # this also marks the cached connection list as out of date
+        projection._add_sources(presynaptic_cells)
 
 
 class NESTConnectorMixin(object):
 
-    def synapse_parameters(self, projection):
+    def synapse_parameters(self, projection, addresses=None):
+        """
+        Return the synaptic parameters in the form needed by `nest.Connect()`.
+
+        If `addresses`, a tuple of arrays of pre- and post-synaptic indices, is
+        given, heterogeneous parameters are evaluated only for these pairs,
+        giving one value per connection, rather than for all pairs of neurons.
+        """
         params = {'synapse_model': projection.nest_synapse_model}
         parameter_space = self._parameters_from_synapse_type(projection, distance_map=None)
         for name, value in parameter_space.items():
@@ -100,14 +109,20 @@ class NESTConnectorMixin(object):
                     params[name] = value.evaluate().as_nest_object()
                 else:
                     value.shape = (projection.pre.size, projection.post.size)
-                    params[name] = value.evaluate()
+                    if addresses is None:
+                        params[name] = value.evaluate()
+                    else:
+                        params[name] = value[addresses]
             else:
                 # explicit values given
                 if value.is_homogeneous:
                     params[name] = value.evaluate(simplify=True)
                 elif value.shape:
                     # If parameter is given as an array or function
-                    params[name] = value.evaluate().flatten()
+                    if addresses is None:
+                        params[name] = value.evaluate().flatten()
+                    else:
+                        params[name] = value[addresses]
                 else:
                     value.shape = (1, 1)
                     # If parameter is given as a single number.
@@ -116,7 +131,7 @@ class NESTConnectorMixin(object):
                 if (
                     name == "weight"
                     and projection.receptor_type == 'inhibitory'
-                    and self.post.conductance_based
+                    and projection.post.conductance_based
                 ):
                     # NEST wants negative values for inhibitory weights,
                     # even if these are conductances
@@ -161,71 +176,100 @@ class AllToAllConnector(AllToAllConnector, NESTConnectorMixin):
         projection._connect(rule_params, syn_params)
 
 
-# class OneToOneConnector():
-#
-#    def __init__(self, allow_self_connections=True, with_replacement=True, safe=True,
-#                 callback=None):
-#        self.allow_self_connections = allow_self_connections
-#        self.with_replacement = with_replacement
-#
-#    def connect(self, projection):
-#        syn_params = projection.synapse_parameters()
-#        rule_params = {'autapses': self.allow_self_connections,
-#                       'multapses': self.with_replacement,
-#                       'rule': 'one_to_one'}
-#
-#        projection._connect(rule_params, syn_params)
-#
-#
-# class FixedNumberPreConnector():
-#
-#    def __init__(self, n, allow_self_connections=True, with_replacement=True, safe=True,
-#                 callback=None, rng=None):
-#        self.allow_self_connections = allow_self_connections
-#        self.with_replacement = with_replacement
-#        self.n = n
-#
-#    def connect(self, projection):
-#        syn_params = projection.synapse_parameters()
-#        rule_params = {'autapses': self.allow_self_connections,
-#                       'multapses': self.with_replacement,
-#                       'rule': 'fixed_indegree',
-#                       'indegree': self.n }
-#
-#        projection._connect(rule_params, syn_params)
-#
-#
-# class FixedNumberPostConnector():
-#
-#    def __init__(self, n, allow_self_connections=True, with_replacement=True, safe=True,
-#                 callback=None, rng=None):
-#        self.allow_self_connections = allow_self_connections
-#        self.with_replacement = with_replacement
-#        self.n = n
-#
-#    def connect(self, projection):
-#        syn_params = projection.synapse_parameters()
-#        rule_params = {'autapses': self.allow_self_connections,
-#                       'multapses': self.with_replacement,
-#                       'rule': 'fixed_outdegree',
-#                       'outdegree': self.n }
-#
-#        projection._connect(rule_params, syn_params)
-#
-#
-# class FixedTotalNumberConnector():
-#
-#    def __init__(self, n, allow_self_connections=True, with_replacement=True, safe=True,
-#                 callback=None):
-#        self.allow_self_connections = allow_self_connections
-#        self.with_replacement = with_replacement
-#        self.n = n
-#
-#    def connect(self, projection):
-#        syn_params = projection.synapse_parameters()
-#        rule_params = {'autapses': self.allow_self_connections,
-#                       'multapses': self.with_replacement,
-#                       'rule': 'fixed_total_number',
-#                       'N': self.n
-#                   }
-#        projection._connect(rule_params, syn_params)
+class OneToOneConnector(OneToOneConnector, NESTConnectorMixin):
+    """
+    Where the pre- and postsynaptic populations have the same size, connect
+    cell *i* in the presynaptic population to cell *i* in the postsynaptic
+    population for all *i*.
+
+    If any synaptic parameter is drawn with a :class:`NativeRNG`, the
+    connections are created by NEST's ``one_to_one`` rule. The connectivity is
+    identical to that of the Python implementation.
+    """
+
+    def connect(self, projection):
+        if projection.synapse_type.native_parameters.has_native_rngs:
+            return self.native_connect(projection)
+        else:
+            return super(OneToOneConnector, self).connect(projection)
+
+    def native_connect(self, projection):
+        # NEST wants one value per connection, i.e. the diagonal
+        diagonal = np.arange(projection.pre.size)
+        syn_params = self.synapse_parameters(projection, addresses=(diagonal, diagonal))
+        rule_params = {'allow_autapses': True,
+                       'allow_multapses': False,
+                       'rule': 'one_to_one'}
+        projection._connect(rule_params, syn_params)
+
+
+class FixedNumberConnectorMixin(NESTConnectorMixin):
+    """
+    Shared logic for the connectors that map onto NEST's fixed-number rules.
+
+    NEST's rules are used when the connector's `rng` is a :class:`NativeRNG`,
+    or when any synaptic parameter is drawn with a :class:`NativeRNG`. In this
+    case the connections are drawn by NEST's own RNGs, seeded with the
+    `rng_seed` argument of :func:`setup()`, so they will differ from those
+    created by the Python implementation with the same seed. The following
+    are not supported by the native rules, and raise
+    :class:`NotImplementedError`:
+
+    * `n` given as a :class:`RandomDistribution`;
+    * ``allow_self_connections="NoMutual"``;
+    * heterogeneous synaptic parameters given as arrays or functions, or drawn
+      with a non-native RNG: NEST needs one value per connection, and the
+      connections are not known until NEST has drawn them.
+
+    Without replacement, NEST raises an error if `n` exceeds the number of
+    candidate neurons, rather than starting on a second round of connections.
+    """
+    nest_rule = None
+    nest_number_name = None
+
+    def connect(self, projection):
+        if (
+            projection.synapse_type.native_parameters.has_native_rngs
+            or isinstance(self.rng, NativeRNG)
+        ):
+            return self.native_connect(projection)
+        else:
+            return super(FixedNumberConnectorMixin, self).connect(projection)
+
+    def native_connect(self, projection):
+        if isinstance(self.n, random.RandomDistribution):
+            raise NotImplementedError(
+                "NEST's '%s' rule does not support a random number of connections" % self.nest_rule)
+        if self.allow_self_connections == 'NoMutual':
+            raise NotImplementedError(
+                "NEST's '%s' rule does not support allow_self_connections='NoMutual'"
+                % self.nest_rule)
+        syn_params = self.synapse_parameters(projection)
+        for name, value in syn_params.items():
+            if isinstance(value, np.ndarray):
+                raise NotImplementedError(
+                    "With NEST's '%s' rule, synaptic parameters must be homogeneous or drawn "
+                    "with a NativeRNG ('%s' is not)" % (self.nest_rule, name))
+        rule_params = {'allow_autapses': self.allow_self_connections,
+                       'allow_multapses': self.with_replacement,
+                       'rule': self.nest_rule,
+                       self.nest_number_name: int(self.n)}
+        projection._connect(rule_params, syn_params)
+
+
+class FixedNumberPreConnector(FixedNumberConnectorMixin, FixedNumberPreConnector):
+    __doc__ = FixedNumberPreConnector.__doc__
+    nest_rule = 'fixed_indegree'
+    nest_number_name = 'indegree'
+
+
+class FixedNumberPostConnector(FixedNumberConnectorMixin, FixedNumberPostConnector):
+    __doc__ = FixedNumberPostConnector.__doc__
+    nest_rule = 'fixed_outdegree'
+    nest_number_name = 'outdegree'
+
+
+class FixedTotalNumberConnector(FixedNumberConnectorMixin, FixedTotalNumberConnector):
+    __doc__ = FixedTotalNumberConnector.__doc__
+    nest_rule = 'fixed_total_number'
+    nest_number_name = 'N'
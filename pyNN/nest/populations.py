@@ -242,14 +242,17 @@ class Population(common.Population, PopulationMixin):
             self._mask_local = np.array([True])
         else:
             self._mask_local = np.array(self.node_collection.local)
-        self.all_cells = np.array([simulator.ID(gid) for gid in self.node_collection.tolist()],
-                                  simulator.ID)
-        for gid in self.all_cells:
-            gid.parent = self
-            gid.node_collection = nest.NodeCollection([int(gid)])
+        # nest.Create() returns a contiguous range of node IDs
+        first_node_id = self.node_collection[0].get("global_id")
+        self._all_ids = np.arange(first_node_id, first_node_id + self.size, dtype=np.int64)
+
+    def _create_id(self, index):
+        """Create the ID object for the cell at position `index`."""
+        gid = simulator.ID(self._all_ids[index])
+        gid.parent = self
         if hasattr(self.celltype, "uses_parrot") and self.celltype.uses_parrot:
-            for gid, source in zip(self.all_cells, self.node_collection_source.tolist()):
-                gid.source = source
+            gid.source = self.node_collection_source[index].get("global_id")
+        return gid
 
     def _connect_parrot_neurons(self):
         nest.Connect(self.node_collection_source, self.node_collection, 'one_to_one',
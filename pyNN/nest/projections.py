@@ -67,8 +67,14 @@ class Projection(common.Projection):
         self.nest_synapse_model = self.synapse_type._get_nest_synapse_model()
         self.nest_synapse_label = Projection._nProj
         self.synapse_type._set_tau_minus(self.post.local_node_collection)
-        self._sources = set()
+        self._sources = np.array([], dtype=int)  # sorted IDs of the presynaptic cells
         self._connections = None
+        # incremented whenever connections are added, so that we know when
+        # the cached connection handles need to be refreshed
+        self._generation = 0
+        self._connections_generation = None
+        self._pre_node_ids = None
+        self._post_node_ids = None
         # This is used to keep track of common synapse properties
         self._common_synapse_properties = {}
         self._common_synapse_property_names = None
@@ -100,17 +106,30 @@ class Projection(common.Projection):
 
     @property
     def nest_connections(self):
-        if self._connections is None or self._simulator.state.stale_connection_cache:
-            if len(self._sources) > 0:
+        if self._connections is None or self._connections_generation != self._generation:
+            if self._sources.size > 0:
                 self._connections = nest.GetConnections(
-                    nest.NodeCollection(sorted(self._sources)),
+                    nest.NodeCollection(self._sources.tolist()),
                     synapse_model=self.nest_synapse_model,
                     synapse_label=self.nest_synapse_label)
             else:
                 self._connections = []
-            self._simulator.state.stale_connection_cache = False
+            self._connections_generation = self._generation
         return self._connections
 
+    def _add_sources(self, ids):
+        """
+        Record that connections have been created from the cells with the
+        given IDs, and that the cached connection handles are out of date.
+        """
+        ids = np.unique(np.asarray(ids, dtype=int))
+        positions = np.searchsorted(self._sources, ids)
+        present = np.zeros(ids.shape, dtype=bool)
+        in_range = positions < self._sources.size
+        present[in_range] = self._sources[positions[in_range]] == ids[in_range]
+        self._sources = np.insert(self._sources, positions[~present], ids[~present])
+        self._generation += 1
+
     @property
     def connections(self):
         """
@@ -124,7 +143,7 @@ class Projection(common.Projection):
         with the parameters provided by params.
         """
         if 'tsodyks' in self.nest_synapse_model:
-            translations = self.post.local_cells[0].celltype.translations
+            translations = next(iter(self.post)).celltype.translations
             if self.receptor_type == 'inhibitory':
                 param_name = translations['tau_syn_I']['translated_name']
             elif self.receptor_type == 'excitatory':
@@ -138,11 +157,12 @@ class Projection(common.Projection):
         nest.Connect(self.pre.node_collection,
                      self.post.node_collection,
                      rule_params, syn_params)
-        self._simulator.state.stale_connection_cache = True
-        self._sources.update(
-            nest.GetConnections(synapse_model=self.nest_synapse_model,
-                                synapse_label=self.nest_synapse_label).sources()
-        )
+        connections = nest.GetConnections(synapse_model=self.nest_synapse_model,
+                                          synapse_label=self.nest_synapse_label)
+        self._add_sources(list(connections.sources()))
+        # these are exactly the connections of this projection, so we can cache them
+        self._connections = connections
+        self._connections_generation = self._generation
 
     def _identify_common_synapse_properties(self):
         """
@@ -150,8 +170,8 @@ class Projection(common.Projection):
         between local and common synapse properties.
         """
         sample_connection = nest.GetConnections(
-            # take any source from the set
-            source=nest.NodeCollection([next(iter(self._sources))]),
+            # take any source
+            source=nest.NodeCollection([int(self._sources[0])]),
             synapse_model=self.nest_synapse_model,
             synapse_label=self.nest_synapse_label)[:1]
 
@@ -205,19 +225,7 @@ class Projection(common.Projection):
         }
 
         # Weights require some special handling
-        if self.receptor_type == 'inhibitory' and self.post.conductance_based:
-            # NEST wants negative values for inhibitory weights, even if these are conductances
-            connection_parameters['weight'] *= -1
-            if "stdp" in self.nest_synapse_model:
-                # just some very large negative value to avoid
-                # NEST complaining about weight and Wmax having different signs
-                # (see https://github.com/NeuralEnsemble/PyNN/issues/636)
-                # Will be overwritten below.
-                syn_dict["Wmax"] = -1.2345e6
-                connection_parameters["Wmax"] *= -1
-        # the following two lines are a bit of a hack, needed for the Izhikevich model
-        if hasattr(self.post, "celltype") and hasattr(self.post.celltype, "receptor_scale"):
-            connection_parameters['weight'] *= self.post.celltype.receptor_scale
+        self._adjust_weights(connection_parameters, syn_dict)
 
         # Prepare connections. NodeCollections can't have repeated values, so for some
         # connector types we need to split the presynaptic cells into groups that
@@ -246,7 +254,7 @@ class Projection(common.Projection):
         # Create connections and set parameters
         for presynaptic_cells, connection_parameter_group in zip(presynaptic_cell_groups,
                                                                  connection_parameter_groups):
-            self._sources.update(presynaptic_cells.tolist())
+            self._add_sources(presynaptic_cells.tolist())
             try:
                 weights = connection_parameter_group.pop('weight')
                 delays = connection_parameter_group.pop('delay')
@@ -329,9 +337,181 @@ class Projection(common.Projection):
                 )
                 raise errors.ConnectionError(err_msg)
 
-        # Reset the caching of the connection list, since this will have to be recalculated
-        self._connections = None
-        self._simulator.state.stale_connection_cache = True
+        # sources were recorded before connecting, so make sure the cached
+        # connection handles are refreshed
+        self._generation += 1
+
+    def _adjust_weights(self, connection_parameters, syn_dict):
+        """
+        Modify the weights in `connection_parameters` according to NEST conventions.
+        """
+        if self.receptor_type == 'inhibitory' and self.post.conductance_based:
+            # NEST wants negative values for inhibitory weights, even if these are conductances
+            connection_parameters['weight'] *= -1
+            if "stdp" in self.nest_synapse_model:
+                # just some very large negative value to avoid
+                # NEST complaining about weight and Wmax having different signs
+                # (see https://github.com/NeuralEnsemble/PyNN/issues/636)
+                # Will be overwritten below.
+                syn_dict["Wmax"] = -1.2345e6
+                connection_parameters["Wmax"] *= -1
+        # the following two lines are a bit of a hack, needed for the Izhikevich model
+        if hasattr(self.post, "celltype") and hasattr(self.post.celltype, "receptor_scale"):
+            connection_parameters['weight'] *= self.post.celltype.receptor_scale
+
+    @property
+    def _presynaptic_node_ids(self):
+        """Array of NEST node IDs of the presynaptic neurons, ordered by index."""
+        if self._pre_node_ids is None:
+            self._pre_node_ids = self.pre._all_ids
+        return self._pre_node_ids
+
+    @property
+    def _postsynaptic_node_ids(self):
+        """Array of NEST node IDs of the postsynaptic neurons, ordered by index."""
+        if self._post_node_ids is None:
+            self._post_node_ids = self.post._all_ids
+        return self._post_node_ids
+
+    def _postsynaptic_synapse_parameters(self, postsynaptic_indices):
+        """
+        Return a dict containing those synapse parameters whose values depend on the
+        post-synaptic neuron ("receptor_type", and "tau_psc" for Tsodyks-Markram synapses),
+        with one value per connection.
+        """
+        n = postsynaptic_indices.size
+        if isinstance(self.post, common.Assembly):
+            boundaries = np.cumsum([0] + [p.size for p in self.post.populations])
+            groups = [(p.celltype, (postsynaptic_indices >= start) & (postsynaptic_indices < stop))
+                      for p, start, stop in zip(self.post.populations,
+                                                boundaries[:-1], boundaries[1:])]
+        else:
+            groups = [(self.post.celltype, slice(None))]
+        params = {}
+        for celltype, mask in groups:
+            if celltype.standard_receptor_type:
+                # For Tsodyks-Markram synapses models we set the "tau_psc" parameter to match
+                # the relevant "tau_syn" parameter from the post-synaptic neuron.
+                if 'tsodyks' in self.nest_synapse_model:
+                    translations = celltype.translations
+                    if self.receptor_type == 'inhibitory':
+                        param_name = translations['tau_syn_I']['translated_name']
+                    elif self.receptor_type == 'excitatory':
+                        param_name = translations['tau_syn_E']['translated_name']
+                    else:
+                        raise NotImplementedError()
+                    targets = self._postsynaptic_node_ids[postsynaptic_indices[mask]]
+                    if targets.size > 0:
+                        # one GetStatus call for all the target neurons
+                        unique_targets, inverse = np.unique(targets, return_inverse=True)
+                        tau_syn = np.array(
+                            nest.GetStatus(nest.NodeCollection(unique_targets.tolist()),
+                                           param_name),
+                            dtype=float)
+                        params.setdefault("tau_psc", np.zeros(n))[mask] = tau_syn[inverse]
+            else:
+                params.setdefault("receptor_type", np.zeros(n, dtype=int))[mask] = \
+                    celltype.get_receptor_type(self.receptor_type)
+        return params
+
+    def _bulk_connect(self, presynaptic_indices, postsynaptic_indices,
+                      location_selector=None, **connection_parameters):
+        """
+        Connect many pairs of neurons at once, using array-based calls to `nest.Connect`
+        with the "one_to_one" rule.
+
+        `presynaptic_indices` - 1D array of presynaptic indices
+        `postsynaptic_indices` - 1D array of postsynaptic indices, of the same length
+        `connection_parameters` - dict whose keys are native NEST parameter names.
+                                  Values may be scalars or arrays of the same length as
+                                  the index arrays.
+        """
+        if location_selector is not None:
+            raise NotImplementedError("NEST backend does not support multicompartmental models.")
+        n = presynaptic_indices.size
+        if n == 0:
+            return
+
+        # Clean the connection parameters by removing parameters that are
+        # used by PyNN but should not be passed to NEST
+        connection_parameters.pop('tau_minus', None)
+        connection_parameters.pop('dendritic_delay_fraction', None)
+        connection_parameters.pop('w_min_always_zero_in_NEST', None)
+
+        syn_dict = {}
+        self._adjust_weights(connection_parameters, syn_dict)
+        # "receptor_type" and "tau_psc" are determined by the post-synaptic neurons,
+        # and are passed to every nest.Connect call
+        postsynaptic_parameters = self._postsynaptic_synapse_parameters(postsynaptic_indices)
+
+        sources = self._presynaptic_node_ids[presynaptic_indices]
+        targets = self._postsynaptic_node_ids[postsynaptic_indices]
+
+        def as_array(value, index=slice(None)):
+            # array-based nest.Connect expects one value per connection
+            if isinstance(value, np.ndarray) and value.ndim > 0:
+                return np.ascontiguousarray(value[index])
+            else:
+                return np.full((n,), value)[index]
+
+        def connect(index, parameter_names, extra_parameters={}):
+            syn_spec = {
+                name: as_array(connection_parameters[name], index)
+                for name in parameter_names
+            }
+            for name, value in dict(extra_parameters, **postsynaptic_parameters).items():
+                syn_spec[name] = as_array(value, index)
+            syn_spec['synapse_model'] = self.nest_synapse_model
+            syn_spec['synapse_label'] = self.nest_synapse_label
+            try:
+                nest.Connect(np.ascontiguousarray(sources[index]),
+                             np.ascontiguousarray(targets[index]),
+                             'one_to_one', syn_spec)
+            except nest.NESTError as err:
+                err_msg = (
+                    f"{err}. presynaptic_cells={sources[index]}, "
+                    f"postsynaptic_cells={targets[index]}, "
+                    f"weights={syn_spec.get('weight')}, delays={syn_spec.get('delay')}, "
+                    f"synapse model='{self.nest_synapse_model}'"
+                )
+                raise errors.ConnectionError(err_msg)
+
+        start = 0
+        if self._common_synapse_property_names is None:
+            # To introspect which parameters are common, we need an existing connection,
+            # so we first create a single connection with just the weight and delay
+            # (and parameters determined by the post-synaptic neuron),
+            # then set its other parameters individually.
+            basic_names = [name for name in ('weight', 'delay')
+                           if name in connection_parameters]
+            first = slice(0, 1)
+            connect(first, basic_names, syn_dict)
+            self._add_sources(sources[:1])
+            self._identify_common_synapse_properties()
+            connection = nest.GetConnections(source=nest.NodeCollection([int(sources[0])]),
+                                             target=nest.NodeCollection([int(targets[0])]),
+                                             synapse_model=self.nest_synapse_model,
+                                             synapse_label=self.nest_synapse_label)
+            for name, value in connection_parameters.items():
+                if name in basic_names:
+                    continue
+                if name not in self._common_synapse_property_names:
+                    value = make_sli_compatible(as_array(value, first)[0])
+                    nest.SetStatus(connection, name, value)
+            start = 1
+
+        # Set the common parameters
+        for name, value in connection_parameters.items():
+            if name in self._common_synapse_property_names:
+                self._set_common_synapse_property(name, value)
+
+        # Since we know which parameters are common, we can set the non-common
+        # parameters directly in the nest.Connect call
+        if start < n:
+            local_names = [name for name in connection_parameters
+                           if name not in self._common_synapse_property_names]
+            connect(slice(start, n), local_names)
+            self._add_sources(sources[start:])
 
     def _set_attributes(self, parameter_space):
         if (
@@ -342,39 +522,35 @@ class Projection(common.Projection):
                              "within a single Projection with NEST.")
         # only columns for connections that exist on this machine
         parameter_space.evaluate(mask=(slice(None), self.post._mask_local))
-        sources = nest.NodeCollection(sorted(self._sources))
         if self._common_synapse_property_names is None:
             self._identify_common_synapse_properties()
-        for postsynaptic_cell, connection_parameters in zip(self.post.local_cells,
-                                                            parameter_space.columns()):
-            connections = nest.GetConnections(source=sources,
-                                              target=postsynaptic_cell.node_collection,
-                                              synapse_model=self.nest_synapse_model,
-                                              synapse_label=self.nest_synapse_label)
-            if connections:
-                source_mask = self.pre.id_to_index(list(connections.sources()))
-                for name, value in connection_parameters.items():
-                    if (
-                        name == "weight"
-                        and self.receptor_type == 'inhibitory'
-                        and self.post.conductance_based
-                    ):
-                        # NEST uses negative values for inhibitory weights,
-                        # even if these are conductances
-                        value *= -1
-                    if name == "tau_minus":  # set on the post-synaptic cell
-                        nest.SetStatus(self.post.node_collection[self.post.node_collection.local],
-                                       {"tau_minus": simplify(value)})
-                    elif name not in self._common_synapse_property_names:
-                        value = make_sli_compatible(value)
-                        if len(source_mask) > 1:
-                            nest.SetStatus(connections, name, value[source_mask])
-                        elif isinstance(value, np.ndarray):  # OneToOneConnector
-                            nest.SetStatus(connections, name, value[source_mask])
-                        else:
-                            nest.SetStatus(connections, name, value)
-                    else:
-                        self._set_common_synapse_property(name, value)
+        connections = self.nest_connections
+        if not connections:
+            return
+        # the row and column of each connection in the evaluated parameter arrays
+        addresses = np.array(nest.GetStatus(connections, ('source', 'target')),
+                             dtype=int).reshape((-1, 2))
+        source_indices = self.pre.id_to_index(addresses[:, 0])
+        local_column = np.cumsum(self.post._mask_local) - 1
+        column_indices = local_column[self.post.id_to_index(addresses[:, 1])]
+        for name, value in parameter_space.items():
+            if isinstance(value, np.ndarray) and value.ndim == 2:
+                value = value[source_indices, column_indices]
+            if (
+                name == "weight"
+                and self.receptor_type == 'inhibitory'
+                and self.post.conductance_based
+            ):
+                # NEST uses negative values for inhibitory weights,
+                # even if these are conductances
+                value = value * -1
+            if name == "tau_minus":  # set on the post-synaptic cell
+                nest.SetStatus(self.post.node_collection[self.post.node_collection.local],
+                               {"tau_minus": simplify(value)})
+            elif name not in self._common_synapse_property_names:
+                nest.SetStatus(connections, name, make_sli_compatible(value))
+            else:
+                self._set_common_synapse_property(name, value)
 
     def _set_common_synapse_property(self, name, value):
         """
@@ -439,6 +615,13 @@ class Projection(common.Projection):
     #        file.close()
 
     def _get_attributes_as_list(self, names):
+        columns = self._get_attributes_as_columns(names)
+        values = np.column_stack(columns).tolist()
+        for i in range(len(values)):
+            values[i] = tuple(values[i])
+        return values
+
+    def _get_attributes_as_columns(self, names):
         nest_names = []
         for name in names:
             if name == 'presynaptic_index':
@@ -448,51 +631,22 @@ class Projection(common.Projection):
             else:
                 nest_names.append(name)
         values = nest.GetStatus(self.nest_connections, nest_names)
-        values = np.array(values)  # ought to preserve int type for source, target
-        if 'weight' in names:
-            # other attributes could also have scale factors - need to use translation mechanisms
-            scale_factors = np.ones(len(names))
-            scale_factors[names.index('weight')] = 0.001
-            if self.receptor_type == 'inhibitory' and self.post.conductance_based:
-                # NEST uses negative values for inhibitory weights, even if these are conductances
-                scale_factors[names.index('weight')] *= -1
-            values *= scale_factors
-        if 'presynaptic_index' in names:
-            values[:, names.index('presynaptic_index')] = self.pre.id_to_index(
-                values[:, names.index('presynaptic_index')])
-        if 'postsynaptic_index' in names:
-            values[:, names.index('postsynaptic_index')] = self.post.id_to_index(
-                values[:, names.index('postsynaptic_index')])
-        values = values.tolist()
-        for i in range(len(values)):
-            values[i] = tuple(values[i])
-        return values
-
-    def _get_attributes_as_arrays(self, names, multiple_synapses='sum'):
-        multi_synapse_operation = Projection.MULTI_SYNAPSE_OPERATIONS[multiple_synapses]
-        all_values = []
-        for attribute_name in names:
-            if attribute_name[-1] == "s":  # weights --> weight, delays --> delay
-                attribute_name = attribute_name[:-1]
-            value_arr = np.nan * np.ones((self.pre.size, self.post.size))
-            connection_attributes = nest.GetStatus(self.nest_connections,
-                                                   ('source', 'target', attribute_name))
-            for conn in connection_attributes:
-                # (offset is always 0,0 for connections created with connect())
-                src, tgt, value = conn
-                addr = self.pre.id_to_index(src), self.post.id_to_index(tgt)
-                if np.isnan(value_arr[addr]):
-                    value_arr[addr] = value
-                else:
-                    value_arr[addr] = multi_synapse_operation(value_arr[addr], value)
-            if attribute_name == 'weight':
-                value_arr *= 0.001
+        values = np.array(values, dtype=float).reshape((-1, len(names)))
+        columns = []
+        for name, column in zip(names, values.T):
+            if name in ('presynaptic_index', 'postsynaptic_index'):
+                column = column.astype(int)
+                if column.size > 0:
+                    population = self.pre if name == 'presynaptic_index' else self.post
+                    column = population.id_to_index(column)
+            elif name == 'weight':
+                # other attributes could also have scale factors - need to use translation mechanisms
+                column = column * 0.001
                 if self.receptor_type == 'inhibitory' and self.post.conductance_based:
-                    # NEST uses negative values for inhibitory weights,
-                    # even if these are conductances
-                    value_arr *= -1
-            all_values.append(value_arr)
-        return all_values
+                    # NEST uses negative values for inhibitory weights, even if these are conductances
+                    column *= -1
+            columns.append(column)
+        return columns
 
     def _set_initial_value_array(self, variable, value):
         local_value = value.evaluate(simplify=True)
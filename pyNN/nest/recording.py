@@ -42,7 +42,7 @@ class RecordingDevice(object):
 
     def add_ids(self, new_ids):
         assert not self._connected
-        self._all_ids = self._all_ids.union(new_ids)
+        self._all_ids = self._all_ids.union(int(id) for id in new_ids)
 
     def _get_data_arrays(self, variable, nest_variable, scale_factor, clear=False):
         """
@@ -206,7 +206,7 @@ class Recorder(recording.Recorder):
         self._multimeter = Multimeter()
         self._spike_detector = SpikeDetector()
         recording.Recorder.__init__(self, population, file)
-        self.recorded_all = defaultdict(set)
+        self.recorded_all = defaultdict(recording._empty_id_array)
 
     def record(self, variables, ids, sampling_interval=None, locations=None):
         """
@@ -217,14 +217,14 @@ class Recorder(recording.Recorder):
 
         # for NEST we need all ids, not just local ones, otherwise simulations
         # sometimes hang with MPI if some nodes aren't recording anything
-        all_ids = set(ids)
-        local_ids = set([id for id in ids if id.local])
+        all_ids = np.unique(np.asarray(ids, dtype=np.int64))
+        local_ids = self._local_ids(all_ids)
         for variable in self._localize_variables(variables, locations):
             if not self.population.can_record(variable.name):
                 raise errors.RecordingError(variable, self.population.celltype)
-            new_ids = all_ids.difference(self.recorded_all[variable])
-            self.recorded[variable] = self.recorded[variable].union(local_ids)
-            self.recorded_all[variable] = self.recorded_all[variable].union(all_ids)
+            new_ids = np.setdiff1d(all_ids, self.recorded_all[variable], assume_unique=True)
+            self.recorded[variable] = np.union1d(self.recorded[variable], local_ids)
+            self.recorded_all[variable] = np.union1d(self.recorded_all[variable], all_ids)
             self._record(variable, new_ids, sampling_interval)
 
     def _record(self, variable, new_ids, sampling_interval=None):
@@ -279,7 +279,8 @@ class Recorder(recording.Recorder):
             scale_factor = self.population.celltype.scale_factors[variable.name]
         else:
             scale_factor = 1
-        data = self._multimeter.get_data(variable.name, nest_variable, scale_factor, ids, clear=clear)
+        data = self._multimeter.get_data(variable.name, nest_variable, scale_factor,
+                                         self._get_cells(ids), clear=clear)
         times = None
         if len(ids) > 0:
             # JACOMMENT: this is very expensive but not sure how to get rid of it
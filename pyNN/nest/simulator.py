@@ -152,7 +152,6 @@ class _State(common.control.BaseState):
         self.current_sources = []
         self._time_offset = 0.0
         self.t_flush = -1
-        self.stale_connection_cache = False
 
     @property
     def t(self):
@@ -324,6 +323,13 @@ class ID(int, common.IDMixin):
         int.__init__(n)
         common.IDMixin.__init__(self)
 
+    @property
+    def node_collection(self):
+        """A NEST NodeCollection containing only this cell, created on first access."""
+        if "_node_collection" not in self.__dict__:
+            self.__dict__["_node_collection"] = nest.NodeCollection([int(self)])
+        return self.__dict__["_node_collection"]
+
     @property
     def local(self):
         return self.node_collection.local
@@ -72,8 +72,7 @@ class Population(common.Population):
 
         logger.debug("Created NeuroML Population: %s of size %i" % (self.label, self.size))
 
-        for cell in self.all_cells:
-            index = self.id_to_index(cell)
+        for index in range(self.size):
             inst = neuroml.Instance(id=index)
             self.pop.instances.append(inst)
             x = self.positions[0][index]
@@ -101,14 +100,13 @@ class Population(common.Population):
         net.populations.append(self.pop)
 
 
-        id_range = np.arange(simulator.state.id_counter,
-                                simulator.state.id_counter + self.size)
-        self.all_cells = np.array([simulator.ID(id) for id in id_range],
-                                     dtype=simulator.ID)
+        self._all_ids = np.arange(simulator.state.id_counter,
+                                  simulator.state.id_counter + self.size,
+                                  dtype=np.int64)
 
         def is_local(id):
             return (id % simulator.state.num_processes) == simulator.state.mpi_rank
-        self._mask_local = is_local(self.all_cells)
+        self._mask_local = is_local(self._all_ids)
 
         if isinstance(self.celltype, StandardCellType):
             parameter_space = self.celltype.native_parameters
@@ -118,8 +116,6 @@ class Population(common.Population):
         parameter_space.evaluate(mask=self._mask_local, simplify=False)
         self._parameters = parameter_space.as_dict()
 
-        for id in self.all_cells:
-            id.parent = self
         simulator.state.id_counter += self.size
 
 
@@ -30,7 +30,7 @@ class Recorder(recording.Recorder):
 
         lems_sim = simulator._get_lems_sim()
 
-        for id in new_ids:
+        for id in self._get_cells(new_ids):
             if variable == 'v':
                 logger.debug("Recording var: %s; %s; %s"%(variable, id, id.parent))
                 pop_id = id.parent.label
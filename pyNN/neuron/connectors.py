@@ -25,4 +25,6 @@ from ..connectors import (
     CloneConnector,
     ArrayConnector,
     FixedTotalNumberConnector,
+    CachedConnector,
+    ConnectivityCache,
 )
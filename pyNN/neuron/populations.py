@@ -176,15 +176,14 @@ class Population(common.Population, PopulationMixin):
         """
         # this method should never be called more than once
         # perhaps should check for that
-        self.first_id = simulator.state.gid_counter
-        self.last_id = simulator.state.gid_counter + self.size - 1
-        self.all_cells = np.array([id for id in range(self.first_id, self.last_id + 1)],
-                                  simulator.ID)
+        self._all_ids = np.arange(simulator.state.gid_counter,
+                                  simulator.state.gid_counter + self.size,
+                                  dtype=np.int64)
 
         # mask_local is used to extract those elements from arrays
         # that apply to the cells on the current node, assuming
         # round-robin distribution of cells between nodes
-        self._mask_local = self.all_cells % simulator.state.num_processes == simulator.state.mpi_rank  # noqa: E501
+        self._mask_local = self._all_ids % simulator.state.num_processes == simulator.state.mpi_rank  # noqa: E501
 
         if isinstance(self.celltype, StandardCellType):
             parameter_space = self.celltype.native_parameters
@@ -199,16 +198,16 @@ class Population(common.Population, PopulationMixin):
         else:
             psrs = None
 
-        for i, (id, is_local, params) in enumerate(
-            zip(self.all_cells, self._mask_local, parameter_space)
-        ):
-            self.all_cells[i] = simulator.ID(id)
-            self.all_cells[i].parent = self
+        # ID objects are only created for local cells, since they hold the
+        # NEURON cell objects, and are kept in `local_cells`. IDs for other
+        # cells are created on first access.
+        local_cells = iter(self.local_cells)
+        for is_local, params in zip(self._mask_local, parameter_space):
             if is_local:
                 if hasattr(self.celltype, "extra_parameters"):
                     params.update(self.celltype.extra_parameters)
-                self.all_cells[i]._build_cell(self.celltype.model, params, psrs)
-        simulator.initializer.register(*self.all_cells[self._mask_local])
+                next(local_cells)._build_cell(self.celltype.model, params, psrs)
+        simulator.initializer.register(*self.local_cells)
         simulator.state.gid_counter += self.size
 
     def _native_rset(self, parametername, rand_distr):
@@ -220,5 +219,5 @@ class Population(common.Population, PopulationMixin):
         rng = simulator.h.Random(rand_distr.rng.seed or 0)
         native_rand_distr = getattr(rng, rand_distr.name)
         rarr = ([native_rand_distr(*rand_distr.parameters)] +
-                [rng.repick() for i in range(self.all_cells.size - 1)])
+                [rng.repick() for i in range(self.size - 1)])
         self.tset(parametername, rarr)
@@ -37,15 +37,15 @@ class Recorder(recording.Recorder):
         if isinstance(variables, str) and variables != 'all':
             variables = [variables]
 
-        ids = set([id for id in ids if id.local])
+        ids = self._local_ids(ids)
 
         if locations is None:  # point neurons
             for var_path in variables:
                 if not self.population.can_record(var_path, None):
                     raise errors.RecordingError(var_path, self.population.celltype)
                 var_obj = recording.Variable(location=None, name=var_path, label=None)
-                new_ids = ids.difference(self.recorded[var_obj])
-                self.recorded[var_obj] = self.recorded[var_obj].union(ids)
+                new_ids = np.setdiff1d(ids, self.recorded[var_obj], assume_unique=True)
+                self.recorded[var_obj] = np.union1d(self.recorded[var_obj], ids)
                 self._record(var_obj, new_ids, sampling_interval)
 
         else:  # multi-compartment neurons
@@ -53,7 +53,7 @@ class Recorder(recording.Recorder):
                 assert isinstance(locations, (str, LocationGenerator))
                 locations = [locations]
 
-            resolved_variables = defaultdict(set)
+            resolved_variables = defaultdict(list)
             for item in locations:
                 if isinstance(item, str):
                     location_generator = LabelledLocations(item)
@@ -63,7 +63,7 @@ class Recorder(recording.Recorder):
                     raise ValueError("'locations' should be a str, list, LocationGenerator or None")
 
                 # todo: avoid this loop if all the cells in the population have an identical morphology
-                for id in ids:
+                for id in self._get_cells(ids):
                     morphology = id._cell.morphology
                     # in principle, generate_locations() could give different locations for
                     # cells with different morphologies, so we construct a dict containing
@@ -74,24 +74,25 @@ class Recorder(recording.Recorder):
                         for var_name in variables:
                             var_obj = recording.Variable(location=location, name=var_name, label=location)
                             # better labels? include section id?
-                            resolved_variables[var_obj].add(id)
+                            resolved_variables[var_obj].append(int(id))
 
             for var_obj, id_list in resolved_variables.items():
-                new_ids = id_list.difference(self.recorded[var_obj])
-                self.recorded[var_obj] = self.recorded[var_obj].union(id_list)
+                id_list = np.unique(id_list)
+                new_ids = np.setdiff1d(id_list, self.recorded[var_obj], assume_unique=True)
+                self.recorded[var_obj] = np.union1d(self.recorded[var_obj], id_list)
                 self._record(var_obj, new_ids, sampling_interval)
 
     def _record(self, variable, new_ids, sampling_interval=None):
         """Add the cells in `new_ids` to the set of recorded cells."""
         if variable.name == 'spikes':
-            for id in new_ids:
+            for id in self._get_cells(new_ids):
                 if id._cell.rec is not None:
                     id._cell.rec.record(id._cell.spike_times)
                 else:  # SpikeSourceArray
                     id._cell.recording = True
         else:
             self.sampling_interval = sampling_interval or self._simulator.state.dt
-            for id in new_ids:
+            for id in self._get_cells(new_ids):
                 self._record_state_variable(id._cell, variable)
 
     def _record_state_variable(self, cell, variable):
@@ -156,9 +157,14 @@ class Recorder(recording.Recorder):
         else:
             raise AttributeError("Recording of %s not implemented." % variable_path)
 
+    def _recorded_cells(self):
+        """Return the ID objects of all cells recorded for any variable."""
+        return self._get_cells(np.unique(np.concatenate(
+            [recording._empty_id_array()] + list(self.recorded.values()))))
+
     def _reset(self):
         """Reset the list of things to be recorded."""
-        for id in set.union(*self.recorded.values()):
+        for id in self._recorded_cells():
             id._cell.traces = defaultdict(list)
             id._cell.spike_times = h.Vector(0)
         id._cell.recording_time == 0
@@ -169,7 +175,7 @@ class Recorder(recording.Recorder):
         Should remove all recorded data held by the simulator and, ideally,
         free up the memory.
         """
-        for id in set.union(*self.recorded.values()):
+        for id in self._recorded_cells():
             if hasattr(id._cell, "traces"):
                 for variable in id._cell.traces:
                     for vec in id._cell.traces[variable]:
@@ -182,12 +188,12 @@ class Recorder(recording.Recorder):
     def _get_spiketimes(self, id, clear=False):
         if hasattr(id, "__len__"):
             all_spiketimes = {}
-            for cell_id in id:
+            for cell_id in self._get_cells(id):
                 if cell_id._cell.rec is None:  # SpikeSourceArray
                     spikes = cell_id._cell.get_recorded_spike_times()
                 else:
                     spikes = cell_id._cell.spike_times.as_numpy()
-                all_spiketimes[cell_id] = spikes[spikes <= simulator.state.t + 1e-9]
+                all_spiketimes[int(cell_id)] = spikes[spikes <= simulator.state.t + 1e-9]
             return all_spiketimes
         else:
             spikes = id._cell.spike_times.as_numpy()
@@ -196,6 +202,7 @@ class Recorder(recording.Recorder):
     def _get_all_signals(self, variable, ids, clear=False):
         times = None
         if len(ids) > 0:
+            ids = self._get_cells(ids)
             # note: id._cell.traces[variable] is a list of Vectors, one per segment
             signals = np.vstack([vec for id in ids for vec in id._cell.traces[variable]]).T
             if self.record_times:
@@ -220,7 +227,7 @@ class Recorder(recording.Recorder):
     def _local_count(self, variable, filter_ids=None):
         N = {}
         if variable.name == 'spikes':
-            for id in self.filter_recorded(variable, filter_ids):
+            for id in self._get_cells(self.filter_recorded(variable, filter_ids)):
                 N[int(id)] = id._cell.spike_times.size()
         else:
             raise Exception("Only implemented for spikes")
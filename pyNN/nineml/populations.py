@@ -81,14 +81,13 @@ class Population(BasePopulation, common.Population):
         self._simulator.state.net.populations.append(self)
 
     def _create_cells(self):
-        id_range = np.arange(simulator.state.id_counter,
-                             simulator.state.id_counter + self.size)
-        self.all_cells = np.array([simulator.ID(id) for id in id_range],
-                                  dtype=simulator.ID)
+        self._all_ids = np.arange(simulator.state.id_counter,
+                                  simulator.state.id_counter + self.size,
+                                  dtype=np.int64)
 
         def is_local(id):
             return (id % simulator.state.num_processes) == simulator.state.mpi_rank
-        self._mask_local = is_local(self.all_cells)
+        self._mask_local = is_local(self._all_ids)
 
         if isinstance(self.celltype, StandardCellType):
             parameter_space = self.celltype.native_parameters
@@ -97,8 +96,6 @@ class Population(BasePopulation, common.Population):
         parameter_space.shape = (self.size,)
         self._parameters = parameter_space
 
-        for id in self.all_cells:
-            id.parent = self
         self._simulator.state.id_counter += self.size
 
     def _set_initial_value_array(self, variable, initial_values):
@@ -6,6 +6,7 @@ Parameter set handling
 """
 
 from collections.abc import Sized
+from copy import copy
 import numpy as np
 from lazyarray import larray, partial_shape
 from .core import is_listlike
@@ -80,23 +81,110 @@ class LazyArray(larray):
             if not isinstance(mask, slice):
                 assert len(mask) == self.ncols
             column_indices = column_indices[mask]
-        if isinstance(self.base_value, RandomDistribution) and self.base_value.rng.parallel_safe:
-            if mask is None:
-                for j in column_indices:
-                    yield self._partially_evaluate((slice(None), j), simplify=True)
-            else:
+        if isinstance(self.base_value, RandomDistribution):
+            # random values are drawn column by column, so that non-local columns can be skipped
+            rng = self.base_value.rng
+            if mask is not None and rng.parallel_safe:
+                local = np.zeros((self.ncols,), dtype=bool)
+                local[mask] = True
                 column_indices = np.arange(self.ncols)
-                for j, local in zip(column_indices, mask):
-                    col = self._partially_evaluate((slice(None), j), simplify=True)
-                    if local:
-                        yield col
+            else:
+                local = np.ones((self.ncols,), dtype=bool)
+            for j in column_indices:
+                if local[j]:
+                    yield self._partially_evaluate_columns(np.array([j]), simplify=True)[:, 0]
+                elif getattr(rng, "random_access", False):
+                    rng.skip(self.nrows)
+                else:
+                    self._partially_evaluate_columns(np.array([j]))
         else:
             for j in column_indices:
                 yield self._partially_evaluate((slice(None), j), simplify=True)
 
-    def _apply_operations(self, x, addr=None, simplify=False):
-        # todo: move this modified version back into lazyarray
+    def by_column_block(self, block_size, mask=None):
+        """
+        Iterate over the columns of the array in blocks of at most `block_size`
+        columns. Each item is a tuple `(column_indices, block)`, where `block` is
+        either a 2D array of shape `(nrows, len(column_indices))` or a single
+        value (for a flat array).
+
+        Random values are drawn in the same order as by :meth:`by_column`, so
+        the two methods produce identical arrays.
+
+        `mask`: either `None` or a boolean array indicating which columns should be included.
+        """
+        column_indices = np.arange(self.ncols)
+        if mask is not None:
+            if not isinstance(mask, slice):
+                assert len(mask) == self.ncols
+            column_indices = column_indices[mask]
+        if (
+            mask is not None
+            and isinstance(self.base_value, RandomDistribution)
+            and self.base_value.rng.parallel_safe
+        ):
+            # unless the RNG allows random access, we have to generate the values for
+            # all columns, then throw away the non-local ones
+            random_access = getattr(self.base_value.rng, "random_access", False)
+            local = np.zeros((self.ncols,), dtype=bool)
+            local[mask] = True
+            for start in range(0, self.ncols, block_size):
+                block_indices = np.arange(start, min(start + block_size, self.ncols))
+                block_mask = local[block_indices]
+                if random_access:
+                    if block_mask.any():
+                        yield block_indices[block_mask], self._partially_evaluate_columns(
+                            block_indices[block_mask], simplify=True, drawn_columns=block_indices)
+                    else:
+                        self.base_value.rng.skip(self.nrows * block_indices.size)
+                    continue
+                block = self._partially_evaluate_columns(block_indices, simplify=True)
+                if block_mask.any():
+                    if isinstance(block, np.ndarray) and block.ndim == 2:
+                        block = block[:, block_mask]
+                    yield block_indices[block_mask], block
+        else:
+            for start in range(0, column_indices.size, block_size):
+                block_indices = column_indices[start:start + block_size]
+                yield block_indices, self._partially_evaluate_columns(block_indices,
+                                                                      simplify=True)
+
+    def _partially_evaluate_columns(self, column_indices, simplify=False, drawn_columns=None):
+        """
+        Evaluate the sub-array made up of the given columns.
+
+        Unlike `_partially_evaluate()`, random values are generated column by
+        column, i.e. in the same order as when iterating with :meth:`by_column`.
+
+        If `drawn_columns` (a sorted superset of `column_indices`) is given, the
+        random values are those that would be drawn for all of `drawn_columns`,
+        which requires a random-access RNG.
+        """
+        addr = (slice(None), column_indices)
+        if isinstance(self.base_value, RandomDistribution):
+            if drawn_columns is None:
+                values = self.base_value.next(self.nrows * column_indices.size)
+            else:
+                offsets = np.searchsorted(drawn_columns, column_indices) * self.nrows
+                flat_mask = (offsets[:, np.newaxis] + np.arange(self.nrows)).ravel()
+                values = self.base_value.next(self.nrows * drawn_columns.size, mask=flat_mask)
+            x = values.reshape((column_indices.size, self.nrows)).T
+        else:
+            base = copy(self)
+            base.operations = []
+            x = base._partially_evaluate(addr, simplify=simplify)
         for f, arg in self.operations:
+            if isinstance(arg, LazyArray):
+                x = f(x, arg._partially_evaluate_columns(column_indices, simplify=simplify))
+            else:
+                x = self._apply_operations(x, addr, simplify=simplify, operations=[(f, arg)])
+        return x
+
+    def _apply_operations(self, x, addr=None, simplify=False, operations=None):
+        # todo: move this modified version back into lazyarray
+        if operations is None:
+            operations = self.operations
+        for f, arg in operations:
             if arg is None:
                 x = f(x)
             elif isinstance(arg, larray):
@@ -421,6 +509,7 @@ class ParameterSpace(object):
                         if (
                             isinstance(value.base_value, RandomDistribution)
                             and value.base_value.rng.parallel_safe
+                            and not getattr(value.base_value.rng, "random_access", False)
                         ):
                             value = value.evaluate()[mask]  # can't partially evaluate if using parallel safe
                         else:
@@ -4,7 +4,11 @@ common interface so that they can be used interchangeably in PyNN.
 
 Classes:
     NumpyRNG           - uses the np.random.RandomState RNG
+    GeneratorRNG       - uses the np.random.Generator RNG, with independent
+                         streams obtained from a SeedSequence
     GSLRNG             - uses the RNGs from the Gnu Scientific Library
+    PhiloxRNG          - uses the counter-based Philox RNG, allowing random
+                         access to the stream of numbers
     NativeRNG          - indicates to the simulator that it should use it's own,
                          built-in RNG
     RandomDistribution - produces random numbers from a specific distribution
@@ -20,6 +24,7 @@ import logging
 from functools import reduce
 import operator
 import time
+import zlib
 import numpy as np
 
 try:
@@ -28,6 +33,12 @@ try:
 except (ImportError, Warning):
     have_gsl = False
 
+try:
+    from scipy.special import ndtr, ndtri
+    have_scipy = True
+except ImportError:
+    have_scipy = False
+
 from lazyarray import partial_shape
 
 logger = logging.getLogger("PyNN")
@@ -114,6 +125,8 @@ class AbstractRNG(object):
 
 
 class WrappedRNG(AbstractRNG):
+    random_access = False  # True if a subset of values can be drawn without drawing the rest
+    rejection_sampling = False  # True to sample clipped distributions by redrawing
 
     def __init__(self, seed=None, parallel_safe=True):
         AbstractRNG.__init__(self, seed)
@@ -183,6 +196,42 @@ class WrappedRNG(AbstractRNG):
                 iterations += 1
         return res
 
+    def _normal_clipped(self, uniform, normal, mu=0.0, sigma=1.0, low=-np.inf, high=np.inf,
+                        size=None):
+        """
+        Sample from the normal distribution clipped to [low, high], by inverting
+        the cumulative distribution function if SciPy is available and
+        `rejection_sampling` is False, otherwise by redrawing values outside the
+        bounds. `uniform(size)` should return values from the uniform distribution
+        on [0, 1) and `normal(size)` values from the (unclipped) normal distribution.
+        """
+        if have_scipy and not self.rejection_sampling:
+            return self._truncated_normal(uniform, mu, sigma, low, high, size)
+        return self._clipped(normal, low=low, high=high, size=size)
+
+    def _truncated_normal(self, uniform, mu=0.0, sigma=1.0, low=-np.inf, high=np.inf, size=None):
+        """
+        Sample from the normal distribution truncated to [low, high] by inverting
+        the cumulative distribution function, using exactly one value from the
+        uniform distribution on [0, 1) (returned by `uniform(size)`) per sample.
+        """
+        a = (low - mu) / sigma
+        b = (high - mu) / sigma
+        flip = a > 0
+        if flip:
+            # work in the lower tail, where the CDF is most precise
+            a, b = -b, -a
+        cdf_a, cdf_b = ndtr(a), ndtr(b)
+        if not cdf_b > cdf_a:
+            raise Exception("Truncated normal distribution has zero probability mass. "
+                            "Check the parameterization of your distribution.")
+        p = cdf_a + uniform(size) * (cdf_b - cdf_a)
+        p = np.clip(p, np.finfo(float).tiny, np.nextafter(1.0, 0.0))
+        res = np.clip(ndtri(p), a, b)
+        if flip:
+            res = -res
+        return mu + sigma * res
+
     def describe(self):
         return "%s() with seed %s for MPI rank %d (MPI processes %d). %s parallel safe." % (
             self.__class__.__name__, self.seed, self.mpi_rank, self.num_processes,
@@ -190,7 +239,15 @@ class WrappedRNG(AbstractRNG):
 
 
 class NumpyRNG(WrappedRNG):
-    """Wrapper for the :class:`np.random.RandomState` class (Mersenne Twister PRNG)."""
+    """
+    Wrapper for the :class:`np.random.RandomState` class (Mersenne Twister PRNG).
+
+    'normal_clipped' values are sampled by inverting the cumulative distribution
+    function if SciPy is available, otherwise by redrawing values outside the
+    bounds. Set `rejection_sampling` to True to redraw values outside the bounds
+    instead (and excluded self-connections in the fixed-number connectors),
+    reproducing the random numbers of earlier versions of PyNN.
+    """
     translations = {
         'binomial':       ('binomial',     {'n': 'n', 'p': 'p'}),
         'gamma':          ('gamma',        {'k': 'shape', 'theta': 'scale'}),
@@ -206,8 +263,9 @@ class NumpyRNG(WrappedRNG):
         'vonmises':       ('vonmises',     {'mu': 'mu', 'kappa': 'kappa'}),
     }
 
-    def __init__(self, seed=None, parallel_safe=True):
+    def __init__(self, seed=None, parallel_safe=True, rejection_sampling=False):
         WrappedRNG.__init__(self, seed, parallel_safe)
+        self.rejection_sampling = rejection_sampling
         self.rng = np.random.RandomState()
         if self.seed is not None:
             self.rng.seed(self.seed)
@@ -240,15 +298,15 @@ class NumpyRNG(WrappedRNG):
         obj = NumpyRNG.__new__(NumpyRNG)
         WrappedRNG.__init__(obj, seed=deepcopy(self.seed, memo),
                             parallel_safe=deepcopy(self.parallel_safe, memo))
+        obj.rejection_sampling = self.rejection_sampling
         obj.rng = deepcopy(self.rng)
         return obj
 
     def normal_clipped(self, mu=0.0, sigma=1.0, low=-np.inf, high=np.inf, size=None):
         """ """
-        # not sure how well this works with parallel_safe, mask_local
-        def gen(n):
-            return self.rng.normal(loc=mu, scale=sigma, size=n)
-        return self._clipped(gen, low=low, high=high, size=size)
+        return self._normal_clipped(lambda n: self.rng.uniform(size=n),
+                                    lambda n: self.rng.normal(loc=mu, scale=sigma, size=n),
+                                    mu, sigma, low, high, size)
 
     def normal_clipped_to_boundary(self, mu=0.0, sigma=1.0, low=-np.inf, high=np.inf, size=None):
         # Not recommended, used `normal_clipped` instead.
@@ -257,8 +315,127 @@ class NumpyRNG(WrappedRNG):
         return np.maximum(np.minimum(res, high), low)
 
 
+class GeneratorRNG(WrappedRNG):
+    """
+    Wrapper for the :class:`np.random.Generator` class, using the PCG64 (default)
+    or SFC64 bit generator.
+
+    Independent streams, e.g. for different projections or threads, are obtained
+    with :meth:`spawn`. If the RNG is not parallel safe, each MPI process uses its
+    own stream spawned from the seed, rather than a modified seed.
+    """
+    translations = {
+        'binomial':       ('binomial',     {'n': 'n', 'p': 'p'}),
+        'gamma':          ('gamma',        {'k': 'shape', 'theta': 'scale'}),
+        'exponential':    ('exponential',  {'beta': 'scale'}),
+        'lognormal':      ('lognormal',    {'mu': 'mean', 'sigma': 'sigma'}),
+        'normal':         ('normal',       {'mu': 'loc', 'sigma': 'scale'}),
+        'normal_clipped': ('normal_clipped', {'mu': 'mu', 'sigma': 'sigma', 'low': 'low', 'high': 'high'}),  # noqa:E501
+        'normal_clipped_to_boundary':
+                          ('normal_clipped_to_boundary', {'mu': 'mu', 'sigma': 'sigma', 'low': 'low', 'high': 'high'}),   # noqa:E501
+        'poisson':        ('poisson',      {'lambda_': 'lam'}),
+        'uniform':        ('uniform',      {'low': 'low', 'high': 'high'}),
+        'uniform_int':    ('integers',     {'low': 'low', 'high': 'high'}),
+        'vonmises':       ('vonmises',     {'mu': 'mu', 'kappa': 'kappa'}),
+    }
+
+    def __init__(self, seed=None, parallel_safe=True, bit_generator="PCG64"):
+        AbstractRNG.__init__(self, seed)
+        self.parallel_safe = parallel_safe
+        self.mpi_rank, self.num_processes = get_mpi_config()
+        self.bit_generator = bit_generator
+        seed_sequence = np.random.SeedSequence(seed)
+        if not parallel_safe:
+            # ensure different nodes get independent streams
+            seed_sequence = seed_sequence.spawn(self.num_processes)[self.mpi_rank]
+        self._set_seed_sequence(seed_sequence)
+
+    def _set_seed_sequence(self, seed_sequence):
+        self.seed_sequence = seed_sequence
+        self.rng = np.random.Generator(getattr(np.random, self.bit_generator)(seed_sequence))
+
+    def __repr__(self):
+        if self.seed_sequence.spawn_key:
+            return "%s(seed=%r, spawn_key=%r)" % (self.__class__.__name__, self.seed,
+                                                  self.seed_sequence.spawn_key)
+        return AbstractRNG.__repr__(self)
+
+    def __getattr__(self, name):
+        """
+        This is to give the PyNN RNGs the same methods as the wrapped RNGs
+        (:class:`np.random.Generator`).
+        """
+        if name == "rng":
+            raise AttributeError(name)
+        return getattr(self.rng, name)
+
+    def spawn(self, n):
+        """
+        Return a list of `n` new RNGs with statistically independent streams,
+        e.g. for use by different projections or threads.
+
+        Successive calls return different RNGs, but the sequence of RNGs
+        returned depends only on the seed, so is the same on all MPI processes.
+        """
+        children = []
+        for seed_sequence in self.seed_sequence.spawn(n):
+            child = GeneratorRNG.__new__(GeneratorRNG)
+            child.__dict__.update(self.__dict__)
+            child._set_seed_sequence(seed_sequence)
+            children.append(child)
+        return children
+
+    def _next(self, distribution, n, parameters):
+        distribution_np, parameter_map = self.translations[distribution]
+        if set(parameters.keys()) != set(parameter_map.keys()):
+            # all parameters must be provided.
+            # We do not provide default values (this can be discussed).
+            err_msg = "Incorrect parameterization of random distribution. Expected %s, got %s."
+            raise KeyError(err_msg % (parameter_map.keys(), parameters.keys()))
+        parameters_np = dict((parameter_map[k], v) for k, v in parameters.items())
+        if distribution_np in ("normal_clipped", "normal_clipped_to_boundary"):
+            f_distr = getattr(self, distribution_np)
+        else:
+            f_distr = getattr(self.rng, distribution_np)
+        return f_distr(size=n, **parameters_np)
+
+    def __deepcopy__(self, memo):
+        obj = GeneratorRNG.__new__(GeneratorRNG)
+        obj.__dict__.update(self.__dict__)
+        # the copy gets its own seed sequence, in the same state, so that
+        # spawning from the copy does not affect the children of the original
+        ss = self.seed_sequence
+        obj.seed_sequence = np.random.SeedSequence(ss.entropy,
+                                                   spawn_key=ss.spawn_key,
+                                                   pool_size=ss.pool_size,
+                                                   n_children_spawned=ss.n_children_spawned)
+        obj.rng = deepcopy(self.rng, memo)
+        return obj
+
+    def get_state(self):
+        return ("GeneratorRNG", self.rng.bit_generator.state)
+
+    def set_state(self, state):
+        self.rng.bit_generator.state = state[1]
+
+    def normal_clipped(self, mu=0.0, sigma=1.0, low=-np.inf, high=np.inf, size=None):
+        """ """
+        return self._normal_clipped(self.rng.random,
+                                    lambda n: self.rng.normal(loc=mu, scale=sigma, size=n),
+                                    mu, sigma, low, high, size)
+
+    def normal_clipped_to_boundary(self, mu=0.0, sigma=1.0, low=-np.inf, high=np.inf, size=None):
+        res = self.rng.normal(loc=mu, scale=sigma, size=size)
+        return np.maximum(np.minimum(res, high), low)
+
+
 class GSLRNG(WrappedRNG):
-    """Wrapper for the GSL random number generators."""
+    """
+    Wrapper for the GSL random number generators.
+
+    As for :class:`NumpyRNG`, set `rejection_sampling` to True to sample
+    'normal_clipped' values by redrawing, as in earlier versions of PyNN.
+    """
     translations = {
         'binomial':       ('binomial',       {'n': 'n', 'p': 'p'}),
         'gamma':          ('gamma',          {'k': 'k', 'theta': 'theta'}),
@@ -271,10 +448,11 @@ class GSLRNG(WrappedRNG):
         'uniform_int':    ('uniform_int',    {'low': 'low', 'high': 'high'}),
     }
 
-    def __init__(self, seed=None, type='mt19937', parallel_safe=True):
+    def __init__(self, seed=None, type='mt19937', parallel_safe=True, rejection_sampling=False):
         if not have_gsl:
             raise ImportError("GSLRNG: Cannot import pygsl")
         WrappedRNG.__init__(self, seed, parallel_safe)
+        self.rejection_sampling = rejection_sampling
         self.rng = getattr(pygsl.rng, type)()
         if self.seed is not None:
             self.rng.set(self.seed)
@@ -318,9 +496,178 @@ class GSLRNG(WrappedRNG):
 
     def normal_clipped(self, mu=0.0, sigma=1.0, low=-np.inf, high=np.inf, size=None):
         """ """
-        def gen(n):
-            return self.normal(mu, sigma, n)
-        return self._clipped(gen, low=low, high=high, size=size)
+        return self._normal_clipped(self.rng.uniform, lambda n: self.normal(mu, sigma, n),
+                                    mu, sigma, low, high, size)
+
+
+class PhiloxRNG(WrappedRNG):
+    """
+    Wrapper for the counter-based Philox PRNG of :class:`np.random.Generator`.
+
+    The stream of numbers for each distribution is divided into blocks of
+    `block_size` values, each generated from its own Philox counter, so that the
+    n-th value drawn depends only on the seed and on n. In parallel-safe mode,
+    masked draws therefore generate only the blocks containing the requested
+    values, rather than the entire array, and give the same values for any
+    number of MPI processes.
+
+    Note that a block is generated in full even if only one of its values is
+    requested, since the number of raw random numbers consumed per value is
+    not fixed for most distributions. Masks which select every k-th value,
+    such as the round-robin distribution of neurons over MPI processes, with
+    k smaller than `block_size`, therefore still generate every block.
+    """
+    translations = {
+        'binomial':       ('binomial',     {'n': 'n', 'p': 'p'}),
+        'gamma':          ('gamma',        {'k': 'shape', 'theta': 'scale'}),
+        'exponential':    ('exponential',  {'beta': 'scale'}),
+        'lognormal':      ('lognormal',    {'mu': 'mean', 'sigma': 'sigma'}),
+        'normal':         ('normal',       {'mu': 'loc', 'sigma': 'scale'}),
+        'normal_clipped': ('normal_clipped', {'mu': 'mu', 'sigma': 'sigma', 'low': 'low', 'high': 'high'}),  # noqa:E501
+        'normal_clipped_to_boundary':
+                          ('normal_clipped_to_boundary', {'mu': 'mu', 'sigma': 'sigma', 'low': 'low', 'high': 'high'}),   # noqa:E501
+        'poisson':        ('poisson',      {'lambda_': 'lam'}),
+        'uniform':        ('uniform',      {'low': 'low', 'high': 'high'}),
+        'uniform_int':    ('integers',     {'low': 'low', 'high': 'high'}),
+        'vonmises':       ('vonmises',     {'mu': 'mu', 'kappa': 'kappa'}),
+    }
+    block_size = 1024
+    random_access = True
+
+    def __init__(self, seed=None, parallel_safe=True):
+        WrappedRNG.__init__(self, seed, parallel_safe)
+        if self.seed is not None:
+            self._entropy = self.seed
+        else:
+            self._entropy = np.random.SeedSequence().entropy
+        self._position = 0  # number of values drawn so far
+        self._permutations = 0  # number of calls to permutation()
+        self._keys = {}
+        self._blocks = {}
+
+    def _key(self, stream):
+        """Return the Philox key for the named stream of numbers."""
+        if stream not in self._keys:
+            seed_seq = np.random.SeedSequence([self._entropy, zlib.crc32(stream.encode())])
+            self._keys[stream] = seed_seq.generate_state(2, np.uint64)
+        return self._keys[stream]
+
+    def _generator(self, stream, counter):
+        return np.random.Generator(np.random.Philox(counter=counter, key=self._key(stream)))
+
+    def next(self, n=None, distribution=None, parameters=None, mask=None):
+        if distribution is None:
+            distribution = 'uniform'
+            if parameters is None:
+                parameters = {"low": 0.0, "high": 1.0}
+        if n is None:
+            positions = np.array([0])
+            size = 1
+        elif n < 0:
+            raise ValueError("The sample number must be positive")
+        elif mask is None:
+            positions = np.arange(n)
+            size = n
+        else:
+            assert isinstance(mask, np.ndarray)
+            if mask.dtype == bool and mask.size != n:
+                raise ValueError("boolean mask size must equal n")
+            if self.parallel_safe:
+                positions = np.arange(n)[mask]
+                size = n
+            else:
+                positions = np.arange(np.count_nonzero(mask) if mask.dtype == bool else mask.size)
+                size = positions.size
+        values = self._draw(distribution, parameters, self._position + positions)
+        self._position += size
+        if n is None:
+            return values[0]
+        else:
+            return values
+    next.__doc__ = AbstractRNG.next.__doc__
+
+    def _draw(self, distribution, parameters, positions):
+        """Return the values at the given positions in the stream."""
+        if positions.size == 0:
+            return np.empty((0,))
+        order = None
+        if np.any(positions[1:] < positions[:-1]):
+            order = np.argsort(positions, kind="stable")
+            positions = positions[order]
+        blocks = positions // self.block_size
+        offsets = positions % self.block_size
+        # the positions are sorted, so the positions in each block are contiguous
+        starts = np.hstack(([0], np.flatnonzero(np.diff(blocks)) + 1))
+        stops = np.append(starts[1:], positions.size)
+        values = None
+        for start, stop in zip(starts, stops):
+            block_values = self._block(distribution, parameters, int(blocks[start]))
+            if values is None:
+                values = np.empty(positions.shape, dtype=block_values.dtype)
+            values[start:stop] = block_values[offsets[start:stop]]
+        if order is not None:
+            unsorted_values = np.empty_like(values)
+            unsorted_values[order] = values
+            values = unsorted_values
+        return values
+
+    def _block(self, distribution, parameters, block):
+        """
+        Return the values of the given block of the stream, caching the most
+        recently used block for each parameterization of each distribution.
+        """
+        try:
+            cache_key = (distribution, tuple(sorted(parameters.items())))
+            hash(cache_key)
+        except TypeError:
+            cache_key = None
+        if cache_key in self._blocks and self._blocks[cache_key][0] == block:
+            return self._blocks[cache_key][1]
+        generator = self._generator(distribution, [0, 0, block, 0])
+        values = np.asarray(self._generate(generator, distribution, parameters, self.block_size))
+        if cache_key is not None:
+            self._blocks[cache_key] = (block, values)
+        return values
+
+    def _generate(self, generator, distribution, parameters, size):
+        distribution_np, parameter_map = self.translations[distribution]
+        if set(parameters.keys()) != set(parameter_map.keys()):
+            # all parameters must be provided.
+            # We do not provide default values (this can be discussed).
+            err_msg = "Incorrect parameterization of random distribution. Expected %s, got %s."
+            raise KeyError(err_msg % (parameter_map.keys(), parameters.keys()))
+        parameters_np = dict((parameter_map[k], v) for k, v in parameters.items())
+        if distribution_np == "normal_clipped":
+            def normal(n):
+                return generator.normal(loc=parameters_np["mu"], scale=parameters_np["sigma"],
+                                        size=n)
+            return self._normal_clipped(generator.random, normal, size=size, **parameters_np)
+        elif distribution_np == "normal_clipped_to_boundary":
+            res = generator.normal(loc=parameters_np["mu"], scale=parameters_np["sigma"],
+                                   size=size)
+            return np.maximum(np.minimum(res, parameters_np["high"]), parameters_np["low"])
+        else:
+            return getattr(generator, distribution_np)(size=size, **parameters_np)
+
+    def permutation(self, x):
+        """
+        Randomly permute a sequence, or return a permuted range. Each call
+        uses a separate Philox counter.
+        """
+        generator = self._generator("permutation", [0, 0, self._permutations, 0])
+        self._permutations += 1
+        return generator.permutation(x)
+
+    def skip(self, n):
+        """Advance the stream by `n` values without generating them."""
+        self._position += n
+
+    def get_state(self):
+        return ("PhiloxRNG", self._position, self._permutations)
+
+    def set_state(self, state):
+        self._position, self._permutations = state[1:]
+
 
 # should add a wrapper for the built-in Python random module.
 
@@ -348,8 +695,8 @@ class RandomDistribution(object):
             parameters of the distribution, provided as a tuple. For the correct
             ordering, see `random.available_distributions`.
         `rng`:
-            if present, should be a :class:`NumpyRNG`, :class:`GSLRNG` or
-            :class:`NativeRNG` object.
+            if present, should be a :class:`NumpyRNG`, :class:`GeneratorRNG`,
+            :class:`GSLRNG`, :class:`PhiloxRNG` or :class:`NativeRNG` object.
         `parameters_named`:
             parameters of the distribution, provided as keyword arguments.
 
@@ -449,9 +796,30 @@ class RandomDistribution(object):
             # that of a sub-array produced by applying the mask
             # to an array of the requested global shape
             p_shape = partial_shape(mask, shape)
-            if p_shape:
-                n = reduce(operator.mul, p_shape)
+            if self.rng.parallel_safe and getattr(self.rng, "random_access", False):
+                # draw only the masked values, but at their positions in the full array
+                n = reduce(operator.mul, shape)
+                res = self.next(n, mask=_mask_to_flat_indices(mask, shape)).reshape(p_shape)
             else:
-                n = 1
-            res = self.next(n).reshape(p_shape)
+                if p_shape:
+                    n = reduce(operator.mul, p_shape)
+                else:
+                    n = 1
+                res = self.next(n).reshape(p_shape)
         return res
+
+
+def _mask_to_flat_indices(mask, shape):
+    """
+    Return the indices, within the flattened array of the given shape, of the
+    elements selected by `mask`, in the order in which they appear in the
+    partially-evaluated array.
+    """
+    if not isinstance(mask, tuple):
+        mask = (mask,)
+    mask = mask + (slice(None),) * (len(shape) - len(mask))
+    indices = []
+    for m, size in zip(mask, shape):
+        index = np.arange(size)[m]
+        indices.append(np.atleast_1d(index))
+    return np.ravel_multi_index(np.ix_(*indices), shape).ravel()
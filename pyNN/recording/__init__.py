@@ -15,6 +15,7 @@ from datetime import datetime
 import os
 from copy import copy
 from collections import defaultdict, namedtuple
+from itertools import chain
 from warnings import warn
 
 import numpy as np
@@ -30,6 +31,10 @@ MPI_ROOT = 0
 Variable = namedtuple('Variable', ['name', 'location', 'label'])
 
 
+def _empty_id_array():
+    return np.array([], dtype=np.int64)
+
+
 def get_mpi_comm():
     try:
         from mpi4py import MPI
@@ -47,25 +52,16 @@ def rename_existing(filename):
                        "Renaming the original file to {filename}_old")
 
 
-def gather_array(data):
-    # gather 1D or 2D numpy arrays
-    mpi_comm, mpi_flags = get_mpi_comm()
+def gather_array(data, all=False):
+    # gather 1D or 2D numpy arrays, concatenating along the first axis in rank order
     assert isinstance(data, np.ndarray)
     assert len(data.shape) < 3
-    # first we pass the data size
-    size = data.size
-    sizes = mpi_comm.gather(size, root=MPI_ROOT) or []
-    # now we pass the data
-    displacements = [sum(sizes[:i]) for i in range(len(sizes))]
-    gdata = np.empty(sum(sizes))
-    mpi_comm.Gatherv([data.flatten(), size, mpi_flags['DOUBLE']],
-                     [gdata, (sizes, displacements), mpi_flags['DOUBLE']],
-                     root=MPI_ROOT)
+    gdata, = gather_columns([data.ravel()], all=all)
     if len(data.shape) == 1:
         return gdata
     else:
         num_columns = data.shape[1]
-        return gdata.reshape((gdata.size / num_columns, num_columns))
+        return gdata.reshape((gdata.size // num_columns, num_columns))
 
 
 def gather_dict(D, all=False):
@@ -82,32 +78,201 @@ def gather_dict(D, all=False):
     return D
 
 
+def gather_counts(size, all=False):
+    """
+    Gather the number of elements each MPI node will send, and return the
+    counts and displacements to be used with Gatherv (Allgatherv if `all` is
+    True). On nodes which do not receive the gathered data, returns None.
+    """
+    mpi_comm, mpi_flags = get_mpi_comm()
+    local_count = np.array([size], dtype=np.intc)
+    counts = np.empty((mpi_comm.size,), dtype=np.intc)
+    if all:
+        mpi_comm.Allgather(local_count, counts)
+    else:
+        is_root = mpi_comm.rank == MPI_ROOT
+        mpi_comm.Gather(local_count, counts if is_root else None, root=MPI_ROOT)
+        if not is_root:
+            return None
+    displacements = np.zeros_like(counts)
+    np.cumsum(counts[:-1], out=displacements[1:])
+    return counts, displacements
+
+
+def gather_columns(columns, all=False):
+    """
+    Gather a list of 1D arrays, all of the same length, from all MPI nodes,
+    concatenating each array in rank order.
+
+    The arrays are sent with Gatherv (Allgatherv if `all` is True), using the
+    MPI datatype corresponding to the array dtype, which must therefore be the
+    same on all nodes. The counts and displacements are gathered once and
+    used for all the columns. On nodes which do not receive the gathered data,
+    the local arrays are returned.
+    """
+    mpi_comm, mpi_flags = get_mpi_comm()
+    columns = [np.ascontiguousarray(column) for column in columns]
+    size = columns[0].size if columns else 0
+    counts_and_displacements = gather_counts(size, all=all)
+    if counts_and_displacements is None:
+        for column in columns:
+            mpi_comm.Gatherv(column, None, root=MPI_ROOT)
+        return columns
+    total_size = int(counts_and_displacements[0].sum())
+    gathered = []
+    for column in columns:
+        gcolumn = np.empty(total_size, dtype=column.dtype)
+        if all:
+            mpi_comm.Allgatherv(column, [gcolumn, counts_and_displacements])
+        else:
+            mpi_comm.Gatherv(column, [gcolumn, counts_and_displacements], root=MPI_ROOT)
+        gathered.append(gcolumn)
+    return gathered
+
+
 def gather_blocks(data, ordered=True):
-    """Gather Neo Blocks"""
+    """
+    Gather Neo Blocks from all MPI nodes onto the root node.
+
+    Only the raw data (spike times, signal matrices, channel ids and indices)
+    are sent, using typed MPI collectives, together with a small amount of
+    pickled metadata. The segments of the block on the root node are then
+    rebuilt from the gathered arrays. If `ordered` is True, spike trains are
+    sorted by channel id. On other nodes, the local block is returned.
+    """
     mpi_comm, mpi_flags = get_mpi_comm()
     assert isinstance(data, neo.Block)
-    # for now, use gather_dict, which will probably be slow. Can optimize later
-    D = {mpi_comm.rank: data}
-    D = gather_dict(D)
-    blocks = list(D.values())
-    merged = data
-    if mpi_comm.rank == MPI_ROOT:
-        merged = blocks[0]
-        # the following business with setting sig.segment is a workaround for a bug in Neo
-        for seg in merged.segments:
-            for sig in seg.analogsignals:
-                sig.segment = seg
-        for block in blocks[1:]:
-            for seg, mseg in zip(block.segments, merged.segments):
-                for sig in seg.analogsignals:
-                    sig.segment = mseg
-            merged.merge(block)
+    is_root = mpi_comm.rank == MPI_ROOT
+    for segment in data.segments:
+        spiketrains = _gather_spiketrains(segment.spiketrains, ordered)
+        analogsignals = _gather_analogsignals(segment.analogsignals)
+        # irregularly sampled signals are rarely used and generally small,
+        # so for now these are pickled
+        irregularlysampledsignals = mpi_comm.gather(segment.irregularlysampledsignals,
+                                                    root=MPI_ROOT)
+        if is_root:
+            segment.spiketrains = spiketrains
+            segment.analogsignals = analogsignals
+            segment.irregularlysampledsignals = list(chain(*irregularlysampledsignals))
+            for obj in chain(segment.spiketrains, segment.analogsignals,
+                             segment.irregularlysampledsignals):
+                obj.segment = segment
+        elif ordered:
+            segment.spiketrains = sorted(segment.spiketrains,
+                                         key=lambda s: s.annotations['channel_id'])
+    return data
+
+
+def _gather_spiketrains(spiketrains, ordered=True):
+    """
+    Gather the spike trains of a segment from all MPI nodes, as arrays of
+    spike times, spike counts, channel ids and source indices, and return a
+    list of SpikeTrains on the root node (None on other nodes).
+    """
+    mpi_comm, mpi_flags = get_mpi_comm()
+    spiketrains = list(spiketrains)
+    channel_ids = np.array([st.annotations["channel_id"] for st in spiketrains], dtype=np.int64)
+    source_indices = np.array([st.annotations["source_index"] for st in spiketrains],
+                              dtype=np.int64)
+    counts = np.array([st.size for st in spiketrains], dtype=np.int64)
+    times = np.concatenate([st.rescale(pq.ms).magnitude.astype(np.float64)
+                            for st in spiketrains] + [np.empty((0,))])
+    if spiketrains:
+        annotations = spiketrains[0].annotations.copy()
+        annotations.pop("channel_id")
+        annotations.pop("source_index")
+        metadata = {
+            "t_start": float(spiketrains[0].t_start.rescale(pq.ms)),
+            "t_stop": float(spiketrains[0].t_stop.rescale(pq.ms)),
+            "annotations": annotations
+        }
+    else:
+        metadata = None
+    all_metadata = mpi_comm.gather(metadata, root=MPI_ROOT)
+    channel_ids, source_indices, counts = gather_columns([channel_ids, source_indices, counts])
+    times, = gather_columns([times])
+    if mpi_comm.rank != MPI_ROOT:
+        return None
+    metadata = [m for m in all_metadata if m is not None]
+    if not metadata:
+        return []
+    metadata = metadata[0]
+    starts = np.zeros_like(counts)
+    np.cumsum(counts[:-1], out=starts[1:])
     if ordered:
-        for segment in merged.segments:
-            ordered_spiketrains = sorted(
-                segment.spiketrains, key=lambda s: s.annotations['channel_id'])
-            segment.spiketrains = ordered_spiketrains
-    return merged
+        order = np.argsort(channel_ids, kind="stable")
+    else:
+        order = np.arange(channel_ids.size)
+    return [
+        neo.SpikeTrain(times[starts[i]:starts[i] + counts[i]],
+                       t_start=metadata["t_start"],
+                       t_stop=metadata["t_stop"],
+                       units="ms",
+                       channel_id=int(channel_ids[i]),
+                       source_index=int(source_indices[i]),
+                       **metadata["annotations"])
+        for i in order
+    ]
+
+
+def _gather_analogsignals(analogsignals):
+    """
+    Gather the AnalogSignals of a segment from all MPI nodes, as signal
+    matrices plus channel ids and indices, and return a list containing one
+    AnalogSignal per signal name on the root node (None on other nodes).
+
+    Channels are concatenated in rank order.
+    """
+    mpi_comm, mpi_flags = get_mpi_comm()
+    local_signals = {signal.name: signal for signal in analogsignals}
+    assert len(local_signals) == len(analogsignals), "signal names should be unique"
+    metadata = {}
+    for name, signal in local_signals.items():
+        annotations = signal.annotations.copy()
+        annotations.pop("channel_ids")
+        metadata[name] = {
+            "units": signal.units.dimensionality.string,
+            "t_start": float(signal.t_start.rescale(pq.ms)),
+            "sampling_period": float(signal.sampling_period.rescale(pq.ms)),
+            "num_samples": signal.shape[0],
+            "annotations": annotations
+        }
+    # all nodes need to know the names of all signals, to take part in the
+    # same collective operations
+    all_metadata = mpi_comm.allgather(metadata)
+    names = sorted(set(chain(*all_metadata)))
+    gathered = []
+    for name in names:
+        if name in local_signals:
+            signal = local_signals[name]
+            # the matrix is sent channel by channel, so that the channels from
+            # each node are contiguous
+            values = signal.magnitude.T.astype(np.float64).ravel()
+            channel_ids = np.asarray(signal.annotations["channel_ids"], dtype=np.int64)
+            channel_index = np.asarray(signal.array_annotations["channel_index"], dtype=np.int64)
+        else:
+            values = np.empty((0,))
+            channel_ids = channel_index = np.empty((0,), dtype=np.int64)
+        values, = gather_columns([values])
+        channel_ids, = gather_columns([channel_ids])
+        channel_index, = gather_columns([channel_index])
+        if mpi_comm.rank == MPI_ROOT:
+            metadata = [m[name] for m in all_metadata if name in m][0]
+            gathered.append(
+                neo.AnalogSignal(
+                    values.reshape((-1, metadata["num_samples"])).T,
+                    units=metadata["units"],
+                    t_start=metadata["t_start"] * pq.ms,
+                    sampling_period=metadata["sampling_period"] * pq.ms,
+                    name=name,
+                    channel_ids=channel_ids,
+                    array_annotations={"channel_index": channel_index},
+                    **metadata["annotations"]
+                )
+            )
+    if mpi_comm.rank == MPI_ROOT:
+        return gathered
+    return None
 
 
 def mpi_sum(x):
@@ -216,7 +381,7 @@ class Recorder(object):
         """
         self.file = file
         self.population = population  # needed for writing header information
-        self.recorded = defaultdict(set)
+        self.recorded = defaultdict(_empty_id_array)
         self.cache = DataCache()
         self._simulator.state.recorders.add(self)
         self.clear_flag = False
@@ -234,15 +399,31 @@ class Recorder(object):
         logger.debug('Recorder.record(<%d cells>)' % len(ids))
         self._check_sampling_interval(sampling_interval)
 
-        ids = set([id for id in ids if id.local])
+        ids = self._local_ids(ids)
         for variable in self._localize_variables(variables, locations):
             if not self.population.can_record(variable.name, variable.location):
                 raise errors.RecordingError(variable, self.population.celltype)
-            new_ids = ids.difference(self.recorded[variable])
+            new_ids = np.setdiff1d(ids, self.recorded[variable], assume_unique=True)
             assert isinstance(variable, Variable)
-            self.recorded[variable] = self.recorded[variable].union(ids)
+            self.recorded[variable] = np.union1d(self.recorded[variable], ids)
             self._record(variable, new_ids, sampling_interval)
 
+    def _local_ids(self, ids):
+        """
+        Return the sorted, unique integer ids from `ids` of the cells on the
+        local MPI node.
+        """
+        ids = np.asarray(ids, dtype=np.int64)
+        if ids.size > 0:
+            ids = ids[self.population._mask_local[self.population.id_to_index(ids)]]
+        return np.unique(ids)
+
+    def _get_cells(self, ids):
+        """Return the ID objects of the cells with the given integer ids."""
+        if len(ids) == 0:
+            return []
+        return [self.population[int(index)] for index in self.population.id_to_index(ids)]
+
     def _localize_variables(self, variables, locations):
         """
 
@@ -280,11 +461,12 @@ class Recorder(object):
     def reset(self):
         """Reset the list of things to be recorded."""
         self._reset()
-        self.recorded = defaultdict(set)
+        self.recorded = defaultdict(_empty_id_array)
 
     def filter_recorded(self, variable, filter_ids):
         if filter_ids is not None:
-            return set(filter_ids).intersection(self.recorded[variable])
+            return np.intersect1d(self.recorded[variable],
+                                  np.asarray(filter_ids, dtype=np.int64))
         else:
             return self.recorded[variable]
 
@@ -300,10 +482,10 @@ class Recorder(object):
         for variable in variables_to_include:
             if variable.name == 'spikes':
                 t_stop = self._simulator.state.t * pq.ms  # must run on all MPI nodes
-                sids = sorted(self.filter_recorded(Variable(name='spikes',
-                                                            location=None,
-                                                            label=None),
-                                                   filter_ids))
+                sids = self.filter_recorded(Variable(name='spikes',
+                                                     location=None,
+                                                     label=None),
+                                            filter_ids)
                 data = self._get_spiketimes(sids, clear=clear)
 
                 if isinstance(data, dict):
@@ -345,7 +527,7 @@ class Recorder(object):
                     )
                     segment.spiketrains.segment = segment
             else:
-                ids = sorted(self.filter_recorded(variable, filter_ids))
+                ids = self.filter_recorded(variable, filter_ids)
                 signal_array, times_array = self._get_all_signals(variable, ids, clear=clear)
                 mpi_node = self._simulator.state.mpi_rank  # for debugging
                 if signal_array.size > 0:
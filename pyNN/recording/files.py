@@ -7,6 +7,7 @@ Classes:
     StandardTextFile
     PickleFile
     NumpyBinaryFile
+    NumpyMemmapFile
     HDF5ArrayFile - requires PyTables
 
 :copyright: Copyright 2006-2024 by the PyNN team, see AUTHORS.
@@ -14,6 +15,7 @@ Classes:
 
 """
 
+import json
 import numpy as np
 import os
 import shutil
@@ -217,6 +219,109 @@ class NumpyBinaryFile(BaseFile):
         return D
 
 
+class NumpyMemmapFile(BaseFile):
+    """
+    Connection data are saved in a binary format which can be read without
+    loading the whole file into memory. The file contains three consecutive
+    records in .npy format: the metadata (as JSON), an index and the data.
+
+    The data rows are sorted by the value in the second column (the
+    post-synaptic index, for a connection list), and the index gives the
+    position of the first row for each post-synaptic index, so that the rows
+    for a given set of targets can be read directly from the memory-mapped
+    data with :meth:`read_targets`.
+    """
+
+    def __init__(self, filename, mode='rb'):
+        BaseFile.__init__(self, filename, mode)
+        self._records = None
+
+    def rename(self, filename):
+        BaseFile.rename(self, filename)
+        self._records = None
+
+    def write(self, data, metadata):
+        self._check_open()
+        data = np.array(data, dtype=float)
+        if data.size == 0:
+            data = data.reshape((0, len(metadata.get("columns", ()))))
+        if data.size > 0:
+            data = data[np.argsort(data[:, 1], kind="stable")]
+            counts = np.bincount(data[:, 1].astype(int))
+        else:
+            counts = np.array([], dtype=int)
+        index = np.zeros(counts.size + 1, dtype=np.int64)
+        np.cumsum(counts, out=index[1:])
+        header = json.dumps(metadata, default=str).encode("utf-8")
+        np.lib.format.write_array(self.fileobj, np.frombuffer(header, dtype=np.uint8))
+        np.lib.format.write_array(self.fileobj, index)
+        np.lib.format.write_array(self.fileobj, np.ascontiguousarray(data))
+        self.fileobj.close()
+
+    def _get_records(self):
+        """
+        Return a list of `(shape, dtype, offset)` tuples for the metadata,
+        index and data records.
+        """
+        if self._records is None:
+            self._check_open()
+            records = []
+            self.fileobj.seek(0)
+            for i in range(3):
+                version = np.lib.format.read_magic(self.fileobj)
+                if version == (1, 0):
+                    shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(self.fileobj)
+                else:
+                    shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(self.fileobj)
+                assert not fortran_order
+                offset = self.fileobj.tell()
+                records.append((shape, dtype, offset))
+                self.fileobj.seek(offset + int(np.prod(shape)) * dtype.itemsize)
+            self.fileobj.seek(0)
+            self._records = records
+        return self._records
+
+    def _memmap(self, record):
+        shape, dtype, offset = self._get_records()[record]
+        if int(np.prod(shape)) == 0:
+            return np.zeros(shape, dtype=dtype)
+        return np.memmap(self.name, dtype=dtype, mode='r', offset=offset, shape=shape)
+
+    def read(self):
+        """
+        Return the full data array, memory-mapped.
+        """
+        return self._memmap(2)
+
+    def read_index(self):
+        """
+        Return the index array: the rows for post-synaptic index `j` are
+        `read()[index[j]:index[j + 1]]`.
+        """
+        return np.array(self._memmap(1))
+
+    def read_targets(self, targets):
+        """
+        Return the rows of the data array whose second column is one of
+        `targets` (an array of integer post-synaptic indices), in order of
+        increasing target. Only these rows are read from disk.
+        """
+        index = self.read_index()
+        targets = np.asarray(targets, dtype=int)
+        targets = targets[targets < index.size - 1]
+        starts = index[targets]
+        counts = index[targets + 1] - starts
+        # row numbers of all the requested rows, built without a Python loop
+        rows = np.repeat(starts - np.cumsum(counts) + counts, counts) + np.arange(counts.sum())
+        data = self.read()
+        if rows.size == 0:
+            return np.zeros((0,) + data.shape[1:])
+        return np.asarray(data[rows])
+
+    def get_metadata(self):
+        return json.loads(self._memmap(0).tobytes().decode("utf-8"))
+
+
 if have_hdf5:
     class HDF5ArrayFile(BaseFile):
         """
@@ -428,7 +428,7 @@ def export_to_sonata(network, output_path, target="PyNN", overwrite=False):
         # we use a single node group for the full Population
         default = root.create_group(population_label)
         # todo: check and fix the dtypes in the following
-        default.create_dataset("node_id", data=population.all_cells.astype('i4'), dtype='i4')
+        default.create_dataset("node_id", data=population._all_ids.astype('i4'), dtype='i4')
         default.create_dataset("node_type_id", data=i * np.ones((n,)), dtype='i2')
         default.create_dataset("node_group_id", data=np.array(
             [group_label] * n), dtype='i2')  # todo: calculate the max label size
@@ -508,8 +508,8 @@ def export_to_sonata(network, output_path, target="PyNN", overwrite=False):
         )
         source_index = values[:, 0].astype(int)
         target_index = values[:, 1].astype(int)
-        source_gids = projection.pre.all_cells[source_index].astype('i4')
-        target_gids = projection.post.all_cells[target_index].astype('i4')
+        source_gids = projection.pre._all_ids[source_index].astype('i4')
+        target_gids = projection.post._all_ids[target_index].astype('i4')
         group_label = 0  # "default"
 
         # Write HDF5 file
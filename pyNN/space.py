@@ -6,6 +6,8 @@ Classes:
 
   Space           - representation of a Cartesian space for use in calculating
                     distances
+  CellGrid        - a uniform grid of cells over a set of positions, used to find
+                    the positions lying within a given distance of a point.
 
   Line            - represents a structure with neurons distributed evenly on a
                     straight line.
@@ -96,11 +98,15 @@ class Space(object):
         self.scale_factor = scale_factor
         self.offset = offset
 
-    def distances(self, A, B, expand=False):
+    def distances(self, A, B, expand=False, pairwise=False):
         """
         Calculate the distance matrix between two sets of coordinates, given
         the topology of the current space.
         From http://projects.scipy.org/pipermail/numpy-discussion/2007-April/027203.html
+
+        If `pairwise` is True, `A` and `B` must contain the same number of
+        points, and only the distances between corresponding points are
+        calculated.
         """
         assert A.ndim <= 2
         assert B.ndim <= 2
@@ -110,9 +116,15 @@ class Space(object):
         if len(B.shape) == 1:
             B = B.reshape(1, 3)
         B = self.scale_factor * (B + self.offset)
-        d = np.zeros((len(self.axes), A.shape[0], B.shape[0]), dtype=A.dtype)
+        if pairwise:
+            d = np.zeros((len(self.axes), A.shape[0]), dtype=A.dtype)
+        else:
+            d = np.zeros((len(self.axes), A.shape[0], B.shape[0]), dtype=A.dtype)
         for i, axis in enumerate(self.axes):
-            diff2 = A[:, None, axis] - B[:, axis]
+            if pairwise:
+                diff2 = A[:, axis] - B[:, axis]
+            else:
+                diff2 = A[:, None, axis] - B[:, axis]
             if self.periodic_boundaries is not None:
                 boundaries = self.periodic_boundaries[axis]
                 if boundaries is not None:
@@ -128,6 +140,10 @@ class Space(object):
 
     def distance_generator(self, f, g):
         def distance_map(i, j):
+            if (isinstance(i, np.ndarray) and isinstance(j, np.ndarray)
+                    and i.ndim == 1 and j.ndim == 1):
+                # pointwise addresses, e.g. the (pre, post) pairs of a set of connections
+                return self.distances(f(i), g(j), pairwise=True)
             shape = []
             if isinstance(i, np.ndarray) and i.ndim == 2:
                 i = i[:, 0]
@@ -143,6 +159,105 @@ class Space(object):
         return distance_map
 
 
+class CellGrid(object):
+    """
+    Spatial index which divides space into a uniform grid of cells, so that the
+    points lying within a given distance of a target point can be found without
+    calculating the distances to all points.
+
+    Arguments:
+        positions:
+            array of shape (N, 3) containing the coordinates of the points to be
+            indexed (e.g. the transpose of the `positions` attribute of a
+            pre-synaptic :class:`Population`).
+        cell_size:
+            the minimum edge length of a grid cell. This would normally be the
+            largest distance that will be passed to :meth:`query`.
+        space:
+            the :class:`Space` in which distances are calculated. Only the axes
+            of the space are indexed, and periodic boundaries are taken into
+            account. The scale factor and offset of the space are applied to the
+            target points in :meth:`query`, as in :meth:`Space.distances`.
+    """
+
+    def __init__(self, positions, cell_size, space=None):
+        assert positions.ndim == 2 and positions.shape[1] == 3
+        if cell_size <= 0:
+            raise ValueError("cell_size must be positive")
+        self.positions = positions
+        self.space = space or Space()
+        axes = self.space.axes
+        coordinates = positions[:, axes]
+        self.origin = np.zeros(axes.size)
+        self.width = np.zeros(axes.size)
+        self.shape = np.ones(axes.size, dtype=int)
+        self.periodic = np.zeros(axes.size, dtype=bool)
+        for k, axis in enumerate(axes):
+            boundaries = None
+            if self.space.periodic_boundaries is not None:
+                boundaries = self.space.periodic_boundaries[axis]
+            if boundaries is not None:
+                extent = boundaries[1] - boundaries[0]
+                self.shape[k] = max(1, int(extent // cell_size))
+                self.origin[k] = boundaries[0]
+                self.width[k] = extent / self.shape[k]
+                self.periodic[k] = True
+            else:
+                if coordinates.shape[0] > 0:
+                    self.origin[k] = coordinates[:, k].min()
+                    extent = coordinates[:, k].max() - self.origin[k]
+                    self.shape[k] = int(extent // cell_size) + 1
+                self.width[k] = cell_size
+        keys = self._keys(self._cell_coordinates(coordinates).T)
+        self._sorted_indices = np.argsort(keys, kind="stable")
+        self._cell_keys, starts = np.unique(keys[self._sorted_indices], return_index=True)
+        self._cell_boundaries = np.append(starts, keys.size)
+
+    def _cell_coordinates(self, coordinates):
+        cells = np.floor((coordinates - self.origin) / self.width).astype(int)
+        cells[:, self.periodic] %= self.shape[self.periodic]
+        return np.clip(cells, 0, self.shape - 1)
+
+    def _keys(self, cells):
+        return np.ravel_multi_index(tuple(cells), tuple(self.shape))
+
+    def query(self, point, distance):
+        """
+        Return the indices, in increasing order, of the points lying within
+        `distance` of `point`, together with their distances from `point`.
+
+        `point` is given in the coordinate system of the target population,
+        i.e. the scale factor and offset of the space have not been applied.
+        """
+        target = self.space.scale_factor * (point + self.space.offset)
+        target = np.broadcast_to(target, (3,))[self.space.axes]
+        centre = np.floor((target - self.origin) / self.width).astype(int)
+        span = np.ceil(distance / self.width).astype(int)
+        ranges = []
+        for k in range(centre.size):
+            cells = np.arange(centre[k] - span[k], centre[k] + span[k] + 1)
+            if self.periodic[k]:
+                cells = np.unique(cells % self.shape[k])
+            else:
+                cells = cells[(cells >= 0) & (cells < self.shape[k])]
+            ranges.append(cells)
+        keys = self._keys([c.ravel() for c in np.meshgrid(*ranges, indexing="ij")])
+        slots = np.searchsorted(self._cell_keys, keys)
+        found = slots < self._cell_keys.size
+        found[found] = self._cell_keys[slots[found]] == keys[found]
+        slots = slots[found]
+        candidates = np.sort(np.hstack(
+            [self._sorted_indices[start:stop]
+             for start, stop in zip(self._cell_boundaries[slots],
+                                    self._cell_boundaries[slots + 1])]
+            + [np.array([], dtype=int)]))
+        if candidates.size == 0:
+            return candidates, np.array([])
+        distances = self.space.distances(self.positions[candidates], point)
+        within = distances <= distance
+        return candidates[within], distances[within]
+
+
 class BaseStructure(object):
 
     def __repr__(self):
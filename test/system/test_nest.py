@@ -173,7 +173,7 @@ def test_tsodyks_markram_synapse():
                          synapse_type=synapse_type)
     neurons.record('gsyn_inh')
     sim.run(100.0)
-    connections = nest.GetConnections(nest.NodeCollection(list(prj._sources)),
+    connections = nest.GetConnections(nest.NodeCollection(prj._sources.tolist()),
                                       synapse_model=prj.nest_synapse_model)
     tau_psc = np.array(nest.GetStatus(connections, 'tau_psc'))
     assert_array_equal(tau_psc, np.arange(0.2, 0.7, 0.1))
@@ -12,8 +12,9 @@ import numpy as np
 class MockRNG(random.WrappedRNG):
     rng = None
 
-    def __init__(self, start=0.0, delta=1, parallel_safe=True):
+    def __init__(self, start=0.0, delta=1, parallel_safe=True, rejection_sampling=False):
         random.WrappedRNG.__init__(self, parallel_safe=parallel_safe)
+        self.rejection_sampling = rejection_sampling
         self.start = start
         self.delta = delta
 
@@ -284,6 +284,38 @@ class AssemblyTest(unittest.TestCase):
         p3 = sim.Population(3, sim.IF_curr_exp())
         a = sim.Assembly(p3, p1, p2)
         self.assertRaises(IndexError, a.id_to_index, p3.last_id + 1)
+        self.assertRaises(IndexError, a.id_to_index, [p1[0], p3.last_id + 1])
+
+    def test_id_to_index_after_iadd(self, sim=sim):
+        p1 = sim.Population(11, sim.IF_cond_exp())
+        p2 = sim.Population(6, sim.IF_cond_alpha())
+        p3 = sim.Population(3, sim.IF_curr_exp())
+        a = sim.Assembly(p3, p1)
+        assert_array_equal(a.id_to_index([p1[0], p3[0]]), [3, 0])
+        self.assertEqual(a.size, 14)
+        a += p2
+        assert_array_equal(a.id_to_index([p2[1], p1[0], p3[0]]), [15, 3, 0])
+        self.assertEqual(len(a.all_cells), 20)
+        self.assertEqual(len(a._mask_local), 20)
+        self.assertEqual(a[15], p2[1])
+
+    def test_positions_property_after_change(self, sim=sim):
+        p1 = sim.Population(3, sim.IF_cond_exp())
+        p2 = sim.Population(2, sim.IF_cond_exp())
+        a = sim.Assembly(p1, p2[:1])
+        assert_array_equal(a.positions, np.hstack((p1.positions, p2.positions[:, :1])))
+        p1.positions = np.arange(9).reshape((3, 3))
+        p2[0].position = (7.0, 8.0, 9.0)
+        assert_array_equal(a.positions[:, :3], np.arange(9).reshape((3, 3)))
+        assert_array_equal(a.positions[:, 3], [7.0, 8.0, 9.0])
+
+    def test_positions_property_after_change_in_place(self, sim=sim):
+        p1 = sim.Population(3, sim.IF_cond_exp())
+        p2 = sim.Population(2, sim.IF_cond_exp())
+        a = sim.Assembly(p1, p2)
+        assert_array_equal(a.positions, np.hstack((p1.positions, p2.positions)))
+        p2.positions[0, 0] = 99.0
+        self.assertEqual(a.positions[0, 3], 99.0)
 
     def test_getitem_int(self, sim=sim):
         p1 = sim.Population(11, sim.IF_cond_exp())
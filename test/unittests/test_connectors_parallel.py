@@ -6,6 +6,7 @@ Tests of the Connector classes, using the pyNN.mock backend.
 """
 
 import unittest
+from unittest.mock import patch
 
 from pyNN import connectors, random, errors, space, recording
 import numpy as np
@@ -440,6 +441,18 @@ class TestFromFileConnector(unittest.TestCase):
                          [(0, 1, 0.5, 0.14),
                           (2, 3, 0.3, 0.12)])
 
+    def test_connect_with_memmap_file(self, sim=sim):
+        file = recording.files.NumpyMemmapFile("test.connections", mode='wb')
+        file.write(self.connection_list, {"columns": ["i", "j", "weight", "delay"]})
+        file = recording.files.NumpyMemmapFile("test.connections", mode='rb')
+        C = connectors.FromFileConnector(file)
+        syn = sim.StaticSynapse()
+        prj = sim.Projection(self.p1, self.p2, C, syn)
+        self.assertEqual(prj.get(["weight", "delay"], format='list', gather=False),  # use gather False because we are faking the MPI
+                         [(0, 1, 0.5, 0.14),
+                          (2, 3, 0.3, 0.12)])
+        file.close()
+
     def test_with_plastic_synapses_not_distributed(self, sim=sim):
         connection_list = [
             (0, 0, 0.1, 0.1,  100, 100),
@@ -467,10 +480,11 @@ class TestFixedNumberPostConnector(unittest.TestCase):
         assert_array_equal(self.p2._mask_local, np.array([0, 1, 0, 1, 0], dtype=bool))
 
     def test_with_n_smaller_than_population_size(self, sim=sim):
-        C = connectors.FixedNumberPostConnector(n=3, rng=MockRNG(delta=1))
+        C = connectors.FixedNumberPostConnector(n=3, rng=MockRNG(delta=-1))
         syn = sim.StaticSynapse(weight="0.5*d")
         prj = sim.Projection(self.p1, self.p2, C, syn)
-        # MockRNG.permutation(arr) returns the reverse of arr, so each pre neuron will connect to neurons 4, 3, 2
+        # MockRNG(delta=-1) returns decreasing values, so sorting them gives the post neurons in
+        # reverse order, and each pre neuron will connect to neurons 4, 3, 2
         # however, only neuron 3 is on the "local" (fake MPI) node
         self.assertEqual(prj.get(["weight", "delay"], format='list', gather=False),  # use gather False because we are faking the MPI
                          [(0, 3, 1.5, 0.123),
@@ -479,10 +493,10 @@ class TestFixedNumberPostConnector(unittest.TestCase):
                           (3, 3, 0.0, 0.123)])
 
     def test_with_n_larger_than_population_size(self, sim=sim):
-        C = connectors.FixedNumberPostConnector(n=7, rng=MockRNG(delta=1))
+        C = connectors.FixedNumberPostConnector(n=7, rng=MockRNG(delta=-1))
         syn = sim.StaticSynapse()
         prj = sim.Projection(self.p1, self.p2, C, syn)
-        # each pre neuron will connect to all post neurons (population size 5 is less than n), then to 4, 3 (MockRNG.permutation)
+        # each pre neuron will connect to all post neurons (population size 5 is less than n), then to 4, 3 (reverse order)
         self.assertEqual(prj.get(["weight", "delay"], format='list', gather=False),  # use gather False because we are faking the MPI
                          [(0, 1, 0.0, 0.123),
                           (1, 1, 0.0, 0.123),
@@ -499,15 +513,15 @@ class TestFixedNumberPostConnector(unittest.TestCase):
 
     def test_with_n_larger_than_population_size_no_self_connections(self, sim=sim):
         C = connectors.FixedNumberPostConnector(
-            n=7, allow_self_connections=False, rng=MockRNG(delta=1))
+            n=7, allow_self_connections=False, rng=MockRNG(delta=-1))
         syn = sim.StaticSynapse()
         prj = sim.Projection(self.p2, self.p2, C, syn)
         # connections as follows: (pre - list of post)
-        #   0 - 1 2 3 4 4 3 2
-        #   1 - 0 2 3 4 4 3 2
-        #   2 - 0 1 3 4 4 3 1
-        #   3 - 0 1 2 4 4 2 1
-        #   4 - 0 1 2 3 3 2 1
+        #   0 - 4 3 2 1 4 3 2
+        #   1 - 4 3 2 0 4 3 2
+        #   2 - 4 3 1 0 4 3 1
+        #   3 - 4 2 1 0 4 2 1
+        #   4 - 3 2 1 0 3 2 1
         self.assertEqual(prj.get(["weight", "delay"], format='list', gather=False),  # use gather False because we are faking the MPI
                          [(0, 1, 0.0, 0.123),
                           (2, 1, 0.0, 0.123),
@@ -525,6 +539,20 @@ class TestFixedNumberPostConnector(unittest.TestCase):
                           (4, 3, 0.0, 0.123),
                           (4, 3, 0.0, 0.123), ])
 
+    def test_draw_without_replacement(self, sim=sim):
+        C = connectors.FixedNumberPostConnector(n=3, allow_self_connections=False,
+                                                rng=random.NumpyRNG(seed=8712))
+        # targets of pre-synaptic neurons 2, 3 and 4, among 5 post-synaptic neurons
+        targets = C._draw_without_replacement(2, np.array([3, 4, 6]), 5, True)
+        self.assertEqual(targets.size, 13)
+        self.assertEqual(len(set(targets[:3]) - {0, 1, 3, 4}), 0)
+        self.assertEqual(len(set(targets[:3])), 3)
+        assert_array_equal(np.sort(targets[3:7]), [0, 1, 2, 4])
+        # more targets than candidates: every candidate once, then two of them again
+        counts = np.bincount(targets[7:], minlength=5)
+        self.assertEqual(counts[4], 0)
+        self.assertEqual(sorted(counts[:4]), [1, 1, 2, 2])
+
     def test_with_replacement(self, sim=sim):
         C = connectors.FixedNumberPostConnector(n=3, with_replacement=True, rng=MockRNG(delta=1))
         syn = sim.StaticSynapse()
@@ -556,20 +584,36 @@ class TestFixedNumberPostConnector(unittest.TestCase):
 
     def test_with_replacement_no_self_connections(self, sim=sim):
         C = connectors.FixedNumberPostConnector(n=3, with_replacement=True,
-                                                allow_self_connections=False, rng=MockRNG(start=2, delta=1))
+                                                allow_self_connections=False,
+                                                rng=MockRNG(start=2, delta=1, rejection_sampling=True))
         syn = sim.StaticSynapse()
         prj = sim.Projection(self.p2, self.p2, C, syn)
+        # all targets are drawn at once, then self-connections are redrawn:
         # 0 - 2 3 4
-        # 1 - 0 2 3
-        # 2 - 4 0 1
-        # 3 - 2 4 0
-        # 4 - 1 2 3
+        # 1 - 0 [1 -> 2] 2
+        # 2 - 3 4 0
+        # 3 - 1 2 [3 -> 3 -> 0]
+        # 4 - [4 -> 4 -> 1] 0 1
         self.assertEqual(prj.get(["weight", "delay"], format='list', gather=False),  # use gather False because we are faking the MPI
-                         [(2, 1, 0.0, 0.123),
+                         [(3, 1, 0.0, 0.123),
+                          (4, 1, 0.0, 0.123),
                           (4, 1, 0.0, 0.123),
                           (0, 3, 0.0, 0.123),
-                          (1, 3, 0.0, 0.123),
-                          (4, 3, 0.0, 0.123)])
+                          (2, 3, 0.0, 0.123)])
+
+    def test_single_neuron_no_self_connections(self, sim=sim):
+        p = sim.Population(1, sim.IF_cond_exp())
+        for with_replacement in (True, False):
+            C = connectors.FixedNumberPostConnector(n=1, with_replacement=with_replacement,
+                                                    allow_self_connections=False,
+                                                    rng=MockRNG(delta=1))
+            self.assertRaises(errors.ConnectionError,
+                              sim.Projection, p, p, C, sim.StaticSynapse())
+            C = connectors.FixedNumberPostConnector(n=0, with_replacement=with_replacement,
+                                                    allow_self_connections=False,
+                                                    rng=MockRNG(delta=1))
+            prj = sim.Projection(p, p, C, sim.StaticSynapse())
+            self.assertEqual(prj.size(), 0)
 
 
 class TestFixedNumberPreConnector(unittest.TestCase):
@@ -614,7 +658,7 @@ class TestFixedNumberPreConnector(unittest.TestCase):
 
     def test_with_n_larger_than_population_size_no_self_connections(self, sim=sim):
         C = connectors.FixedNumberPreConnector(
-            n=7, allow_self_connections=False, rng=MockRNG(delta=1))
+            n=7, allow_self_connections=False, rng=MockRNG(delta=-1))
         syn = sim.StaticSynapse()
         prj = sim.Projection(self.p2, self.p2, C, syn)
         self.assertEqual(prj.get(["weight", "delay"], format='list', gather=False),  # use gather False because we are faking the MPI
@@ -667,7 +711,8 @@ class TestFixedNumberPreConnector(unittest.TestCase):
 
     def test_with_replacement_no_self_connections(self, sim=sim):
         C = connectors.FixedNumberPreConnector(n=3, with_replacement=True,
-                                               allow_self_connections=False, rng=MockRNG(start=2, delta=1))
+                                               allow_self_connections=False,
+                                               rng=MockRNG(start=2, delta=1, rejection_sampling=True))
         syn = sim.StaticSynapse()
         prj = sim.Projection(self.p2, self.p2, C, syn)
         self.assertEqual(prj.get(["weight", "delay"], format='list', gather=False),  # use gather False because we are faking the MPI
@@ -763,10 +808,12 @@ class TestArrayConnector(unittest.TestCase):
         ], dtype=bool)
         C = connectors.ArrayConnector(connections, safe=False)
         prj = sim.Projection(self.p1, self.p2, C, syn)
-        self.assertEqual(prj.get(["weight", "delay"], format='list', gather=False),  # use gather False because we are faking the MPI
-                         [(1, 0, 0.0, 1.0),
-                          (0, 2, 3.0, 1.3),
-                          (2, 2, 4.0, 1.4000000000000001)])  # better to do an "almost-equal" check
+        assert_array_almost_equal(
+            np.array(prj.get(["weight", "delay"], format='list', gather=False)),  # use gather False because we are faking the MPI
+            np.array([(1, 0, 0.0, 1.0),
+                      (0, 2, 3.0, 1.3),
+                      (2, 2, 4.0, 1.4)]),
+            12)
 
 
 class TestCloneConnector(unittest.TestCase):
@@ -807,6 +854,20 @@ class TestCloneConnector(unittest.TestCase):
                          [(0, 1, 5.0, 0.5),
                           (2, 3, 5.0, 0.5)])
 
+    def test_connect_with_gather(self, sim=sim):
+        def mock_gather_columns(columns, all=False):
+            # connections from the (fake) other MPI node
+            other_columns = (np.array([0, 3, 2]), np.array([0, 0, 2]))
+            return [np.hstack((other, column)) for other, column in zip(other_columns, columns)]
+        syn = sim.StaticSynapse(weight=5.0, delay=0.5)
+        C = connectors.CloneConnector(self.ref_prj, gather=True)
+        with patch("pyNN.recording.gather_columns", side_effect=mock_gather_columns):
+            prj = sim.Projection(self.p1, self.p2, C, syn)
+        # only the connections to local targets are created
+        self.assertEqual(prj.get(["weight", "delay"], format='list', gather=False),  # use gather False because we are faking the MPI
+                         [(0, 1, 5.0, 0.5),
+                          (2, 3, 5.0, 0.5)])
+
     def test_connect_with_pre_post_mismatch(self, sim=sim):
         syn = sim.StaticSynapse()
         C = connectors.CloneConnector(self.ref_prj)
@@ -935,3 +996,63 @@ class TestFixedTotalNumberConnector(unittest.TestCase):
         connections = prj.get(["weight", "delay"], format='list', gather=False)
         self.assertLess(len(connections), 12)    # unlikely to be 12, since we have 2 MPI nodes
         self.assertGreater(len(connections), 0)  # unlikely to be 0
+
+    def test_parallel_safe(self):
+        C = connectors.FixedTotalNumberConnector(n=12, rng=random.NumpyRNG(seed=8712,
+                                                                         parallel_safe=True),
+                                                 parallel_safe=True)
+        prj = sim.Projection(self.p1, self.p2, C, sim.StaticSynapse())
+        connections = [(i, j) for i, j, w in prj.get("weight", format='list', gather=False)]
+        # every process draws all 12 connections, then keeps those with local targets
+        rng = random.NumpyRNG(seed=8712, parallel_safe=True)
+        sources = rng.next(12, 'uniform_int', {"low": 0, "high": 4})
+        targets = rng.next(12, 'uniform_int', {"low": 0, "high": 5})
+        expected = sorted((i, j) for i, j in zip(sources, targets) if j in (1, 3))
+        self.assertEqual(sorted(connections), expected)
+
+    def test_parallel_safe_with_random_n(self):
+        n = random.RandomDistribution('poisson', lambda_=12, rng=random.NumpyRNG(seed=523))
+        C = connectors.FixedTotalNumberConnector(n=n, rng=random.NumpyRNG(seed=8712,
+                                                                        parallel_safe=True),
+                                                 parallel_safe=True)
+        prj = sim.Projection(self.p1, self.p2, C, sim.StaticSynapse())
+        connections = [(i, j) for i, j, w in prj.get("weight", format='list', gather=False)]
+        # the total number of connections is drawn first (after the 100 values
+        # drawn by the constructor to check the distribution)
+        n_rng = random.NumpyRNG(seed=523)
+        n_rng.next(100, 'poisson', {'lambda_': 12})
+        n_total = int(n_rng.next(1, 'poisson', {'lambda_': 12})[0])
+        rng = random.NumpyRNG(seed=8712, parallel_safe=True)
+        sources = rng.next(n_total, 'uniform_int', {"low": 0, "high": 4})
+        targets = rng.next(n_total, 'uniform_int', {"low": 0, "high": 5})
+        expected = sorted((i, j) for i, j in zip(sources, targets) if j in (1, 3))
+        self.assertEqual(sorted(connections), expected)
+
+    def test_not_parallel_safe_with_random_n(self):
+        n = random.RandomDistribution('poisson', lambda_=12, rng=random.NumpyRNG(seed=523))
+        C = connectors.FixedTotalNumberConnector(n=n, rng=random.NumpyRNG(seed=8712))
+        prj = sim.Projection(self.p1, self.p2, C, sim.StaticSynapse())
+        connections = [(i, j) for i, j, w in prj.get("weight", format='list', gather=False)]
+        self.assertTrue(all(j in (1, 3) for i, j in connections))
+
+    def test_not_parallel_safe(self):
+        C = connectors.FixedTotalNumberConnector(n=12, rng=random.NumpyRNG(seed=8712,
+                                                                         parallel_safe=False))
+        prj = sim.Projection(self.p1, self.p2, C, sim.StaticSynapse())
+        connections = [(i, j) for i, j, w in prj.get("weight", format='list', gather=False)]
+        self.assertLessEqual(len(connections), 12)
+        self.assertTrue(all(j in (1, 3) for i, j in connections))
+
+    def test_local_draw_is_default(self):
+        # with the default parallel-safe NumpyRNG, only the local connections are drawn
+        C = connectors.FixedTotalNumberConnector(n=12, rng=random.NumpyRNG(seed=8712))
+        self.assertFalse(C.parallel_safe)
+        with patch.object(C, "_draw_local_connections",
+                          wraps=C._draw_local_connections) as draw_local:
+            sim.Projection(self.p1, self.p2, C, sim.StaticSynapse())
+        draw_local.assert_called_once()
+
+    def test_parallel_safe_requires_parallel_safe_rng(self):
+        self.assertRaises(ValueError, connectors.FixedTotalNumberConnector, n=12,
+                          rng=random.NumpyRNG(seed=8712, parallel_safe=False),
+                          parallel_safe=True)
@@ -6,6 +6,7 @@ Tests of the Connector classes, using the pyNN.mock backend.
 """
 
 import unittest
+import unittest.mock
 
 from pyNN import connectors, random, errors, space, recording
 import numpy as np
@@ -341,6 +342,37 @@ class TestFixedProbabilityConnector(unittest.TestCase):
                           (3, 4, 0.0, 0.123),
                           ])
 
+    def test_connect_sparse_with_probability_one(self, sim=sim):
+        C1 = connectors.FixedProbabilityConnector(p_connect=1.)
+        C2 = connectors.FixedProbabilityConnector(p_connect=1., sparse=True)
+        syn = sim.StaticSynapse(weight=lambda d: 0.1 * d)
+        prj1 = sim.Projection(self.p1, self.p2, C1, syn)
+        prj2 = sim.Projection(self.p1, self.p2, C2, syn)
+        self.assertEqual(prj2.get(["weight", "delay"], format='list'),
+                         prj1.get(["weight", "delay"], format='list'))
+
+    def test_connect_sparse_with_probability_zero(self, sim=sim):
+        C = connectors.FixedProbabilityConnector(p_connect=0., sparse=True)
+        prj = sim.Projection(self.p1, self.p2, C, sim.StaticSynapse())
+        self.assertEqual(prj.size(), 0)
+
+    def test_connect_sparse(self, sim=sim):
+        p = sim.Population(200, sim.IF_cond_exp())
+        C = connectors.FixedProbabilityConnector(p_connect=0.05, allow_self_connections=False,
+                                                 rng=random.NumpyRNG(seed=87234),
+                                                 sparse=True)
+        prj = sim.Projection(p, p, C, sim.StaticSynapse())
+        connections = np.array(prj.get([], format='list'), dtype=int)
+        # expected number of connections is 1990, standard deviation about 43
+        self.assertLess(abs(len(connections) - 1990), 200)
+        self.assertFalse((connections[:, 0] == connections[:, 1]).any())
+        self.assertEqual(len(set(map(tuple, connections))), len(connections))
+
+    def test_get_parameters_includes_sparse(self):
+        C = connectors.FixedProbabilityConnector(p_connect=0.05, sparse=True)
+        self.assertEqual(C.get_parameters(),
+                         {'allow_self_connections': True, 'p_connect': 0.05, 'sparse': True})
+
     def test_connect_weight_function_and_one_post_synaptic_neuron_not_connected(self, sim=sim):
         C = connectors.FixedProbabilityConnector(p_connect=0.8,
                                                  rng=MockRNG(delta=0.05))
@@ -403,6 +435,68 @@ class TestFixedProbabilityConnector(unittest.TestCase):
                                   9)
 
 
+class TestBulkConnection(unittest.TestCase):
+
+    def setUp(self, sim=sim, **extra):
+        sim.setup(min_delay=0.123, **extra)
+        self.p1 = sim.Population(7, sim.IF_cond_exp(), structure=space.Line())
+        self.p2 = sim.Population(6, sim.HH_cond_exp(), structure=space.Line())
+
+    def tearDown(self, sim=sim):
+        sim.end()
+
+    def _connect(self, block_elements, bulk=True, sim=sim):
+        C = connectors.FixedProbabilityConnector(p_connect=0.6,
+                                                 rng=random.NumpyRNG(seed=8675309))
+        C.max_block_elements = block_elements
+        if not bulk:
+            C._use_bulk_connect = lambda projection: False
+        rd = random.RandomDistribution('uniform', (0.5, 1.5), rng=random.NumpyRNG(seed=5366))
+        syn = sim.StaticSynapse(weight=lambda d: 0.1 * d + 0.2, delay=rd)
+        prj = sim.Projection(self.p1, self.p2, C, syn)
+        return prj.get(["weight", "delay"], format='list')
+
+    def test_blocks_give_same_connections_as_columnwise_connection(self):
+        reference = self._connect(100, bulk=False)
+        self.assertGreater(len(reference), 0)
+        for block_elements in (1, 10, 100):
+            assert_array_almost_equal(np.array(self._connect(block_elements)),
+                                      np.array(reference), 12)
+
+    def test_bulk_connect_called_once_per_block(self, sim=sim):
+        calls = []
+        orig_bulk_connect = sim.Projection._bulk_connect
+
+        def bulk_connect(self, presynaptic_indices, postsynaptic_indices, **kwargs):
+            calls.append(postsynaptic_indices)
+            orig_bulk_connect(self, presynaptic_indices, postsynaptic_indices, **kwargs)
+        sim.Projection._bulk_connect = bulk_connect
+        try:
+            C = connectors.AllToAllConnector(safe=False)
+            C.max_block_elements = 14  # two columns per block
+            prj = sim.Projection(self.p1, self.p2, C, sim.StaticSynapse())
+        finally:
+            sim.Projection._bulk_connect = orig_bulk_connect
+        self.assertEqual(len(calls), 3)
+        assert_array_equal(calls[0], np.repeat([0, 1], 7))
+        self.assertEqual(len(prj), 42)
+
+    def test_parameters_evaluated_only_for_connections(self, sim=sim):
+        evaluated = []
+
+        def weight(d):
+            evaluated.append(np.size(d))
+            return 0.1 * d + 0.2
+        C = connectors.FixedProbabilityConnector(p_connect=0.2,
+                                                 rng=random.NumpyRNG(seed=8675309))
+        prj = sim.Projection(self.p1, self.p2, C, sim.StaticSynapse(weight=weight))
+        self.assertGreater(len(prj), 0)
+        # the extra value is evaluated by the projection to guess the receptor type
+        self.assertEqual(sum(evaluated), len(prj) + 1)
+        for i, j, w in prj.get("weight", format="list"):
+            self.assertAlmostEqual(w, 0.1 * abs(i - j) + 0.2, places=12)
+
+
 class TestDistanceDependentProbabilityConnector(unittest.TestCase):
 
     def setUp(self, sim=sim, **extra):
@@ -433,6 +527,74 @@ class TestDistanceDependentProbabilityConnector(unittest.TestCase):
                           (3, 3, 0.0, 0.123),
                           (3, 4, 0.0, 0.123)])
 
+    def test_connect_with_max_distance(self, sim=sim):
+        C1 = connectors.DistanceDependentProbabilityConnector(d_expression="d<1.5",
+                                                              rng=MockRNG(delta=0.01))
+        C2 = connectors.DistanceDependentProbabilityConnector(d_expression="d<1.5",
+                                                              rng=MockRNG(delta=0.01),
+                                                              max_distance=1.5)
+        syn = sim.StaticSynapse(weight="0.5*d")
+        prj1 = sim.Projection(self.p1, self.p2, C1, syn)
+        prj2 = sim.Projection(self.p1, self.p2, C2, syn)
+        self.assertEqual(prj2.get(["weight", "delay"], format='list'),
+                         prj1.get(["weight", "delay"], format='list'))
+
+    def test_connect_with_max_distance_and_periodic_boundaries(self, sim=sim):
+        p = sim.Population(10, sim.IF_cond_exp(), structure=space.Line())
+        C = connectors.DistanceDependentProbabilityConnector(d_expression="d<1.5",
+                                                             allow_self_connections=False,
+                                                             rng=MockRNG(delta=0.01),
+                                                             max_distance=1.5)
+        prj = sim.Projection(p, p, C, sim.StaticSynapse(),
+                             space=space.Space(periodic_boundaries=((-0.5, 9.5), None, None)))
+        connections = prj.get("weight", format="array")
+        self.assertEqual(prj.size(), 20)
+        self.assertFalse(np.isnan(connections[0, 9]))
+        self.assertFalse(np.isnan(connections[9, 0]))
+        self.assertTrue(np.isnan(connections[0, 0]))
+
+    def test_connect_with_max_distance_no_mutual(self, sim=sim):
+        p = sim.Population(10, sim.IF_cond_exp(), structure=space.Line())
+        C = connectors.DistanceDependentProbabilityConnector(d_expression="d<2.5",
+                                                             allow_self_connections="NoMutual",
+                                                             rng=MockRNG(delta=0.01),
+                                                             max_distance=2.5)
+        prj = sim.Projection(p, p, C, sim.StaticSynapse())
+        self.assertEqual(prj.get("weight", format="list"),
+                         [(i, j, 0.0) for j in range(10) for i in range(j + 1, min(j + 3, 10))])
+
+    def test_max_distance_parameters_evaluated_only_within_range(self, sim=sim):
+        p = sim.Population(100, sim.IF_cond_exp(), structure=space.Line())
+        for bulk in (True, False):
+            evaluated = []
+
+            def delay(d):
+                evaluated.append(np.size(d))
+                return 0.2 + 0.1 * d
+            C = connectors.DistanceDependentProbabilityConnector(d_expression="d<1.5",
+                                                                 rng=random.NumpyRNG(seed=3),
+                                                                 max_distance=1.5)
+            if not bulk:
+                C._use_bulk_connect = lambda projection: False
+            prj = sim.Projection(p, p, C, sim.StaticSynapse(delay=delay))
+            self.assertEqual(prj.size(), 298)
+            self.assertEqual(sum(evaluated), 298)
+
+
+class TestGroupByTarget(unittest.TestCase):
+
+    def test_group_by_target(self):
+        sources = np.array([0, 0, 1, 2, 2, 3])
+        targets = np.array([2, 0, 2, 0, 4, 2])
+        indptr, indices = connectors._group_by_target(sources, targets, 5)
+        assert_array_equal(indptr, [0, 2, 2, 5, 5, 6])
+        assert_array_equal(indices, [0, 2, 0, 1, 3, 2])
+        generator = connectors._csr_source_generator(indptr, indices)
+        source_lists = [list(x) for x in generator()]
+        self.assertEqual(source_lists, [[0, 2], [], [0, 1, 3], [], [2]])
+        source_lists = [list(x) for x in generator(np.array([0, 1, 1, 0, 1], dtype=bool))]
+        self.assertEqual(source_lists, [[], [0, 1, 3], [2]])
+
 
 class TestFromListConnector(unittest.TestCase):
 
@@ -480,6 +642,58 @@ class TestFromListConnector(unittest.TestCase):
                           (2, 2, 0.4, 0.15),
                           (2, 3, 0.3, 0.16)])
 
+    def test_connect_with_iterator_of_chunks(self, sim=sim):
+        chunks = [
+            np.array([(0, 0, 0.1, 0.18), (3, 0, 0.2, 0.17)]),
+            np.array([(2, 3, 0.3, 0.16), (2, 2, 0.4, 0.15), (1, 0, 0.6, 0.13)]),
+            np.array([(0, 1, 0.5, 0.14)]),
+        ]
+        C = connectors.FromListConnector(iter(chunks))
+        self.assertEqual(C.column_names, ('weight', 'delay'))
+        syn = sim.StaticSynapse()
+        prj = sim.Projection(self.p1, self.p2, C, syn)
+        self.assertEqual(sorted(prj.get(["weight", "delay"], format='list')),
+                         [(0, 0, 0.1, 0.18),
+                          (0, 1, 0.5, 0.14),
+                          (1, 0, 0.6, 0.13),
+                          (2, 2, 0.4, 0.15),
+                          (2, 3, 0.3, 0.16),
+                          (3, 0, 0.2, 0.17)])
+        # the iterator cannot be used again
+        self.assertRaises(errors.ConnectionError, sim.Projection, self.p1, self.p2, C, syn)
+
+    def test_connect_without_bulk_connect(self, sim=sim):
+        connection_list = [
+            (0, 0, 0.1, 0.18),
+            (3, 0, 0.2, 0.17),
+            (2, 3, 0.3, 0.16),
+            (2, 2, 0.4, 0.15),
+            (0, 1, 0.5, 0.14),
+        ]
+        C = connectors.FromListConnector(connection_list)
+        syn = sim.StaticSynapse()
+        orig_bulk_connect = sim.Projection._bulk_connect
+        del sim.Projection._bulk_connect
+        try:
+            prj = sim.Projection(self.p1, self.p2, C, syn)
+        finally:
+            sim.Projection._bulk_connect = orig_bulk_connect
+        self.assertEqual(prj.get(["weight", "delay"], format='list'),
+                         [(0, 0, 0.1, 0.18),
+                          (3, 0, 0.2, 0.17),
+                          (0, 1, 0.5, 0.14),
+                          (2, 2, 0.4, 0.15),
+                          (2, 3, 0.3, 0.16)])
+
+    def test_connect_with_invalid_weights(self, sim=sim):
+        connection_list = [
+            (0, 0, 0.1, 0.18),
+            (3, 0, -0.2, 0.17),
+        ]
+        C = connectors.FromListConnector(connection_list)
+        syn = sim.StaticSynapse()
+        self.assertRaises(errors.ConnectionError, sim.Projection, self.p1, self.p2, C, syn)
+
     def test_connect_with_out_of_range_index(self, sim=sim):
         connection_list = [
             (0, 0, 0.1, 0.1),
@@ -492,6 +706,16 @@ class TestFromListConnector(unittest.TestCase):
         syn = sim.StaticSynapse()
         self.assertRaises(errors.ConnectionError, sim.Projection, self.p1, self.p2, C, syn)
 
+    def test_connect_with_out_of_range_target_index(self, sim=sim):
+        connection_list = [
+            (0, 0, 0.1, 0.1),
+            (2, 3, 0.3, 0.12),
+            (1, 7, 0.4, 0.13),  # NON-EXISTENT
+        ]
+        C = connectors.FromListConnector(connection_list)
+        syn = sim.StaticSynapse()
+        self.assertRaises(errors.ConnectionError, sim.Projection, self.p1, self.p2, C, syn)
+
     def test_with_plastic_synapse(self, sim=sim):
         connection_list = [
             (0, 0, 0.1, 0.1, 100, 400),
@@ -738,7 +962,8 @@ class TestFixedNumberPreConnector(unittest.TestCase):
 
     def test_with_replacement_no_self_connections(self, sim=sim):
         C = connectors.FixedNumberPreConnector(n=3, with_replacement=True,
-                                               allow_self_connections=False, rng=MockRNG(start=2, delta=1))
+                                               allow_self_connections=False,
+                                               rng=MockRNG(start=2, delta=1, rejection_sampling=True))
         syn = sim.StaticSynapse()
         prj = sim.Projection(self.p2, self.p2, C, syn)
         self.assertEqual(prj.get(["weight", "delay"], format='list'),
@@ -761,6 +986,43 @@ class TestFixedNumberPreConnector(unittest.TestCase):
                           (3, 4, 0.0, 0.123),
                           ])
 
+    def test_with_replacement_no_self_connections_no_redraws(self, sim=sim):
+        C = connectors.FixedNumberPreConnector(n=3, with_replacement=True,
+                                               allow_self_connections=False, rng=MockRNG(start=2, delta=1))
+        syn = sim.StaticSynapse()
+        prj = sim.Projection(self.p2, self.p2, C, syn)
+        # values are drawn from range(4), then those >= the target index are incremented
+        self.assertEqual(prj.get(["weight", "delay"], format='list'),
+                         [(3, 0, 0.0, 0.123),  # [2, 3, 0] --> [3, 4, 1]
+                          (4, 0, 0.0, 0.123),
+                          (1, 0, 0.0, 0.123),
+                          (2, 1, 0.0, 0.123),  # [1, 2, 3] --> [2, 3, 4]
+                          (3, 1, 0.0, 0.123),
+                          (4, 1, 0.0, 0.123),
+                          (0, 2, 0.0, 0.123),  # [0, 1, 2] --> [0, 1, 3]
+                          (1, 2, 0.0, 0.123),
+                          (3, 2, 0.0, 0.123),
+                          (4, 3, 0.0, 0.123),  # [3, 0, 1] --> [4, 0, 1]
+                          (0, 3, 0.0, 0.123),
+                          (1, 3, 0.0, 0.123),
+                          (2, 4, 0.0, 0.123),  # [2, 3, 0] --> [2, 3, 0]
+                          (3, 4, 0.0, 0.123),
+                          (0, 4, 0.0, 0.123),
+                          ])
+
+    def test_with_replacement_no_self_connections_single_neuron(self, sim=sim):
+        p = sim.Population(1, sim.IF_cond_exp())
+        for rejection_sampling in (False, True):
+            rng = MockRNG(delta=1, rejection_sampling=rejection_sampling)
+            C = connectors.FixedNumberPreConnector(n=1, with_replacement=True,
+                                                   allow_self_connections=False, rng=rng)
+            self.assertRaises(errors.ConnectionError,
+                              sim.Projection, p, p, C, sim.StaticSynapse())
+            C = connectors.FixedNumberPreConnector(n=0, with_replacement=True,
+                                                   allow_self_connections=False, rng=rng)
+            prj = sim.Projection(p, p, C, sim.StaticSynapse())
+            self.assertEqual(prj.size(), 0)
+
     # TOCHECK
 
     def test_no_replacement_no_self_connections(self, sim=sim):
@@ -923,6 +1185,17 @@ class TestCloneConnector(unittest.TestCase):
                           (2, 2, 5.0, 0.5),
                           (2, 3, 5.0, 0.5)])
 
+    def test_connect_with_multiple_synapses(self, sim=sim):
+        ref_prj = sim.Projection(self.p1, self.p2,
+                                 connectors.FromListConnector([(1, 2), (1, 2), (3, 2)]),
+                                 sim.StaticSynapse())
+        C = connectors.CloneConnector(ref_prj)
+        prj = sim.Projection(self.p1, self.p2, C, sim.StaticSynapse(weight=5.0, delay=0.5))
+        self.assertEqual(prj.get(["weight", "delay"], format='list'),
+                         [(1, 2, 5.0, 0.5),
+                          (1, 2, 5.0, 0.5),
+                          (3, 2, 5.0, 0.5)])
+
     def test_connect_with_pre_post_mismatch(self, sim=sim):
         syn = sim.StaticSynapse()
         C = connectors.CloneConnector(self.ref_prj)
@@ -1064,5 +1337,103 @@ class TestFixedTotalNumberConnector(unittest.TestCase):
         self.assertEqual(len(connections), 12)
 
 
+class TestCachedConnector(unittest.TestCase):
+
+    def setUp(self, sim=sim):
+        sim.setup(min_delay=0.123)
+        self.p1 = sim.Population(9, sim.IF_cond_exp(), structure=space.Line())
+        self.p2 = sim.Population(7, sim.HH_cond_exp(), structure=space.Line())
+        self.cache_dir = "test_connectivity_cache"
+        self.cache = connectors.ConnectivityCache(self.cache_dir)
+
+    def tearDown(self, sim=sim):
+        sim.end()
+        self.cache.clear()
+        os.rmdir(self.cache_dir)
+
+    def build(self, seed=876, connector_class=connectors.FixedProbabilityConnector,
+              rng_class=random.NumpyRNG):
+        rng = rng_class(seed=seed)
+        C = connectors.CachedConnector(connector_class(0.5, rng=rng), self.cache)
+        syn = sim.StaticSynapse(weight="0.1*d")
+        prj = sim.Projection(self.p1, self.p2, C, syn)
+        return prj, rng
+
+    def test_cache_hit(self):
+        prj1, rng1 = self.build()
+        self.assertEqual(len(os.listdir(self.cache_dir)), 1)
+        with unittest.mock.patch.object(connectors.FixedProbabilityConnector,
+                                        "connect") as connect:
+            prj2, rng2 = self.build()
+        connect.assert_not_called()
+        self.assertEqual(prj2.get("weight", format="list"), prj1.get("weight", format="list"))
+        # the RNG is left in the same state as if the connector had been run
+        self.assertEqual(rng2.next(), rng1.next())
+
+    def test_cache_hit_with_generator_rng(self):
+        prj1, rng1 = self.build(rng_class=random.GeneratorRNG)
+        prj2, rng2 = self.build(rng_class=random.GeneratorRNG)
+        self.assertEqual(len(os.listdir(self.cache_dir)), 1)
+        self.assertEqual(prj2.get("weight", format="list"), prj1.get("weight", format="list"))
+        self.assertEqual(rng2.next(), rng1.next())
+
+    def test_cache_miss_with_different_seed(self):
+        prj1, rng1 = self.build(seed=876)
+        prj2, rng2 = self.build(seed=877)
+        self.assertEqual(len(os.listdir(self.cache_dir)), 2)
+        self.assertNotEqual(prj2.get("weight", format="list"), prj1.get("weight", format="list"))
+
+    def test_eviction(self):
+        prj1, rng1 = self.build(seed=876)
+        entry_size = self.cache.size()
+        self.cache.max_size = int(1.5 * entry_size)
+        prj2, rng2 = self.build(seed=877)
+        self.assertEqual(len(os.listdir(self.cache_dir)), 1)
+        self.assertLessEqual(self.cache.size(), self.cache.max_size)
+
+    def test_cache_miss_with_different_sampling(self):
+        connections = []
+        for with_replacement in (False, True):
+            C = connectors.CachedConnector(
+                connectors.FixedNumberPostConnector(5, with_replacement=with_replacement,
+                                                    rng=random.NumpyRNG(seed=876)),
+                self.cache)
+            prj = sim.Projection(self.p1, self.p2, C, sim.StaticSynapse())
+            connections.append(prj.get("weight", format="list"))
+        self.assertEqual(len(os.listdir(self.cache_dir)), 2)
+        self.assertNotEqual(connections[0], connections[1])
+
+    def test_function_not_cached(self):
+
+        class Probability(connectors.IndexBasedExpression):
+            def __init__(self, function):
+                self.function = function
+
+            def __call__(self, i, j):
+                return self.function(i, j)
+
+        connector = connectors.IndexBasedProbabilityConnector(
+            Probability(lambda i, j: 0.5 * (i > j)), rng=random.NumpyRNG(seed=876))
+        self.assertRaises(ValueError, connectors.CachedConnector, connector, self.cache)
+
+    def test_from_list_not_cached(self):
+        C = connectors.CachedConnector(
+            connectors.FromListConnector([(0, 0, 0.5, 0.7)], column_names=["weight", "delay"]),
+            self.cache)
+        prj = sim.Projection(self.p1, self.p2, C, sim.StaticSynapse())
+        self.assertEqual(os.listdir(self.cache_dir), [])
+        self.assertEqual(prj.get(["weight", "delay"], format="list"), [(0, 0, 0.5, 0.7)])
+
+    def test_unseeded_rng_not_cached(self):
+        self.assertRaises(ValueError, connectors.CachedConnector,
+                          connectors.FixedProbabilityConnector(0.5, rng=random.NumpyRNG()),
+                          self.cache)
+        # the RNG of a random distribution used as a parameter also needs a seed
+        n = random.RandomDistribution('poisson', lambda_=3, rng=random.NumpyRNG())
+        self.assertRaises(ValueError, connectors.CachedConnector,
+                          connectors.FixedNumberPostConnector(n, rng=random.NumpyRNG(seed=876)),
+                          self.cache)
+
+
 if __name__ == "__main__":
     unittest.main()
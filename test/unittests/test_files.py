@@ -89,6 +89,25 @@ def test_PickleFile():
 #    os.remove("tmp.npz")
 
 
+def test_NumpyMemmapFile():
+    nmf = files.NumpyMemmapFile("tmp.npym", "wb")
+    data = [(0, 2, 0.1), (1, 0, 0.2), (2, 2, 0.3), (3, 1, 0.4), (4, 0, 0.5)]
+    metadata = {'columns': ['i', 'j', 'weight'], 'b': 9.99}
+    nmf.write(data, metadata)
+    nmf.close()
+
+    nmf = files.NumpyMemmapFile("tmp.npym", "rb")
+    assert nmf.get_metadata() == metadata
+    # rows are sorted by target
+    assert_array_equal(nmf.read()[:, 0], [1, 4, 3, 0, 2])
+    assert_array_equal(nmf.read_targets(np.array([0, 2])),
+                       [(1, 0, 0.2), (4, 0, 0.5), (0, 2, 0.1), (2, 2, 0.3)])
+    assert nmf.read_targets(np.array([5])).shape == (0, 3)
+    nmf.close()
+
+    os.remove("tmp.npym")
+
+
 def test_HDF5ArrayFile():
     if files.have_hdf5:
         h5f = files.HDF5ArrayFile("tmp.h5", "w")
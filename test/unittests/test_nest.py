@@ -4,11 +4,29 @@ try:
 except ImportError:
     nest = False
 from pyNN.standardmodels import StandardCellType
+from pyNN.parameters import ParameterSpace
+from functools import partial
+import importlib
+import sys
 import unittest
+from unittest.mock import MagicMock, Mock, patch
 import numpy as np
 from numpy.testing import assert_array_equal, assert_array_almost_equal
 
 
+def import_nest_module(name):
+    """
+    Import a module of pyNN.nest, e.g. "connectors". If NEST is not installed,
+    it is replaced by a mock while importing, so that the parts of the module
+    which only prepare the arguments of NEST calls can still be tested.
+    """
+    if nest:
+        return importlib.import_module("pyNN.nest." + name)
+    mock_nest = MagicMock(__path__=[])
+    with patch.dict(sys.modules, {"nest": mock_nest, "nest.random": mock_nest.random}):
+        return importlib.import_module("pyNN.nest." + name)
+
+
 @unittest.skipUnless(nest, "Requires NEST")
 class TestFunctions(unittest.TestCase):
 
@@ -60,6 +78,17 @@ class TestPopulation(unittest.TestCase):
                                   decimal=12)
         self.assertEqual(ps['E_ex'], 0.0)
 
+    def test_lazy_ids(self):
+        p = sim.Population(5, sim.IF_cond_exp())
+        self.assertIsNone(p._all_cells)
+        cell = p[3]
+        self.assertIs(cell.parent, p)
+        self.assertEqual(cell.node_collection.tolist(), [int(cell)])
+        self.assertEqual(p[-1], p.last_id)
+        assert_array_equal(p._all_ids, p.node_collection.tolist())
+        self.assertIs(p.all_cells[3], cell)
+        self.assertEqual(p.all_cells.tolist(), p.node_collection.tolist())
+
     def test_set_parameters(self):
         self.p.set(tau_m=[15.] * self.p.size)
 
@@ -170,6 +199,52 @@ class TestProjection(unittest.TestCase):
         prj.set(weight=weight_array)
         self.assertTrue((weight_array == prj.get("weight", format="array")).all())
 
+    def test_bulk_connect_random_weights(self):
+        connector = sim.AllToAllConnector()
+        connector.max_block_elements = 10
+        weights = np.arange(0.1, 0.1 * (7 * 4 + 1), 0.1)[:28].reshape((7, 4))
+        prj = sim.Projection(self.p1, self.p2, connector,
+                             synapse_type=sim.StaticSynapse(weight=weights, delay=0.5))
+        self.assertEqual(prj.size(), 28)
+        assert_array_almost_equal(prj.get("weight", format="array"), weights)
+
+    def test_native_one_to_one(self):
+        syn = sim.StaticSynapse(weight=sim.RandomDistribution('uniform', (0.1, 0.2),
+                                                              rng=sim.NativeRNG()))
+        prj = sim.Projection(self.p1, self.p1, sim.OneToOneConnector(), synapse_type=syn)
+        connections = prj.get("weight", format="list")
+        self.assertEqual([(i, j) for i, j, w in connections], [(i, i) for i in range(7)])
+
+    def test_native_fixed_number_pre(self):
+        connector = sim.FixedNumberPreConnector(3, rng=sim.NativeRNG())
+        prj = sim.Projection(self.p1, self.p2, connector, synapse_type=self.syn_rnd)
+        assert_array_equal(np.isfinite(prj.get("weight", format="array")).sum(axis=0),
+                           [3, 3, 3, 3])
+
+    def test_native_fixed_number_post(self):
+        connector = sim.FixedNumberPostConnector(2, rng=sim.NativeRNG())
+        prj = sim.Projection(self.p1, self.p2, connector, synapse_type=self.syn_rnd)
+        assert_array_equal(np.isfinite(prj.get("weight", format="array")).sum(axis=1),
+                           [2] * 7)
+
+    def test_native_fixed_total_number(self):
+        connector = sim.FixedTotalNumberConnector(10, with_replacement=False,
+                                                  rng=sim.NativeRNG())
+        prj = sim.Projection(self.p1, self.p2, connector, synapse_type=self.syn_rnd)
+        self.assertEqual(prj.size(), 10)
+
+    def test_native_fixed_number_no_self_connections(self):
+        connector = sim.FixedNumberPreConnector(6, allow_self_connections=False,
+                                                rng=sim.NativeRNG())
+        prj = sim.Projection(self.p1, self.p1, connector, synapse_type=self.syn_rnd)
+        self.assertTrue(np.isnan(prj.get("weight", format="array").diagonal()).all())
+
+    def test_native_fixed_number_random_n(self):
+        n = sim.RandomDistribution('binomial', (4, 0.5))
+        connector = sim.FixedNumberPreConnector(n, rng=sim.NativeRNG())
+        self.assertRaises(NotImplementedError, sim.Projection,
+                          self.p1, self.p2, connector, synapse_type=self.syn_rnd)
+
     def test_stdp_set_tau_minus(self):
         """cf https://github.com/NeuralEnsemble/PyNN/issues/423"""
         intended_tau_minus = 18.9
@@ -184,5 +259,72 @@ class TestProjection(unittest.TestCase):
         self.assertEqual(intended_tau_minus, actual_tau_minus)
 
 
+class TestNativeConnect(unittest.TestCase):
+    """Tests of the native connection paths which do not need NEST itself."""
+
+    def setUp(self):
+        self.connectors = import_nest_module("connectors")
+        self.projection = Mock(nest_synapse_model="static_synapse",
+                               receptor_type="inhibitory")
+        self.projection.pre.size = self.projection.post.size = 3
+        self.projection.post.conductance_based = True
+
+    def parameter_space(self, **parameters):
+        return ParameterSpace(parameters, shape=(3, 3))
+
+    def test_one_to_one_one_value_per_connection(self):
+        C = self.connectors.OneToOneConnector()
+        weights = np.arange(9.0).reshape((3, 3))
+        with patch.object(C, "_parameters_from_synapse_type",
+                          return_value=self.parameter_space(weight=weights, delay=0.5)):
+            C.native_connect(self.projection)
+        rule_params, syn_params = self.projection._connect.call_args[0]
+        self.assertEqual(rule_params["rule"], "one_to_one")
+        # inhibitory conductances are given to NEST as negative weights
+        assert_array_equal(syn_params["weight"], [-0.0, -4.0, -8.0])
+        self.assertEqual(syn_params["delay"], 0.5)
+
+    def test_fixed_number_post_inhibitory_conductance(self):
+        C = self.connectors.FixedNumberPostConnector(2)
+        with patch.object(C, "_parameters_from_synapse_type",
+                          return_value=self.parameter_space(weight=0.2, delay=0.5)):
+            C.native_connect(self.projection)
+        rule_params, syn_params = self.projection._connect.call_args[0]
+        self.assertEqual(rule_params["rule"], "fixed_outdegree")
+        self.assertEqual(rule_params["outdegree"], 2)
+        self.assertEqual(syn_params["weight"], -0.2)
+
+
+class TestBulkConnect(unittest.TestCase):
+    """Tests of the arguments of the array-based nest.Connect calls, which do not need NEST."""
+
+    def setUp(self):
+        self.projections = import_nest_module("projections")
+        prj = Mock(nest_synapse_model="static_synapse", nest_synapse_label=7,
+                   receptor_type="AMPA", _common_synapse_property_names=[])
+        prj._presynaptic_node_ids = np.arange(1, 5)
+        prj._postsynaptic_node_ids = np.arange(11, 15)
+        prj.post.celltype.standard_receptor_type = False
+        prj.post.celltype.get_receptor_type.return_value = 3
+        prj._postsynaptic_synapse_parameters = partial(
+            self.projections.Projection._postsynaptic_synapse_parameters, prj)
+        self.projection = prj
+
+    def test_non_standard_receptor_type(self):
+        with patch.object(self.projections, "nest") as mock_nest:
+            self.projections.Projection._bulk_connect(
+                self.projection, np.array([0, 1, 3]), np.array([2, 2, 0]),
+                weight=np.array([0.1, 0.2, 0.3]), delay=0.5)
+        sources, targets, rule, syn_spec = mock_nest.Connect.call_args[0]
+        assert_array_equal(sources, [1, 2, 4])
+        assert_array_equal(targets, [13, 13, 11])
+        self.assertEqual(rule, "one_to_one")
+        assert_array_equal(syn_spec["receptor_type"], [3, 3, 3])
+        assert_array_equal(syn_spec["weight"], [0.1, 0.2, 0.3])
+        assert_array_equal(syn_spec["delay"], [0.5, 0.5, 0.5])
+        self.assertEqual(syn_spec["synapse_model"], "static_synapse")
+        self.assertEqual(syn_spec["synapse_label"], 7)
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -172,6 +172,49 @@ def test_columnwise_iteration_with_random_array_parallel_safe_with_mask():
     random.get_mpi_config = orig_get_mpi_config
 
 
+def test_columnwise_block_iteration_with_function():
+    def input(i, j): return 2 * i + j
+    m = LazyArray(input, shape=(4, 5))
+    blocks = [block for block in m.by_column_block(2)]
+    assert len(blocks) == 3
+    assert_array_equal(blocks[0][0], np.array([0, 1]))
+    assert_array_equal(blocks[2][0], np.array([4]))
+    assert_array_equal(np.hstack([block for cols, block in blocks]), m.evaluate())
+
+
+def test_columnwise_block_iteration_with_flat_array_and_mask():
+    m = LazyArray(5, shape=(4, 3))
+    mask = np.array([True, False, True])
+    blocks = [block for block in m.by_column_block(2, mask=mask)]
+    assert len(blocks) == 1
+    assert_array_equal(blocks[0][0], np.array([0, 2]))
+    assert blocks[0][1] == 5
+
+
+def test_columnwise_block_iteration_matches_columnwise_iteration_with_random_array():
+    input = random.RandomDistribution('uniform', (0, 1), rng=MockRNG(parallel_safe=True))
+    m = LazyArray(input, shape=(4, 5)) < 7
+    cols = [col for col in m.by_column()]
+
+    input = random.RandomDistribution('uniform', (0, 1), rng=MockRNG(parallel_safe=True))
+    m = LazyArray(input, shape=(4, 5)) < 7
+    blocks = [block for cols, block in m.by_column_block(3)]
+    assert_array_equal(np.hstack(blocks), np.array(cols).T)
+
+
+def test_columnwise_block_iteration_with_random_array_parallel_safe_with_mask():
+    mask = np.array([False, True, False, True, True])
+    input = random.RandomDistribution('uniform', (0, 1), rng=MockRNG(parallel_safe=True))
+    m = LazyArray(input, shape=(4, 5))
+    cols = [col for col in m.by_column(mask=mask)]
+
+    input = random.RandomDistribution('uniform', (0, 1), rng=MockRNG(parallel_safe=True))
+    m = LazyArray(input, shape=(4, 5))
+    blocks = [block for block in m.by_column_block(2, mask=mask)]
+    assert_array_equal(np.hstack([cols for cols, block in blocks]), np.array([1, 3, 4]))
+    assert_array_equal(np.hstack([block for cols, block in blocks]), np.array(cols).T)
+
+
 def test_evaluate_with_flat_array():
     m = LazyArray(5, shape=(4, 3))
     assert_array_equal(m.evaluate(), 5 * np.ones((4, 3)))
@@ -100,7 +100,23 @@ class PopulationTest(unittest.TestCase):
         p = sim.Population(11, sim.IF_curr_alpha())
         self.assertRaises(ValueError, p.id_to_index, [p.first_id - 1] + p.all_cells[0:3].tolist())
 
-    # def test_id_to_local_index():
+    def test_id_to_local_index(self, sim=sim):
+        p = sim.Population(11, sim.IF_curr_alpha())
+        self.assertEqual(p.id_to_local_index(p[7]), 7)
+        assert_array_equal(p.id_to_local_index(p.all_cells[3:6]), np.arange(3, 6))
+
+    def test_id_to_local_index_distributed(self, sim=sim):
+        state = sim.simulator.state
+        self.addCleanup(setattr, state, "num_processes", state.num_processes)
+        self.addCleanup(setattr, state, "mpi_rank", state.mpi_rank)
+        state.num_processes = 2
+        state.mpi_rank = 1
+        p = sim.Population(11, sim.IF_curr_alpha())
+        local_ids = p.local_cells
+        self.assertEqual(p.id_to_local_index(local_ids[3]), 3)
+        assert_array_equal(p.id_to_local_index(local_ids[1:4]), np.arange(1, 4))
+        non_local = p[int(np.flatnonzero(~p._mask_local)[0])]
+        self.assertRaises(errors.NotLocalError, p.id_to_local_index, non_local)
 
     # test structure property
 
@@ -152,6 +168,39 @@ class PopulationTest(unittest.TestCase):
         self.assertRaises(IndexError, p.__getitem__, 12)
         self.assertEqual(p[-1], p[11])
 
+    def test_ids_created_lazily(self, sim=sim):
+        p = sim.Population(10, sim.IF_cond_exp())
+        self.assertIsNone(p._all_cells)
+        self.assertEqual(p._all_ids.dtype, np.int64)
+        cell = p[3]
+        self.assertIs(cell.parent, p)
+        self.assertIs(p[3], cell)
+        pv = p[2:6]
+        self.assertIs(pv[1], cell)
+        assert_array_equal(pv._all_ids, p._all_ids[2:6])
+        self.assertIsNone(p._all_cells)
+        self.assertIs(p.all_cells[3], cell)
+        assert_array_equal(p.all_cells.astype(np.int64), p._all_ids)
+
+    def test_id_cache_is_bounded(self, sim=sim):
+        p = sim.Population(10, sim.IF_cond_exp())
+        p.max_cached_ids = 3
+        for i in range(8):
+            p[i]
+        self.assertEqual(list(p._cell_ids), [5, 6, 7])
+        self.assertEqual(p[2], p._all_ids[2])
+        self.assertEqual(list(p._cell_ids), [6, 7, 2])
+
+    def test_local_cells_cached(self, sim=sim):
+        p = sim.Population(10, sim.IF_cond_exp())
+        local_cells = p.local_cells
+        self.assertIs(p.local_cells, local_cells)
+        self.assertIs(p[int(np.flatnonzero(p._mask_local)[-1])], local_cells[-1])
+        pv = p[2:6]
+        self.assertIs(pv.all_cells, pv.all_cells)
+        self.assertIs(pv.local_cells, pv.local_cells)
+        self.assertIs(pv.local_cells[0], local_cells[2])
+
     def test__getitem__slice(self, sim=sim):
         # Should return a PopulationView with the correct parent and value
         # of all_cells
@@ -258,6 +307,34 @@ class PopulationTest(unittest.TestCase):
         self.assertAlmostEqual(tau_m, 12.3)
         assert_array_almost_equal(tau_syn_I, np.array([0.5, 0.6, 0.7, 0.8]), decimal=12)
 
+    def test_get_params_with_gather_distributed(self, sim=sim):
+        sim.simulator.state.num_processes = 2
+        sim.simulator.state.mpi_rank = 0
+        p = sim.Population(4, sim.IF_cond_exp(tau_m=12.3,
+                                              tau_syn_E=[0.987, 0.988, 0.989, 0.990],
+                                              i_offset=lambda i: -0.2 * i))
+        local_indices = np.flatnonzero(p._mask_local)
+        other_indices = np.flatnonzero(~p._mask_local)
+        # the (fake) other MPI node has different values of tau_m.
+        # Parameters are gathered in alphabetical order
+        other_columns = (other_indices, [0.5, 0.5], [9.0, 9.0], 0.1 + other_indices)
+
+        def mock_gather_columns(columns, all=False):
+            assert_array_equal(columns[0], local_indices)
+            return [np.hstack((column, other)) for column, other in zip(columns, other_columns)]
+
+        with patch("pyNN.recording.gather_columns", side_effect=mock_gather_columns):
+            tau_syn_E, tau_m, i_offset = p.get(('tau_syn_E', 'tau_m', 'i_offset'), gather=True)
+        sim.simulator.state.num_processes = 1
+        sim.simulator.state.mpi_rank = 0
+        expected_tau_m = np.full((4,), 9.0)
+        expected_tau_m[local_indices] = 12.3
+        expected_tau_syn_E = np.array([0.987, 0.988, 0.989, 0.990])
+        expected_tau_syn_E[other_indices] = 0.1 + other_indices
+        assert_array_almost_equal(tau_m, expected_tau_m)
+        assert_array_almost_equal(tau_syn_E, expected_tau_syn_E)
+        self.assertEqual(i_offset.shape, (4,))
+
     def test_get_multiple_params_no_gather(self, sim=sim):
         sim.simulator.state.num_processes = 2
         sim.simulator.state.mpi_rank = 1
@@ -16,8 +16,9 @@ from unittest.mock import Mock, patch
 from .mocks import MockRNG
 import pyNN.mock as sim
 
-from pyNN import random, errors, space, standardmodels
+from pyNN import random, errors, space, standardmodels, recording
 from pyNN.parameters import Sequence
+from pyNN.common.projections import CSRMatrix, Projection as CommonProjection
 
 
 def _sort_by_column(A, col):
@@ -192,6 +193,129 @@ class ProjectionTest(unittest.TestCase):
         weights = prj.get("weight", format="array", gather=False, multiple_synapses='min')
         assert_array_equal(weights, target)
 
+    def test_get_weights_as_array_multiple_synapses_options(self, sim=sim):
+        C = sim.FromListConnector([(0, 1, 0.2), (2, 3, 0.5), (0, 1, 0.1), (0, 1, 0.3)],
+                                  column_names=["weight"])
+        prj = sim.Projection(self.p1, self.p2, C, synapse_type=self.syn2)
+        for multiple_synapses, expected in (('sum', 0.6), ('min', 0.1), ('max', 0.3),
+                                            ('first', 0.2), ('last', 0.3)):
+            weights = prj.get("weight", format="array", gather=False,
+                              multiple_synapses=multiple_synapses)
+            self.assertAlmostEqual(weights[0, 1], expected)
+            self.assertEqual(weights[2, 3], 0.5)
+            self.assertEqual(np.isnan(weights).sum(), self.p1.size * self.p2.size - 2)
+
+    def test_get_weights_as_array_with_gather(self, sim=sim):
+        prj = sim.Projection(self.p1, self.p2, connector=self.all2all, synapse_type=self.syn2)
+        orig_num_processes = prj._simulator.state.num_processes
+        prj._simulator.state.num_processes = 2
+        # pretend another node has a second connection from 6 to 3, with weight 0.5
+        with patch("pyNN.recording.gather_columns",
+                   side_effect=lambda columns, all: [np.hstack((c, [x]))
+                                                     for c, x in zip(columns, (6, 3, 0.5))]):
+            weights = prj.get("weight", format="array", gather=True)
+        prj._simulator.state.num_processes = orig_num_processes
+        self.assertAlmostEqual(weights[6, 3], 0.507)
+        self.assertEqual(weights[6, 2], 0.007)
+
+    def test_get_weights_as_sparse(self, sim=sim):
+        C = sim.FixedNumberPreConnector(n=7, rng=MockRNG(delta=1))
+        prj = sim.Projection(self.p2, self.p3, C, synapse_type=self.syn1)
+        for multiple_synapses in ('sum', 'min', 'first'):
+            dense = prj.get("weight", format="array", gather=False,
+                            multiple_synapses=multiple_synapses)
+            weights, delays = prj.get(["weight", "delay"], format="sparse", gather=False,
+                                      multiple_synapses=multiple_synapses)
+            self.assertEqual(weights.shape, (self.p2.size, self.p3.size))
+            self.assertEqual(weights.nnz, 20)
+            assert_array_equal(weights.toarray(), dense)
+        self.assertEqual(delays.toarray().max(), 0.5)
+
+    def test_get_weights_as_sparse_without_scipy(self, sim=sim):
+        # connections with zero weight are still stored
+        C = sim.FromListConnector([(0, 0, 0.007), (1, 1, 0.007), (2, 2, 0.007), (3, 3, 0.0)],
+                                  column_names=["weight"])
+        prj = sim.Projection(self.p1, self.p2, C, synapse_type=self.syn2)
+        with patch.dict(sys.modules, {"scipy.sparse": None}):
+            weights = prj.get("weight", format="sparse", gather=False)
+        self.assertIsInstance(weights, CSRMatrix)
+        assert_array_equal(weights.indptr, [0, 1, 2, 3, 4, 4, 4, 4])
+        assert_array_equal(weights.indices, [0, 1, 2, 3])
+        assert_array_equal(weights.data, [0.007, 0.007, 0.007, 0.0])
+        self.assertTrue(np.isnan(weights.toarray(fill_value=np.nan)[4, 0]))
+
+    def test_get_weights_as_sparse_with_gather(self, sim=sim):
+        prj = sim.Projection(self.p1, self.p2, connector=self.all2all, synapse_type=self.syn2)
+        orig_num_processes = prj._simulator.state.num_processes
+        prj._simulator.state.num_processes = 2
+        # pretend another node has a single connection from 6 to 3, with weight 0.5
+        with patch("pyNN.recording.gather_columns",
+                   side_effect=lambda columns, all: [np.hstack((c, [x]))
+                                                     for c, x in zip(columns, (6, 3, 0.5))]):
+            weights = prj.get("weight", format="sparse", gather=True, multiple_synapses="max")
+        prj._simulator.state.num_processes = orig_num_processes
+        self.assertEqual(weights[6, 3], 0.5)
+        self.assertEqual(weights[6, 2], 0.007)
+
+    def test_get_as_columns(self, sim=sim):
+        prj = sim.Projection(self.p1, self.p2, connector=self.all2all, synapse_type=self.syn2)
+        columns = prj.get(["weight", "delay"], format="columns", gather=False)
+        self.assertEqual(list(columns), ["presynaptic_index", "postsynaptic_index",
+                                         "weight", "delay"])
+        self.assertEqual(columns["presynaptic_index"].dtype.kind, "i")
+        assert_array_equal(np.column_stack(list(columns.values())),
+                           np.array(prj.get(["weight", "delay"], format="list", gather=False)))
+        columns = prj.get("weight", format="columns", gather=False, with_address=False)
+        self.assertEqual(list(columns), ["weight"])
+        assert_array_equal(columns["weight"], 0.007 * np.ones((28,)))
+
+    def test_get_as_structured_array(self, sim=sim):
+        prj = sim.Projection(self.p1, self.p2, connector=self.all2all, synapse_type=self.syn2)
+        connections = prj.get(["weight", "delay"], format="structured", gather=False)
+        self.assertEqual(connections.dtype.names,
+                         ("presynaptic_index", "postsynaptic_index", "weight", "delay"))
+        self.assertEqual(connections.shape, (28,))
+        assert_array_equal(np.sort(connections[connections["postsynaptic_index"] == 2]
+                                   ["presynaptic_index"]),
+                           np.arange(7))
+        assert_array_equal(connections["delay"], 0.4 * np.ones((28,)))
+
+    def test_get_as_columns_without_connection_objects(self, sim=sim):
+        prj = sim.Projection(self.p1, self.p2, connector=self.all2all, synapse_type=self.syn2)
+        expected = np.array(prj.get(["weight", "delay"], format="list", gather=False))
+        with patch.object(prj, "_get_attributes_as_list", side_effect=AssertionError):
+            columns = prj.get(["weight", "delay"], format="columns", gather=False)
+        assert_array_equal(np.column_stack(list(columns.values())), expected)
+        self.assertEqual(columns["postsynaptic_index"].dtype.kind, "i")
+
+    def test_common_get_attributes_as_columns_keeps_integer_indices(self, sim=sim):
+        prj = sim.Projection(self.p1, self.p2, connector=self.all2all, synapse_type=self.syn2)
+        names = ["presynaptic_index", "postsynaptic_index", "weight"]
+        big_index = 2**53 + 1  # not representable as a float
+        with patch.object(prj, "_get_attributes_as_list",
+                          return_value=[(big_index, 3, 0.5)]):
+            columns = CommonProjection._get_attributes_as_columns(prj, names)
+        self.assertEqual(columns[0][0], big_index)
+        self.assertEqual([column.dtype.kind for column in columns], ["i", "i", "f"])
+        with patch.object(prj, "_get_attributes_as_list", return_value=[]):
+            columns = CommonProjection._get_attributes_as_columns(prj, names)
+        self.assertEqual([column.dtype.kind for column in columns], ["i", "i", "f"])
+        self.assertEqual([column.size for column in columns], [0, 0, 0])
+
+    def test_get_as_structured_array_with_gather(self, sim=sim):
+        prj = sim.Projection(self.p1, self.p2, connector=self.all2all, synapse_type=self.syn2)
+        orig_num_processes = prj._simulator.state.num_processes
+        prj._simulator.state.num_processes = 2
+        # pretend another node has a single connection from 6 to 3, with weight 0.5
+        with patch("pyNN.recording.gather_columns",
+                   side_effect=lambda columns, all: [np.hstack((c, np.array([x], dtype=c.dtype)))
+                                                     for c, x in zip(columns, (6, 3, 0.5))]):
+            connections = prj.get("weight", format="structured", gather=True)
+        prj._simulator.state.num_processes = orig_num_processes
+        self.assertEqual(connections.shape, (29,))
+        self.assertEqual(tuple(connections[-1]), (6, 3, 0.5))
+        self.assertEqual(connections["presynaptic_index"].dtype.kind, "i")
+
     def test_synapse_with_lambda_parameter(self, sim=sim):
         syn = sim.StaticSynapse(weight=lambda d: 0.01 + 0.001 * d)
         prj = sim.Projection(self.p1, self.p2, self.all2all, synapse_type=syn)
@@ -252,6 +376,25 @@ class ProjectionTest(unittest.TestCase):
         assert os.path.exists(filename)
         os.remove(filename)
 
+    def test_save_connections_as_memmap_file(self, sim=sim):
+        filename = "test.connections"
+        if os.path.exists(filename):
+            os.remove(filename)
+        prj = sim.Projection(self.p1, self.p2, connector=self.all2all, synapse_type=self.syn3)
+        prj.save('connections', recording.files.NumpyMemmapFile(filename, mode='wb'),
+                 gather=True)
+        file = recording.files.NumpyMemmapFile(filename, mode='rb')
+        self.assertEqual(file.get_metadata()["columns"][:2], ["i", "j"])
+        self.assertEqual(file.read().shape, (len(prj), len(file.get_metadata()["columns"])))
+        file.close()
+        prj2 = sim.Projection(self.p1, self.p2,
+                              connector=sim.FromFileConnector(
+                                  recording.files.NumpyMemmapFile(filename, mode='rb')),
+                              synapse_type=self.syn3)
+        assert_array_equal(prj2.get("weight", format="array"),
+                           prj.get("weight", format="array"))
+        os.remove(filename)
+
     # def test_print_weights_as_list(self, sim=sim):
     #    filename = "test.weights"
     #    if os.path.exists(filename):
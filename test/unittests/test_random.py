@@ -3,6 +3,8 @@ Unit tests for pyNN/random.py.
 """
 
 import unittest
+from unittest.mock import patch
+from copy import deepcopy
 import numpy as np
 from numpy.testing import assert_allclose
 
@@ -21,7 +23,8 @@ class SimpleTests(unittest.TestCase):
     """Simple tests on a single RNG function."""
 
     def setUp(self):
-        self.rnglist = [random.NumpyRNG(seed=987)]
+        self.rnglist = [random.NumpyRNG(seed=987), random.GeneratorRNG(seed=765),
+                        random.PhiloxRNG(seed=876)]
         for rng in self.rnglist:
             rng.mpi_rank = 0
             rng.num_processes = 1
@@ -67,7 +70,7 @@ class SimpleTests(unittest.TestCase):
 class ParallelTests(unittest.TestCase):
 
     def setUp(self):
-        self.rng_types = [random.NumpyRNG]
+        self.rng_types = [random.NumpyRNG, random.PhiloxRNG]
         if random.have_gsl:
             self.rng_types.append(random.GSLRNG)
         if have_nrn:
@@ -155,6 +158,179 @@ class ParallelTests(unittest.TestCase):
         assert_allclose(perm0, perm1, 1e-99)
 
 
+class GeneratorRNGTests(unittest.TestCase):
+
+    def setUp(self):
+        self.orig_mpi_config = random.get_mpi_config
+
+    def tearDown(self):
+        random.get_mpi_config = self.orig_mpi_config
+
+    def test_parallel_safe_with_mask(self):
+        random.get_mpi_config = lambda: (1, 2)
+        rng1 = random.GeneratorRNG(seed=1000)
+        rng_check = random.GeneratorRNG(seed=1000)
+        mask = np.array((0, 1, 0, 1, 0), bool)
+        draw1 = rng1.next(5, 'normal', {'mu': 0, 'sigma': 1}, mask=mask)
+        draw_check = rng_check.next(5, 'normal', {'mu': 0, 'sigma': 1})
+        self.assertEqual(draw1.tolist(), draw_check[mask].tolist())
+
+    def test_parallel_unsafe_uses_spawned_streams(self):
+        draws = []
+        for rank in range(2):
+            random.get_mpi_config = lambda: (rank, 2)
+            rng = random.GeneratorRNG(seed=1000, parallel_safe=False)
+            self.assertEqual(rng.seed, 1000)
+            self.assertEqual(rng.seed_sequence.spawn_key, (rank,))
+            draws.append(rng.next(5).tolist())
+        self.assertNotEqual(draws[0], draws[1])
+
+    def test_spawn(self):
+        rng = random.GeneratorRNG(seed=1000, bit_generator="SFC64")
+        children = rng.spawn(3)
+        draws = [child.next(5).tolist() for child in children]
+        self.assertNotEqual(draws[0], draws[1])
+        self.assertNotEqual(draws[1], draws[2])
+        self.assertEqual(str(children[2]), "GeneratorRNG(seed=1000, spawn_key=(2,))")
+        # the same seed gives the same children
+        other = random.GeneratorRNG(seed=1000, bit_generator="SFC64").spawn(3)[1]
+        self.assertEqual(other.next(5).tolist(), draws[1])
+        # later calls give new streams
+        self.assertEqual(rng.spawn(1)[0].seed_sequence.spawn_key, (3,))
+
+    def test_all_distributions(self):
+        rng = random.GeneratorRNG(seed=1000)
+        for name, parameter_names in random.available_distributions.items():
+            rd = random.RandomDistribution(name, {
+                'binomial': (10, 0.5),
+                'gamma': (2.0, 0.5),
+                'exponential': (2.0,),
+                'lognormal': (0.0, 1.0),
+                'normal': (0.0, 1.0),
+                'normal_clipped': (0.0, 1.0, -0.5, 0.5),
+                'normal_clipped_to_boundary': (0.0, 1.0, -0.5, 0.5),
+                'poisson': (3.0,),
+                'uniform': (-1.0, 1.0),
+                'uniform_int': (-2, 3),
+                'vonmises': (0.0, 1.0)}[name], rng=rng)
+            self.assertEqual(rd.next(100).shape, (100,))
+        values = random.RandomDistribution('normal_clipped', (0.0, 1.0, -0.5, 0.5),
+                                           rng=rng).next(100)
+        self.assertTrue(((values >= -0.5) & (values <= 0.5)).all())
+
+    def test_state(self):
+        rng = random.GeneratorRNG(seed=1000)
+        state = rng.get_state()
+        x = rng.next(5)
+        rng.set_state(state)
+        self.assertEqual(rng.next(5).tolist(), x.tolist())
+        self.assertEqual(deepcopy(rng).next(5).tolist(), rng.next(5).tolist())
+
+    def test_deepcopy_has_own_seed_sequence(self):
+        rng = random.GeneratorRNG(seed=1000)
+        rng.spawn(2)
+        rng_copy = deepcopy(rng)
+        self.assertIsNot(rng_copy.seed_sequence, rng.seed_sequence)
+        # the copy continues from the same point...
+        self.assertEqual(rng_copy.spawn(1)[0].seed_sequence.spawn_key, (2,))
+        # ...without affecting the children of the original
+        self.assertEqual(rng.spawn(1)[0].seed_sequence.spawn_key, (2,))
+        self.assertEqual(rng_copy.spawn(1)[0].next(5).tolist(),
+                         rng.spawn(1)[0].next(5).tolist())
+
+
+class PhiloxRNGTests(unittest.TestCase):
+
+    def test_masked_draws_match_full_draw(self):
+        rng = random.PhiloxRNG(seed=1000)
+        rng.block_size = 16
+        full = rng.next(100, 'normal', {'mu': 0, 'sigma': 1})
+        for n_processes in (2, 3, 7):
+            for rank in range(n_processes):
+                rng = random.PhiloxRNG(seed=1000)
+                rng.block_size = 16
+                mask = np.arange(100) % n_processes == rank
+                assert_allclose(rng.next(100, 'normal', {'mu': 0, 'sigma': 1}, mask=mask),
+                                full[mask], rtol=0)
+
+    def test_masked_draws_generate_only_touched_blocks(self):
+        rng = random.PhiloxRNG(seed=1000)
+        rng.block_size = 16
+        contiguous_mask = np.zeros(100, dtype=bool)
+        contiguous_mask[20:40] = True
+        strided_mask = np.arange(100) % 3 == 1
+        for mask, n_blocks in ((contiguous_mask, 2), (strided_mask, 7)):
+            with patch.object(rng, "_block", wraps=rng._block) as block:
+                rng.next(100, 'normal', {'mu': 0, 'sigma': 1}, mask=mask)
+            self.assertEqual(block.call_count, n_blocks)
+
+    def test_unsorted_index_mask(self):
+        rng = random.PhiloxRNG(seed=1000)
+        rng.block_size = 16
+        full = rng.next(100)
+        rng = random.PhiloxRNG(seed=1000)
+        rng.block_size = 16
+        index = np.array([70, 3, 50, 4])
+        assert_allclose(rng.next(100, mask=index), full[index], rtol=0)
+
+    def test_consecutive_draws_match_single_draw(self):
+        rng = random.PhiloxRNG(seed=1000)
+        full = rng.next(3000, 'uniform_int', {'low': 0, 'high': 100})
+        rng = random.PhiloxRNG(seed=1000)
+        parts = [rng.next(n, 'uniform_int', {'low': 0, 'high': 100}) for n in (1, 1500, 1499)]
+        self.assertEqual(np.hstack(parts).tolist(), full.tolist())
+
+    def test_all_distributions(self):
+        rng = random.PhiloxRNG(seed=1000)
+        for name, parameter_names in random.available_distributions.items():
+            parameters = dict(zip(parameter_names, {
+                'binomial': (10, 0.5),
+                'gamma': (2.0, 0.5),
+                'exponential': (2.0,),
+                'lognormal': (0.0, 1.0),
+                'normal': (0.0, 1.0),
+                'normal_clipped': (0.0, 1.0, -0.5, 0.5),
+                'normal_clipped_to_boundary': (0.0, 1.0, -0.5, 0.5),
+                'poisson': (3.0,),
+                'uniform': (-1.0, 1.0),
+                'uniform_int': (-2, 3),
+                'vonmises': (0.0, 1.0)}[name]))
+            values = rng.next(100, name, parameters)
+            self.assertEqual(values.shape, (100,))
+        for name in ('normal_clipped', 'normal_clipped_to_boundary'):
+            values = rng.next(100, name, {'mu': 0.0, 'sigma': 1.0, 'low': -0.5, 'high': 0.5})
+            self.assertTrue(((values >= -0.5) & (values <= 0.5)).all())
+
+    def test_skip_and_state(self):
+        rng = random.PhiloxRNG(seed=1000)
+        full = rng.next(20)
+        rng = random.PhiloxRNG(seed=1000)
+        rng.skip(5)
+        state = rng.get_state()
+        assert_allclose(rng.next(15), full[5:], rtol=0)
+        rng.set_state(state)
+        assert_allclose(rng.next(15), full[5:], rtol=0)
+
+    def test_partial_evaluation(self):
+        from pyNN.parameters import LazyArray
+        rd = random.RandomDistribution('uniform', (0, 1), rng=random.PhiloxRNG(seed=1000))
+        full = LazyArray(rd, shape=(7, 5)).evaluate()
+        rd.rng = random.PhiloxRNG(seed=1000)
+        mask = np.array([True, False, False, True, True])
+        assert_allclose(LazyArray(rd, shape=(7, 5))._partially_evaluate((slice(None), mask)),
+                        full[:, mask], rtol=0)
+
+    def test_by_column_block_skips_non_local_columns(self):
+        from pyNN.parameters import LazyArray
+        mask = np.array([True, False, False, True, True])
+        results = []
+        for m in (None, mask):
+            rd = random.RandomDistribution('uniform', (0, 1), rng=random.PhiloxRNG(seed=1000))
+            results.append(np.hstack([block for _, block in
+                                      LazyArray(rd, shape=(7, 5)).by_column_block(2, m)]))
+        assert_allclose(results[1], results[0][:, mask], rtol=0)
+
+
 class NativeRNGTests(unittest.TestCase):
 
     def test_create(self):
@@ -166,7 +342,8 @@ class RandomDistributionTests(unittest.TestCase):
 
     def setUp(self):
         random.get_mpi_config = lambda: (0, 1)
-        self.rnglist = [random.NumpyRNG(seed=987)]
+        self.rnglist = [random.NumpyRNG(seed=987), random.GeneratorRNG(seed=765),
+                        random.PhiloxRNG(seed=876)]
         if random.have_gsl:
             self.rnglist.append(random.GSLRNG(seed=654))
         if have_nrn:
@@ -226,11 +403,54 @@ class RandomDistributionTests(unittest.TestCase):
     def test_max_redraws(self):
         # for certain parameterizations, clipped distributions can require a very large, possibly infinite
         # number of redraws. This should be caught.
-        for rng in self.rnglist:
+        rnglist = [random.NumpyRNG(seed=987, rejection_sampling=True)]
+        if random.have_gsl:
+            rnglist.append(random.GSLRNG(seed=654, rejection_sampling=True))
+        for rng in rnglist:
             rd1 = random.RandomDistribution(
                 'normal_clipped', mu=0, sigma=1, low=5, high=np.inf, rng=rng)
             self.assertRaises(Exception, rd1.next, 1000)
 
+    @unittest.skipUnless(random.have_scipy, "Requires SciPy")
+    def test_clipped_far_tail(self):
+        # without rejection sampling, the cost does not depend on the probability
+        # mass between the bounds
+        for rng in self.rnglist:
+            if isinstance(rng, random.NativeRNG):
+                continue
+            rd1 = random.RandomDistribution(
+                'normal_clipped', mu=0, sigma=1, low=5, high=np.inf, rng=rng)
+            vals = rd1.next(1000)
+            self.assertTrue((vals >= 5).all())
+            # the mean of the truncated distribution is about 5.186
+            self.assertAlmostEqual(vals.mean(), 5.186, delta=0.05)
+            rd2 = random.RandomDistribution(
+                'normal_clipped', mu=-1, sigma=0.5, low=-10, high=-9.99, rng=rng)
+            vals = rd2.next(1000)
+            self.assertTrue(((vals >= -10) & (vals <= -9.99)).all())
+
+    def test_clipped_rejection_sampling_sequence(self):
+        # rejection sampling reproduces the sequence from earlier versions of PyNN
+        rng = random.NumpyRNG(seed=987, rejection_sampling=True)
+        vals = rng.next(100, 'normal_clipped', {'mu': 0, 'sigma': 1, 'low': -1, 'high': 1})
+        # values within the bounds are kept, those outside are redrawn in place
+        expected = np.random.RandomState(987).normal(size=100)
+        kept = np.abs(expected) <= 1
+        self.assertEqual(vals[kept].tolist(), expected[kept].tolist())
+        self.assertNotEqual(vals[~kept].tolist(), expected[~kept].tolist())
+
+    def test_clipped_without_scipy(self):
+        # without SciPy, values outside the bounds are redrawn
+        parameters = {'mu': 0, 'sigma': 1, 'low': -1, 'high': 1}
+        with patch.object(random, "have_scipy", False):
+            vals = random.NumpyRNG(seed=987).next(100, 'normal_clipped', parameters)
+            for rng in (random.GeneratorRNG(seed=987), random.PhiloxRNG(seed=987)):
+                other_vals = rng.next(100, 'normal_clipped', parameters)
+                self.assertTrue((np.abs(other_vals) <= 1).all())
+        expected = random.NumpyRNG(seed=987, rejection_sampling=True).next(
+            100, 'normal_clipped', parameters)
+        self.assertEqual(vals.tolist(), expected.tolist())
+
 
 # ==============================================================================
 if __name__ == "__main__":
@@ -1,10 +1,12 @@
 
 from datetime import datetime
-from collections import defaultdict
 from unittest.mock import Mock
 import pytest
+import numpy as np
+from numpy.testing import assert_array_equal
 
 import neo
+import quantities as pq
 from pyNN import recording, errors
 from pyNN.recording import Variable
 
@@ -29,6 +31,54 @@ from pyNN.recording import Variable
 
 # def test_gather_dict():
 
+
+def test_gather_columns():
+    pytest.importorskip("mpi4py")
+    # with a single MPI process, the gathered columns are the local ones, with their dtypes
+    columns = [np.array([3, 1, 2]), np.array([0.5, 1.5, 2.5])]
+    for all in (False, True):
+        gathered = recording.gather_columns(columns, all=all)
+        assert [c.tolist() for c in gathered] == [c.tolist() for c in columns]
+        assert [c.dtype for c in gathered] == [c.dtype for c in columns]
+
+
+def test_gather_array():
+    pytest.importorskip("mpi4py")
+    # with a single MPI process, the gathered array is the local one
+    data = np.arange(12.0).reshape((6, 2))
+    gathered = recording.gather_array(data)
+    assert gathered.shape == (6, 2)
+    assert (gathered == data).all()
+
+
+def test_gather_blocks():
+    pytest.importorskip("mpi4py")
+    # with a single MPI process, the gathered block contains the local data
+    segment = neo.Segment()
+    segment.spiketrains = [
+        neo.SpikeTrain([1.0, 2.0], t_stop=10.0, units="ms", channel_id=8, source_index=1,
+                       source_population="p"),
+        neo.SpikeTrain([0.5], t_stop=10.0, units="ms", channel_id=7, source_index=0,
+                       source_population="p")
+    ]
+    segment.analogsignals = [
+        neo.AnalogSignal(np.arange(6.0).reshape((3, 2)), units="mV", sampling_period=0.1 * pq.ms,
+                         name="v", channel_ids=np.array([7, 8]), source_population="p",
+                         array_annotations={"channel_index": np.array([0, 1])})
+    ]
+    block = neo.Block()
+    block.segments.append(segment)
+    gathered = recording.gather_blocks(block).segments[0]
+    assert [st.annotations["channel_id"] for st in gathered.spiketrains] == [7, 8]
+    assert gathered.spiketrains[1].times.magnitude.tolist() == [1.0, 2.0]
+    assert gathered.spiketrains[1].annotations["source_population"] == "p"
+    signal = gathered.analogsignals[0]
+    assert signal.name == "v"
+    assert (signal.magnitude == np.arange(6.0).reshape((3, 2))).all()
+    assert signal.annotations["channel_ids"].tolist() == [7, 8]
+    assert signal.array_annotations["channel_index"].tolist() == [0, 1]
+    assert signal.sampling_period == 0.1 * pq.ms
+
 # def test_mpi_sum():
 
 
@@ -89,6 +139,7 @@ class MockPopulation(object):
     label = "mock population"
     celltype = Mock(always_local=False)
     annotations = {'knights_say': 'Ni!'}
+    _mask_local = np.array([True, False, True, True, False, True, False, True, True, False, True])
 
     def __len__(self):
         return self.size
@@ -123,45 +174,37 @@ def test_Recorder_create():
     r = MockRecorder(p)
     assert r.population == p
     assert r.file == None
-    assert r.recorded == defaultdict(set)
+    assert dict(r.recorded) == {}
 
 
 def test_Recorder_invalid_variable():
     p = MockPopulation()
     r = MockRecorder(p)
-    all_ids = (MockID(0, True), MockID(1, False), MockID(
-        2, True), MockID(3, True), MockID(4, False))
+    all_ids = np.arange(5)
     with pytest.raises(errors.RecordingError):
         r.record('foo', all_ids)
 
 
-class MockID(object):
-
-    def __init__(self, id, local):
-        self.id = id
-        self.local = local
-
-
 def test_record():
     p = MockPopulation()
     r = MockRecorder(p)
     r._record = Mock()
     spam_var = Variable(location=None, name='spam', label=None)
-    assert r.recorded == defaultdict(set)
+    assert dict(r.recorded) == {}
 
-    all_ids = (MockID(0, True), MockID(1, False), MockID(
-        2, True), MockID(3, True), MockID(4, False))
+    all_ids = np.arange(5)  # cells 1 and 4 are not local
     first_ids = all_ids[0:3]
     r.record('spam', first_ids)
-    assert r.recorded[spam_var] == set(id for id in first_ids if id.local)
-    assert len(r.recorded[spam_var]) == 2
-    r._record.assert_called_with(spam_var, r.recorded[spam_var], None)
+    assert_array_equal(r.recorded[spam_var], [0, 2])
+    variable, new_ids, sampling_interval = r._record.call_args[0]
+    assert variable == spam_var
+    assert_array_equal(new_ids, [0, 2])
 
     more_ids = all_ids[2:5]
     r.record('spam', more_ids)
-    assert r.recorded[spam_var] == set(id for id in all_ids if id.local)
-    assert len(r.recorded[spam_var]) == 3
-    r._record.assert_called_with(spam_var, set(all_ids[3:4]), None)
+    assert_array_equal(r.recorded[spam_var], [0, 2, 3])
+    variable, new_ids, sampling_interval = r._record.call_args[0]
+    assert_array_equal(new_ids, [3])
 
 
 def test_filter_recorded():
@@ -170,16 +213,16 @@ def test_filter_recorded():
     r._record = Mock()
     spam_var = Variable(location=None, name='spam', label=None)
     spikes_var = Variable(location=None, name='spikes', label=None)
-    all_ids = (MockID(0, True), MockID(1, False), MockID(2, True), MockID(3, True), MockID(4, False))
+    all_ids = np.arange(5)
     r.record(['spikes', 'spam'], all_ids)
-    assert r.recorded[spikes_var] == set(id for id in all_ids if id.local)
-    assert r.recorded[spam_var] == set(id for id in all_ids if id.local)
+    assert_array_equal(r.recorded[spikes_var], [0, 2, 3])
+    assert_array_equal(r.recorded[spam_var], [0, 2, 3])
 
     filter = all_ids[::2]
     filtered_ids = r.filter_recorded(spam_var, filter)
-    assert filtered_ids == set(id for id in filter if id.local)
+    assert_array_equal(filtered_ids, [0, 2])
 
-    assert r.filter_recorded(spikes_var, None) == r.recorded[spikes_var]
+    assert r.filter_recorded(spikes_var, None) is r.recorded[spikes_var]
 
 
 def test_get():
@@ -82,6 +82,13 @@ class SpaceTest(unittest.TestCase):
                                          (sqrt(3), sqrt(12), 0.0, sqrt(50.0)),
                                          (sqrt(29), sqrt(14), sqrt(50.0), 0.0)]))
 
+    def test_generator_with_pointwise_addresses(self):
+        s = space.Space()
+        def f(i): return self.ABCD[i]
+        def g(j): return self.ABCD[j]
+        assert_array_equal(s.distance_generator(f, g)(np.array([0, 1, 3]), np.array([1, 2, 3])),
+                           np.array([sqrt(3), sqrt(12), 0.0]))
+
     def test_infinite_space_with_collapsed_axes(self):
         s_x = space.Space(axes='x')
         s_xy = space.Space(axes='xy')
@@ -116,6 +123,43 @@ class SpaceTest(unittest.TestCase):
                                np.array([sqrt(3), sqrt(4 + 4 + 4), 0.0, sqrt(4 + 1 + 0)]))
 
 
+class CellGridTest(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.RandomState(4512)
+        self.positions = rng.uniform(0.0, 10.0, size=(200, 3))
+        self.targets = rng.uniform(0.0, 10.0, size=(20, 3))
+
+    def check_query(self, s, distance):
+        grid = space.CellGrid(self.positions, distance, s)
+        for target in self.targets:
+            indices, distances = grid.query(target, distance)
+            all_distances = s.distances(self.positions, target)
+            assert_array_equal(indices, np.nonzero(all_distances <= distance)[0])
+            assert_allclose(distances, all_distances[indices])
+
+    def test_query(self):
+        self.check_query(space.Space(), 1.5)
+
+    def test_query_with_collapsed_axes(self):
+        self.check_query(space.Space(axes="xy"), 0.7)
+
+    def test_query_with_scale_and_offset(self):
+        self.check_query(space.Space(scale_factor=0.8, offset=1.0), 2.0)
+
+    def test_query_with_periodic_boundaries(self):
+        s = space.Space(periodic_boundaries=((0.0, 10.0), None, (0.0, 10.0)))
+        self.check_query(s, 2.5)
+        # cell size larger than half of the periodic extent
+        self.check_query(s, 6.0)
+
+    def test_query_with_no_neighbours(self):
+        grid = space.CellGrid(self.positions, 1.0)
+        indices, distances = grid.query(np.array([100.0, 100.0, 100.0]), 1.0)
+        self.assertEqual(indices.size, 0)
+        self.assertEqual(distances.size, 0)
+
+
 class LineTest(unittest.TestCase):
 
     def test_generate_positions_default_parameters(self):